@@ -0,0 +1,103 @@
+"""Verified-token cache and token revocation list used by get_current_user"""
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+def token_digest(token):
+    """Digest a bearer token so raw tokens are never kept as cache or revocation keys"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenCache:
+    """Bounded LRU of already verified token payloads keyed by token digest.
+
+    Entries expire together with the token they describe, so a cached payload
+    is never served after the token's own ``exp`` claim has passed.
+    """
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, digest, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is None:
+                return None
+            payload, expires_at = entry
+            if expires_at <= now:
+                del self._entries[digest]
+                return None
+            self._entries.move_to_end(digest)
+            return payload
+
+    def put(self, digest, payload, expires_at):
+        with self._lock:
+            self._entries[digest] = (payload, expires_at)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def discard(self, digest):
+        with self._lock:
+            self._entries.pop(digest, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RevocationList:
+    """Revoked token digests plus per-user forced-expiry cut-offs.
+
+    Both kinds of entry carry an ``expires_at`` after which every token they
+    could match has expired on its own, so they can be pruned safely.
+    """
+
+    def __init__(self):
+        self._tokens = {}  # digest -> expires_at
+        self._users = {}  # username -> (revoked_before, expires_at)
+        self._lock = Lock()
+
+    def revoke_token(self, digest, expires_at):
+        with self._lock:
+            self._tokens[digest] = expires_at
+
+    def revoke_user(self, username, revoked_before, expires_at):
+        with self._lock:
+            self._users[username] = (revoked_before, expires_at)
+
+    def is_revoked(self, digest, username, issued_at):
+        if digest in self._tokens:
+            return True
+        cutoff = self._users.get(username)
+        return cutoff is not None and issued_at < cutoff[0]
+
+    def load(self, entries, now=None):
+        """Merge revocation documents from the data layer and drop expired entries"""
+        now = time.time() if now is None else now
+        with self._lock:
+            for entry in entries:
+                expires_at = entry.get("expires_at", 0)
+                if expires_at <= now:
+                    continue
+                if entry.get("kind") == "user":
+                    current = self._users.get(entry["username"])
+                    if current is None or current[0] < entry["revoked_before"]:
+                        self._users[entry["username"]] = (entry["revoked_before"], expires_at)
+                else:
+                    self._tokens[entry["id"]] = expires_at
+        self.prune(now)
+
+    def prune(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._tokens = {d: exp for d, exp in self._tokens.items() if exp > now}
+            self._users = {u: entry for u, entry in self._users.items() if entry[1] > now}
@@ -0,0 +1,171 @@
+"""In-memory bitmap indexes for faceted filtering.
+
+Every indexed document gets a slot number; each (facet, value) pair keeps a
+bitset of the slots that have it, stored as a Python int. A filter
+combination resolves with bitwise OR within a facet and AND across facets,
+and facet counts are popcounts of value bitsets ANDed with the filtered set.
+The indexes are updated one document at a time on writes.
+"""
+import threading
+import time
+
+
+def popcount(bits):
+    """Number of set bits (int.bit_count needs Python 3.10; Vercel runs 3.9)"""
+    return bin(bits).count("1")
+
+
+def field_values(value):
+    """The facet values of a document field: list items, or the value itself"""
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple, set)):
+        return tuple({item for item in value if item is not None and item != ""})
+    return (value,)
+
+
+class BitmapIndex:
+    """Bitsets of document slots per (facet, value), safe to share across threads.
+
+    ``facets`` maps facet names to the document field they index.
+    """
+
+    def __init__(self, facets):
+        self.facets = dict(facets)
+        self._lock = threading.RLock()
+        self.slots = {}  # document id -> slot
+        self.free_slots = []  # slots of removed documents, reused first
+        self.next_slot = 0
+        self.values = {}  # slot -> {facet: values}, to clear bits on update
+        self.bitmaps = {facet: {} for facet in self.facets}
+        # Popcount of every bitmap, so unfiltered facet counts cost nothing
+        self.counts = {facet: {} for facet in self.facets}
+        self.all = 0
+        self.built_at = None  # time.time() of the last rebuild
+        self._writes = None  # doc id -> document (None if removed) since begin_rebuild()
+
+    def __len__(self):
+        return len(self.slots)
+
+    def _set(self, doc_id, doc):
+        slot = self.slots.get(doc_id)
+        if slot is None:
+            slot = self.free_slots.pop() if self.free_slots else self.next_slot
+            self.next_slot = max(self.next_slot, slot + 1)
+            self.slots[doc_id] = slot
+        else:
+            self._clear(slot)
+        bit = 1 << slot
+        values = {facet: field_values(doc.get(field)) for facet, field in self.facets.items()}
+        for facet, facet_values in values.items():
+            bitmaps = self.bitmaps[facet]
+            counts = self.counts[facet]
+            for value in facet_values:
+                bitmaps[value] = bitmaps.get(value, 0) | bit
+                counts[value] = counts.get(value, 0) + 1
+        self.values[slot] = values
+        self.all |= bit
+
+    def _clear(self, slot):
+        bit = 1 << slot
+        for facet, facet_values in self.values.pop(slot, {}).items():
+            bitmaps = self.bitmaps[facet]
+            counts = self.counts[facet]
+            for value in facet_values:
+                bits = bitmaps[value] & ~bit
+                if bits:
+                    bitmaps[value] = bits
+                    counts[value] -= 1
+                else:
+                    del bitmaps[value]
+                    del counts[value]
+        self.all &= ~bit
+
+    def add(self, doc_id, doc):
+        """Index a created or updated document"""
+        with self._lock:
+            self._set(doc_id, doc)
+            if self._writes is not None:
+                self._writes[doc_id] = doc
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._remove(doc_id)
+            if self._writes is not None:
+                self._writes[doc_id] = None
+
+    def _remove(self, doc_id):
+        slot = self.slots.pop(doc_id, None)
+        if slot is not None:
+            self._clear(slot)
+            self.free_slots.append(slot)
+
+    def begin_rebuild(self):
+        """Record writes from now on, so rebuild() can re-apply those its documents predate"""
+        with self._lock:
+            self._writes = {}
+
+    def rebuild(self, documents):
+        """Replace the index with documents that carry an ``id``, then re-apply
+        writes made since begin_rebuild().
+
+        The new bitmaps are built without the lock, so queries and writes
+        keep using the old ones and only wait for the swap.
+        """
+        fresh = BitmapIndex(self.facets)
+        for doc in documents:
+            fresh._set(doc["id"], doc)
+        with self._lock:
+            for doc_id, doc in (self._writes or {}).items():
+                if doc is None:
+                    fresh._remove(doc_id)
+                else:
+                    fresh._set(doc_id, doc)
+            self._writes = None
+            self.slots = fresh.slots
+            self.free_slots = fresh.free_slots
+            self.next_slot = fresh.next_slot
+            self.values = fresh.values
+            self.bitmaps = fresh.bitmaps
+            self.counts = fresh.counts
+            self.all = fresh.all
+            self.built_at = time.time()
+
+    def _match(self, filters, skip=None):
+        bits = self.all
+        for facet, wanted in filters.items():
+            if facet == skip or not wanted:
+                continue
+            bitmaps = self.bitmaps[facet]
+            facet_bits = 0
+            for value in wanted:
+                facet_bits |= bitmaps.get(value, 0)
+            bits &= facet_bits
+        return bits
+
+    def count(self, filters):
+        with self._lock:
+            return popcount(self._match(filters))
+
+    def facet_counts(self, filters, limit=None):
+        """{facet: [(value, count)]} for documents matching ``filters``.
+
+        A facet's own filter is left out of its counts, so the counts show
+        what selecting another value of that facet would return. Values are
+        ordered by count, then value; ``limit`` keeps the most frequent.
+        """
+        with self._lock:
+            facets = {}
+            for facet in self.facets:
+                base = self._match(filters, skip=facet)
+                if base == self.all:
+                    counts = list(self.counts[facet].items())
+                else:
+                    counts = []
+                    for value, bits in self.bitmaps[facet].items():
+                        count = popcount(bits & base)
+                        if count:
+                            counts.append((value, count))
+                counts.sort(key=lambda item: (-item[1], str(item[0])))
+                facets[facet] = counts[:limit] if limit else counts
+            return facets
@@ -0,0 +1,271 @@
+"""Columnar in-memory copy of the publications collection for analytics.
+
+Scalar fields live in NumPy arrays indexed by row (year, citations and a
+dictionary-encoded publication type). The multi-valued authors and
+research areas are dictionary-encoded and stored as (row, code) pair
+arrays, so per-author and per-area aggregations are single bincounts.
+
+Writes are applied incrementally: an update appends a new row and marks
+the old one dead, a delete only marks it dead, and the arrays are
+compacted once dead rows outnumber live ones.
+"""
+import threading
+import time
+
+import numpy as np
+
+INITIAL_CAPACITY = 1024
+# Attributes holding the column data, swapped in as a whole by rebuild()
+STATE = (
+    "rows", "ids", "titles", "alive", "year", "citations", "type_code", "types", "authors", "areas",
+    "author_rows", "author_codes", "area_rows", "area_codes",
+)
+
+
+class Dictionary:
+    """Dense integer codes for repeated string values"""
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def __len__(self):
+        return len(self.values)
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+
+class GrowableArray:
+    """A NumPy array with amortised appends"""
+
+    def __init__(self, dtype, capacity=INITIAL_CAPACITY):
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.size = 0
+
+    def append(self, value):
+        if self.size == len(self.data):
+            self.data = np.concatenate([self.data, np.zeros_like(self.data)])
+        self.data[self.size] = value
+        self.size += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            capacity = len(self.data)
+            while capacity < needed:
+                capacity *= 2
+            grown = np.zeros(capacity, dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    @property
+    def view(self):
+        return self.data[:self.size]
+
+
+def text_values(value):
+    """Distinct non-empty strings of a list field"""
+    if not isinstance(value, (list, tuple)):
+        value = [value] if value else []
+    return list(dict.fromkeys(str(item).strip() for item in value if item and str(item).strip()))
+
+
+def as_int(value):
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+class PublicationColumns:
+    """Publications as columns, safe to share across threads.
+
+    Queries aggregate over live rows only; ``built_at`` is the time.time()
+    of the last rebuild() from storage, or None before the first.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.built_at = None
+        self._writes = None  # doc id -> document (None if removed) since begin_rebuild()
+        self._reset()
+
+    def _reset(self):
+        self.rows = {}  # document id -> live row
+        self.ids = []  # row -> document id
+        self.titles = []  # row -> title
+        self.alive = GrowableArray(np.bool_)
+        self.year = GrowableArray(np.int32)
+        self.citations = GrowableArray(np.int64)
+        self.type_code = GrowableArray(np.int32)
+        self.types = Dictionary()
+        self.authors = Dictionary()
+        self.areas = Dictionary()
+        # (row, code) pairs of the multi-valued fields
+        self.author_rows = GrowableArray(np.int64)
+        self.author_codes = GrowableArray(np.int32)
+        self.area_rows = GrowableArray(np.int64)
+        self.area_codes = GrowableArray(np.int32)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _append(self, doc_id, doc):
+        row = len(self.ids)
+        self.rows[doc_id] = row
+        self.ids.append(doc_id)
+        self.titles.append(doc.get("title") or "")
+        self.alive.append(True)
+        self.year.append(as_int(doc.get("year")))
+        self.citations.append(as_int(doc.get("citations")))
+        self.type_code.append(self.types.encode(doc.get("publication_type") or ""))
+        authors = [self.authors.encode(author) for author in text_values(doc.get("authors"))]
+        self.author_rows.extend([row] * len(authors))
+        self.author_codes.extend(authors)
+        areas = [self.areas.encode(area) for area in text_values(doc.get("research_areas"))]
+        self.area_rows.extend([row] * len(areas))
+        self.area_codes.extend(areas)
+
+    def _kill(self, doc_id):
+        row = self.rows.pop(doc_id, None)
+        if row is not None:
+            self.alive.data[row] = False
+            if len(self.ids) > 2 * len(self.rows) + INITIAL_CAPACITY:
+                self._compact()
+
+    def _compact(self):
+        """Drop dead rows, renumbering the live ones and their pairs"""
+        live = np.flatnonzero(self.alive.view)
+        renumber = np.full(len(self.ids), -1, dtype=np.int64)
+        renumber[live] = np.arange(len(live))
+        self.ids = [self.ids[row] for row in live]
+        self.titles = [self.titles[row] for row in live]
+        self.rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        for column in (self.alive, self.year, self.citations, self.type_code):
+            values = column.view[live]
+            column.size = 0
+            column.extend(values)
+        for rows, codes in ((self.author_rows, self.author_codes), (self.area_rows, self.area_codes)):
+            mask = renumber[rows.view] >= 0
+            live_rows, live_codes = renumber[rows.view][mask], codes.view[mask]
+            rows.size = codes.size = 0
+            rows.extend(live_rows)
+            codes.extend(live_codes)
+
+    def add(self, doc_id, doc):
+        """Apply a created or updated publication"""
+        with self._lock:
+            self._kill(doc_id)
+            self._append(doc_id, doc)
+            if self._writes is not None:
+                self._writes[doc_id] = doc
+
+    def remove(self, doc_id):
+        with self._lock:
+            self._kill(doc_id)
+            if self._writes is not None:
+                self._writes[doc_id] = None
+
+    def begin_rebuild(self):
+        """Record writes from now on, so rebuild() can re-apply those its documents predate"""
+        with self._lock:
+            self._writes = {}
+
+    def rebuild(self, documents):
+        """Replace the columns with publications that carry an ``id``, then
+        re-apply writes made since begin_rebuild().
+
+        The new columns are built without the lock, so queries and writes
+        keep using the old ones and only wait for the swap.
+        """
+        fresh = PublicationColumns()
+        for doc in documents:
+            fresh._append(doc["id"], doc)
+        with self._lock:
+            for doc_id, doc in (self._writes or {}).items():
+                fresh._kill(doc_id)
+                if doc is not None:
+                    fresh._append(doc_id, doc)
+            self._writes = None
+            for name in STATE:
+                setattr(self, name, getattr(fresh, name))
+            self.built_at = time.time()
+
+    def _live_pairs(self, rows, codes):
+        mask = self.alive.view[rows.view]
+        return rows.view[mask], codes.view[mask]
+
+    def citations_per_year(self):
+        """[{"year", "publications", "citations"}] for years with publications, oldest first"""
+        with self._lock:
+            # Publications without a year are left out
+            dated = self.alive.view & (self.year.view > 0)
+            years = self.year.view[dated]
+            citations = self.citations.view[dated]
+            if not len(years):
+                return []
+            first = years.min()
+            counts = np.bincount(years - first)
+            totals = np.bincount(years - first, weights=citations)
+        return [
+            {"year": int(first + offset), "publications": int(counts[offset]), "citations": int(totals[offset])}
+            for offset in np.flatnonzero(counts)
+        ]
+
+    def citations_per_area(self):
+        """[{"research_area", "publications", "citations"}], most cited first"""
+        with self._lock:
+            rows, codes = self._live_pairs(self.area_rows, self.area_codes)
+            counts = np.bincount(codes, minlength=len(self.areas))
+            totals = np.bincount(codes, weights=self.citations.view[rows], minlength=len(self.areas))
+            areas = list(self.areas.values)
+        order = np.lexsort((-counts, -totals))
+        return [
+            {"research_area": areas[code], "publications": int(counts[code]), "citations": int(totals[code])}
+            for code in order if counts[code]
+        ]
+
+    def h_index(self, author=None):
+        """The largest h with h publications cited at least h times each"""
+        with self._lock:
+            if author is None:
+                citations = self.citations.view[self.alive.view]
+            else:
+                code = self.authors.codes.get(author)
+                if code is None:
+                    return 0
+                rows, codes = self._live_pairs(self.author_rows, self.author_codes)
+                citations = self.citations.view[rows[codes == code]]
+        ranked = np.sort(citations)[::-1]
+        return int(np.count_nonzero(ranked >= np.arange(1, len(ranked) + 1)))
+
+    def top_cited(self, limit=10):
+        """The ``limit`` most cited publications, most cited first"""
+        with self._lock:
+            live = np.flatnonzero(self.alive.view)
+            citations = self.citations.view[live]
+            limit = min(limit, len(live))
+            if not limit:
+                return []
+            # Partial selection, then sort only the selected rows
+            top = np.argpartition(-citations, limit - 1)[:limit]
+            top = top[np.argsort(-citations[top], kind="stable")]
+            rows = live[top]
+            return [
+                {
+                    "id": self.ids[row],
+                    "title": self.titles[row],
+                    "year": int(self.year.data[row]),
+                    "citations": int(self.citations.data[row]),
+                    "publication_type": self.types.values[self.type_code.data[row]],
+                }
+                for row in rows
+            ]
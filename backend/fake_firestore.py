@@ -0,0 +1,652 @@
+"""In-process stand-in for the subset of google.cloud.firestore used by the backend.
+
+Selected with FIRESTORE_BACKEND=fake, it runs server.py's real Firestore
+code paths (queries, projections, batches, sub-collections, aggregations)
+without a Google Cloud project. Every RPC can be given a latency
+distribution and a failure rate, and billable reads, writes and deletes are
+counted, so the backend can be load-tested and benchmarked offline.
+
+Latency specs look like ``"get=lognormal:8:0.5,query=lognormal:20:0.6,query_per_doc=fixed:0.05"``:
+an operation (get, query, query_per_doc, aggregate, write, delete, or ``*``
+for all), then ``fixed:ms``, ``uniform:low_ms:high_ms``, ``normal:mean_ms:sd_ms``
+or ``lognormal:median_ms:sigma``.
+"""
+import copy
+import json
+import math
+import os
+import random
+import string
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+try:
+    from google.api_core.exceptions import (
+        AlreadyExists, NotFound, ServiceUnavailable, DeadlineExceeded, InvalidArgument,
+    )
+except ImportError:
+    class AlreadyExists(Exception):
+        pass
+
+    class NotFound(Exception):
+        pass
+
+    class ServiceUnavailable(Exception):
+        pass
+
+    class DeadlineExceeded(Exception):
+        pass
+
+    class InvalidArgument(Exception):
+        pass
+
+try:
+    from google.cloud.firestore import DELETE_FIELD as GOOGLE_DELETE_FIELD
+except ImportError:
+    GOOGLE_DELETE_FIELD = None
+
+
+class _Sentinel:
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+DELETE_FIELD = _Sentinel("DELETE_FIELD")
+SERVER_TIMESTAMP = _Sentinel("SERVER_TIMESTAMP")
+DELETE_SENTINELS = tuple(s for s in (DELETE_FIELD, GOOGLE_DELETE_FIELD) if s is not None)
+
+MAX_BATCH_WRITES = 500
+OPERATIONS = ("get", "query", "query_per_doc", "aggregate", "write", "delete")
+INJECTED_ERRORS = (ServiceUnavailable, DeadlineExceeded)
+
+
+class Query:
+    ASCENDING = "ASCENDING"
+    DESCENDING = "DESCENDING"
+
+    def __init__(self, client, path, filters=(), orders=(), limit=None, fields=None):
+        self._client = client
+        self._path = path
+        self._filters = tuple(filters)
+        self._orders = tuple(orders)
+        self._limit = limit
+        self._fields = fields
+
+    def _copy(self, **changes):
+        state = {"filters": self._filters, "orders": self._orders, "limit": self._limit, "fields": self._fields}
+        state.update(changes)
+        return Query(self._client, self._path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        if op_string not in OPERATORS:
+            raise ValueError(f"Unsupported operator {op_string!r}")
+        return self._copy(filters=self._filters + ((field_path, op_string, value),))
+
+    def order_by(self, field_path, direction=ASCENDING):
+        return self._copy(orders=self._orders + ((field_path, direction),))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def stream(self, transaction=None):
+        return iter(self._client._run_query(self))
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+    def count(self, alias=None):
+        return AggregationQuery(self).count(alias)
+
+    def sum(self, field_path, alias=None):
+        return AggregationQuery(self).sum(field_path, alias)
+
+    def avg(self, field_path, alias=None):
+        return AggregationQuery(self).avg(field_path, alias)
+
+    def matches(self, data):
+        for field_path, op_string, value in self._filters:
+            present, field_value = get_field(data, field_path)
+            if not present or not OPERATORS[op_string](field_value, value):
+                return False
+        # Firestore leaves out documents that lack an ordered field
+        return all(get_field(data, field_path)[0] for field_path, _ in self._orders)
+
+
+OPERATORS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: _comparable(a, b) and a < b,
+    "<=": lambda a, b: _comparable(a, b) and a <= b,
+    ">": lambda a, b: _comparable(a, b) and a > b,
+    ">=": lambda a, b: _comparable(a, b) and a >= b,
+    "in": lambda a, b: a in b,
+    "not-in": lambda a, b: a not in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+    "array-contains": lambda a, b: isinstance(a, list) and b in a,
+    "array_contains_any": lambda a, b: isinstance(a, list) and any(item in a for item in b),
+    "array-contains-any": lambda a, b: isinstance(a, list) and any(item in a for item in b),
+}
+
+
+def _comparable(a, b):
+    # Firestore only compares values of the same type
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool)
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return True
+    return type(a) is type(b)
+
+
+def sort_key(value):
+    # Mixed types sort by Firestore's type order, then by value
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    if isinstance(value, datetime):
+        return (3, value.timestamp())
+    if isinstance(value, str):
+        return (4, value)
+    return (5, repr(value))
+
+
+def get_field(data, field_path):
+    """(present, value) of a dotted field path"""
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return False, None
+        value = value[part]
+    return True, value
+
+
+def normalize(value):
+    """Store values as Firestore returns them: naive datetimes become UTC-aware copies"""
+    if isinstance(value, datetime):
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if value is SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    return value
+
+
+def is_delete(value):
+    return any(value is sentinel for sentinel in DELETE_SENTINELS)
+
+
+def apply_update(target, data):
+    for key, value in data.items():
+        parts = key.split(".")
+        container = target
+        for part in parts[:-1]:
+            container = container.setdefault(part, {})
+        if is_delete(value):
+            container.pop(parts[-1], None)
+        else:
+            container[parts[-1]] = normalize(value)
+
+
+def merge_into(target, data):
+    """set(..., merge=True): nested maps are merged rather than replaced"""
+    for key, value in data.items():
+        if is_delete(value):
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            merge_into(target[key], value)
+        else:
+            target[key] = normalize(value)
+
+
+def auto_id():
+    return "".join(random.choices(string.ascii_letters + string.digits, k=20))
+
+
+class AggregationResult:
+    def __init__(self, alias, value, read_time=None):
+        self.alias = alias
+        self.value = value
+        self.read_time = read_time
+
+
+class AggregationQuery:
+    def __init__(self, query):
+        self._query = query
+        self._aggregations = []
+
+    def count(self, alias=None):
+        self._aggregations.append(("count", None, alias or f"field_{len(self._aggregations) + 1}"))
+        return self
+
+    def sum(self, field_path, alias=None):
+        self._aggregations.append(("sum", field_path, alias or f"field_{len(self._aggregations) + 1}"))
+        return self
+
+    def avg(self, field_path, alias=None):
+        self._aggregations.append(("avg", field_path, alias or f"field_{len(self._aggregations) + 1}"))
+        return self
+
+    def get(self, transaction=None):
+        return [self._query._client._run_aggregation(self._query, self._aggregations)]
+
+    def stream(self, transaction=None):
+        return iter(self.get())
+
+
+class CollectionReference(Query):
+    def __init__(self, client, path):
+        super().__init__(client, path)
+
+    @property
+    def id(self):
+        return self._path.rsplit("/", 1)[-1]
+
+    def document(self, document_id=None):
+        return DocumentReference(self._client, f"{self._path}/{document_id or auto_id()}")
+
+    def add(self, document_data, document_id=None):
+        ref = self.document(document_id)
+        ref.create(document_data) if document_id else ref.set(document_data)
+        return datetime.now(timezone.utc), ref
+
+    def list_documents(self):
+        return [self.document(doc_id) for doc_id in self._client._documents(self._path)]
+
+
+class DocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+
+    @property
+    def id(self):
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        return CollectionReference(self._client, self.path.rsplit("/", 1)[0])
+
+    def collection(self, collection_id):
+        return CollectionReference(self._client, f"{self.path}/{collection_id}")
+
+    def get(self, field_paths=None, transaction=None):
+        return self._client._get(self, field_paths)
+
+    def create(self, document_data):
+        self._client._commit([("create", self, document_data, None)])
+
+    def set(self, document_data, merge=False):
+        self._client._commit([("set", self, document_data, merge)])
+
+    def update(self, field_updates):
+        self._client._commit([("update", self, field_updates, None)])
+
+    def delete(self):
+        self._client._commit([("delete", self, None, None)])
+
+    def __eq__(self, other):
+        return isinstance(other, DocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+
+class DocumentSnapshot:
+    def __init__(self, reference, data, create_time=None, update_time=None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+
+    @property
+    def id(self):
+        return self.reference.id
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path):
+        present, value = get_field(self._data or {}, field_path)
+        if not present:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class WriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def create(self, reference, document_data):
+        self._writes.append(("create", reference, document_data, None))
+        return self
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(("set", reference, document_data, merge))
+        return self
+
+    def update(self, reference, field_updates):
+        self._writes.append(("update", reference, field_updates, None))
+        return self
+
+    def delete(self, reference):
+        self._writes.append(("delete", reference, None, None))
+        return self
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes)
+
+    def __len__(self):
+        return len(self._writes)
+
+
+class Latency:
+    """A latency distribution in milliseconds; sample() returns seconds"""
+
+    def __init__(self, kind="fixed", *params):
+        self.kind = kind
+        self.params = [float(p) for p in params] or [0.0]
+
+    @classmethod
+    def parse(cls, spec):
+        kind, *params = spec.split(":")
+        if kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Unknown latency distribution {kind!r}")
+        return cls(kind, *params)
+
+    def sample(self, rng):
+        p = self.params
+        if self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1])
+        elif self.kind == "normal":
+            ms = rng.gauss(p[0], p[1])
+        elif self.kind == "lognormal":
+            ms = rng.lognormvariate(math.log(p[0]), p[1])
+        else:
+            ms = p[0]
+        return max(ms, 0.0) / 1000
+
+
+def parse_latency_spec(spec):
+    """``"get=lognormal:8:0.5,*=fixed:2"`` -> {operation: Latency}"""
+    latencies = {}
+    for entry in (spec or "").split(","):
+        if not entry.strip():
+            continue
+        operation, _, distribution = entry.strip().partition("=")
+        targets = OPERATIONS if operation == "*" else (operation,)
+        for target in targets:
+            if target not in OPERATIONS:
+                raise ValueError(f"Unknown Firestore operation {target!r}")
+            latencies[target] = Latency.parse(distribution)
+    return latencies
+
+
+class Client:
+    """Thread-safe in-memory Firestore with simulated latency, failures and billing.
+
+    ``stats`` counts billable reads, writes and deletes per collection path
+    the way Firestore bills them (at least one read per query, one per 1000
+    index entries for aggregations).
+    """
+
+    def __init__(self, project="fake-project", latency=None, error_rate=0.0, seed=None):
+        self.project = project
+        self.latency = parse_latency_spec(latency) if isinstance(latency, str) else dict(latency or {})
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._store = {}  # collection path -> {document id: (data, create_time, update_time)}
+        self._lock = threading.RLock()
+        self._forced_errors = []
+        self.stats = Counter()  # (collection path, "reads"|"writes"|"deletes") and ("rpcs", operation)
+
+    # Public API
+
+    def collection(self, collection_path):
+        return CollectionReference(self, collection_path)
+
+    def document(self, document_path):
+        return DocumentReference(self, document_path)
+
+    def batch(self):
+        return WriteBatch(self)
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        """Snapshots of many documents in one RPC, billed one read each"""
+        references = list(references)
+        self._rpc("get")
+        for reference in references:
+            yield self._snapshot(reference, field_paths)
+
+    def collections(self):
+        with self._lock:
+            return [CollectionReference(self, path) for path in self._store if "/" not in path]
+
+    # Test and benchmark controls
+
+    def fail_next(self, operation, error=None):
+        """Make the next RPC of ``operation`` (or ``*``) raise ``error``"""
+        self._forced_errors.append((operation, error or ServiceUnavailable("Injected failure")))
+
+    def reset_stats(self):
+        self.stats.clear()
+
+    def usage(self):
+        """Totals of billable operations: {"reads": n, "writes": n, "deletes": n}"""
+        totals = Counter()
+        for key, count in self.stats.items():
+            if key[0] != "rpcs":
+                totals[key[1]] += count
+        return {kind: totals[kind] for kind in ("reads", "writes", "deletes")}
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+
+    def dump(self, path):
+        """Write every document to a JSON file that load() can read back"""
+        with self._lock:
+            data = {
+                collection: {doc_id: entry[0] for doc_id, entry in documents.items()}
+                for collection, documents in self._store.items()
+            }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, default=_encode_json)
+
+    def load(self, path):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f, object_hook=_decode_json)
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for collection, documents in data.items():
+                target = self._store.setdefault(collection, {})
+                for doc_id, doc in documents.items():
+                    target[doc_id] = (normalize(doc), now, now)
+
+    def seed(self, collections):
+        """Add documents from {collection: [document with an "id" key]} without billing them"""
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            for collection, documents in collections.items():
+                target = self._store.setdefault(collection, {})
+                for doc in documents:
+                    data = normalize(copy.deepcopy(doc))
+                    doc_id = str(data.pop("id", None) or auto_id())
+                    target[doc_id] = (data, now, now)
+
+    # RPC simulation
+
+    def _rpc(self, operation, extra_seconds=0.0):
+        self.stats[("rpcs", operation)] += 1
+        for i, (forced_operation, error) in enumerate(self._forced_errors):
+            if forced_operation in (operation, "*"):
+                del self._forced_errors[i]
+                raise error
+        latency = self.latency.get(operation)
+        delay = (latency.sample(self._rng) if latency else 0.0) + extra_seconds
+        if delay:
+            # Blocking, like the real client's gRPC calls
+            time.sleep(delay)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            raise self._rng.choice(INJECTED_ERRORS)(f"Injected {operation} failure")
+
+    def _documents(self, collection_path):
+        with self._lock:
+            return list(self._store.get(collection_path, {}))
+
+    def _get(self, reference, field_paths=None):
+        self._rpc("get")
+        return self._snapshot(reference, field_paths)
+
+    def _snapshot(self, reference, field_paths=None):
+        collection_path = reference.path.rsplit("/", 1)[0]
+        self.stats[(collection_path, "reads")] += 1
+        with self._lock:
+            entry = self._store.get(collection_path, {}).get(reference.id)
+            if entry is None:
+                return DocumentSnapshot(reference, None)
+            data = entry[0]
+            if field_paths is not None:
+                data = project(data, field_paths)
+            return DocumentSnapshot(reference, copy.deepcopy(data), entry[1], entry[2])
+
+    def _matching(self, query):
+        with self._lock:
+            documents = list(self._store.get(query._path, {}).items())
+        results = [(doc_id, entry) for doc_id, entry in documents if query.matches(entry[0])]
+        for field_path, direction in reversed(query._orders):
+            results.sort(key=lambda item: sort_key(get_field(item[1][0], field_path)[1]),
+                         reverse=direction == Query.DESCENDING)
+        if query._limit is not None:
+            results = results[:query._limit]
+        return results
+
+    def _run_query(self, query):
+        results = self._matching(query)
+        per_doc = self.latency.get("query_per_doc")
+        extra = sum(per_doc.sample(self._rng) for _ in results) if per_doc else 0.0
+        self._rpc("query", extra)
+        self.stats[(query._path, "reads")] += max(1, len(results))
+        snapshots = []
+        for doc_id, (data, created, updated) in results:
+            if query._fields is not None:
+                data = project(data, query._fields)
+            reference = DocumentReference(self, f"{query._path}/{doc_id}")
+            snapshots.append(DocumentSnapshot(reference, copy.deepcopy(data), created, updated))
+        return snapshots
+
+    def _run_aggregation(self, query, aggregations):
+        results = self._matching(query)
+        self._rpc("aggregate")
+        self.stats[(query._path, "reads")] += len(results) // 1000 + 1
+        now = datetime.now(timezone.utc)
+        output = []
+        for kind, field_path, alias in aggregations:
+            if kind == "count":
+                value = len(results)
+            else:
+                values = [get_field(entry[0], field_path)[1] for _, entry in results]
+                numbers = [v for v in values if isinstance(v, (int, float)) and not isinstance(v, bool)]
+                if kind == "sum":
+                    value = sum(numbers)
+                else:
+                    value = sum(numbers) / len(numbers) if numbers else None
+            output.append(AggregationResult(alias, value, now))
+        return output
+
+    def _commit(self, writes):
+        if len(writes) > MAX_BATCH_WRITES:
+            raise InvalidArgument(f"maximum {MAX_BATCH_WRITES} writes allowed per request")
+        if not writes:
+            return []
+        deletes_only = all(kind == "delete" for kind, *_ in writes)
+        self._rpc("delete" if deletes_only else "write")
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            # Validate first so a failing batch applies nothing
+            for kind, reference, _, _ in writes:
+                collection_path, doc_id = reference.path.rsplit("/", 1)
+                exists = doc_id in self._store.get(collection_path, {})
+                if kind == "update" and not exists:
+                    raise NotFound(f"No document to update: {reference.path}")
+                if kind == "create" and exists:
+                    raise AlreadyExists(f"Document already exists: {reference.path}")
+            for kind, reference, data, merge in writes:
+                collection_path, doc_id = reference.path.rsplit("/", 1)
+                documents = self._store.setdefault(collection_path, {})
+                if kind == "delete":
+                    documents.pop(doc_id, None)
+                    self.stats[(collection_path, "deletes")] += 1
+                    continue
+                previous = documents.get(doc_id)
+                created = previous[1] if previous else now
+                if kind == "update":
+                    current = copy.deepcopy(previous[0])
+                    apply_update(current, data)
+                elif merge and previous:
+                    current = copy.deepcopy(previous[0])
+                    merge_into(current, data)
+                else:
+                    current = {}
+                    merge_into(current, data)
+                documents[doc_id] = (current, created, now)
+                self.stats[(collection_path, "writes")] += 1
+        return [now for _ in writes]
+
+
+def project(data, field_paths):
+    result = {}
+    for field_path in field_paths:
+        present, value = get_field(data, field_path)
+        if present:
+            container = result
+            parts = field_path.split(".")
+            for part in parts[:-1]:
+                container = container.setdefault(part, {})
+            container[parts[-1]] = value
+    return result
+
+
+def _encode_json(value):
+    if isinstance(value, datetime):
+        return {"__datetime__": value.isoformat()}
+    raise TypeError(f"Cannot serialise {type(value).__name__}")
+
+
+def _decode_json(value):
+    if "__datetime__" in value and len(value) == 1:
+        return datetime.fromisoformat(value["__datetime__"])
+    return value
+
+
+def client_from_env():
+    """Client configured from FAKE_FIRESTORE_* environment variables"""
+    client = Client(
+        project="sesgrg-website",
+        latency=os.getenv("FAKE_FIRESTORE_LATENCY", ""),
+        error_rate=float(os.getenv("FAKE_FIRESTORE_ERROR_RATE", "0")),
+        seed=int(os.environ["FAKE_FIRESTORE_SEED"]) if os.getenv("FAKE_FIRESTORE_SEED") else None,
+    )
+    data_path = os.getenv("FAKE_FIRESTORE_DATA")
+    if data_path and os.path.exists(data_path):
+        client.load(data_path)
+    return client
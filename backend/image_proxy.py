@@ -0,0 +1,218 @@
+"""Caching proxy/resizer for externally hosted images.
+
+Remote originals are fetched at most once per cache lifetime, resized with
+Pillow and kept in a size-bounded on-disk LRU together with every variant
+that has been requested.
+"""
+import asyncio
+import bisect
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from functools import partial
+from threading import Lock
+from urllib.parse import urljoin, urlparse
+
+import requests
+from starlette.concurrency import run_in_threadpool
+
+from images import AVIF_AVAILABLE, CONTENT_TYPES, render_variant
+
+# Requested widths are rounded up to one of these so arbitrary ?w= values
+# cannot multiply the number of cached variants
+PROXY_WIDTHS = [160, 320, 480, 640, 768, 1024, 1280, 1600, 1920]
+MAX_ORIGIN_BYTES = 20 * 1024 * 1024
+MAX_REDIRECTS = 3
+
+
+class ImageProxyError(Exception):
+    """Raised for requests the proxy refuses or cannot satisfy; carries an HTTP status"""
+
+    def __init__(self, status_code, detail):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class DiskLRUCache:
+    """Byte blobs on disk, evicted least-recently-used first once over ``max_bytes``"""
+
+    def __init__(self, root, max_bytes):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._index = OrderedDict()  # key -> size
+        self._lock = Lock()
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.isdir(self.root):
+            return
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(dirpath, filename))
+                entries.append((stat.st_mtime, filename, stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._index:
+                return None
+            self._index.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # mtime doubles as the recency marker when the index is rebuilt
+            os.utime(path)
+            return data
+        except FileNotFoundError:
+            with self._lock:
+                self.total_bytes -= self._index.pop(key, 0)
+            return None
+
+    def put(self, key, data):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.total_bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            while self.total_bytes > self.max_bytes and len(self._index) > 1:
+                old_key, size = self._index.popitem(last=False)
+                self.total_bytes -= size
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def __len__(self):
+        return len(self._index)
+
+
+def is_allowed_url(url, allowed_hosts):
+    parsed = urlparse(url)
+    return parsed.scheme in ("http", "https") and parsed.hostname in allowed_hosts
+
+
+def fetch_url(url, allowed_hosts=()):
+    """Default origin fetcher: download ``url`` with a timeout and a size cap.
+
+    Redirects are followed by hand so every hop must be on ``allowed_hosts``;
+    otherwise an allowed origin could point the proxy at internal addresses.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        with requests.get(url, timeout=10, stream=True, allow_redirects=False) as response:
+            if response.is_redirect:
+                url = urljoin(url, response.headers["location"])
+                if not is_allowed_url(url, allowed_hosts):
+                    raise ValueError("Origin redirected to a host that is not allowed")
+                continue
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            for chunk in response.iter_content(64 * 1024):
+                size += len(chunk)
+                if size > MAX_ORIGIN_BYTES:
+                    raise ValueError("Origin image is too large")
+                chunks.append(chunk)
+            return b"".join(chunks)
+    raise ValueError("Origin redirected too many times")
+
+
+def cache_key(*parts):
+    return hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class ImageProxy:
+    """Fetch, resize and cache allowlisted remote images.
+
+    ``fetcher`` is a blocking callable ``url -> bytes`` run in the threadpool,
+    by default fetch_url limited to ``allowed_hosts``; tests replace it to run
+    offline. ``executor`` returns the pool used for
+    Pillow work (None runs it in the default thread pool).
+    """
+
+    def __init__(self, cache, allowed_hosts, fetcher=None, max_concurrent_fetches=4, executor=None):
+        self.cache = cache
+        self.allowed_hosts = set(allowed_hosts)
+        self.fetcher = fetcher or partial(fetch_url, allowed_hosts=self.allowed_hosts)
+        self.executor = executor
+        self.max_concurrent_fetches = max_concurrent_fetches
+        self._fetch_slots = None  # created inside the running loop
+        self._in_flight = {}
+
+    def normalize(self, src, width, fmt):
+        """Validate a request and return its canonical (src, width, fmt)"""
+        if not is_allowed_url(src, self.allowed_hosts):
+            raise ImageProxyError(400, "Image host is not allowed")
+        if fmt == "avif" and not AVIF_AVAILABLE:
+            fmt = "webp"
+        if fmt not in CONTENT_TYPES:
+            raise ImageProxyError(400, "Unsupported image format")
+        index = bisect.bisect_left(PROXY_WIDTHS, max(1, width))
+        width = PROXY_WIDTHS[min(index, len(PROXY_WIDTHS) - 1)]
+        return src, width, fmt
+
+    async def get(self, src, width, fmt="webp"):
+        """Return (key, data, content_type) for a resized variant of ``src``"""
+        src, width, fmt = self.normalize(src, width, fmt)
+        key = cache_key(src, width, fmt)
+        data = await run_in_threadpool(self.cache.get, key)
+        if data is None:
+            data = await self._single_flight(key, self._render, src, width, fmt, key)
+        return key, data, CONTENT_TYPES[fmt]
+
+    async def _single_flight(self, key, func, *args):
+        # Concurrent requests for the same key share one fetch/render
+        # and a disconnecting client does not cancel the work for the others
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func(*args))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _render(self, src, width, fmt, key):
+        original = await self.get_original(src)
+        loop = asyncio.get_running_loop()
+        executor = self.executor() if self.executor else None
+        try:
+            data = await loop.run_in_executor(executor, render_variant, original, width, fmt)
+        except Exception:
+            raise ImageProxyError(502, "Origin did not return a usable image")
+        await run_in_threadpool(self.cache.put, key, data)
+        return data
+
+    async def get_original(self, src):
+        key = cache_key(src, "original")
+        data = await run_in_threadpool(self.cache.get, key)
+        if data is None:
+            data = await self._single_flight(key, self._fetch, src, key)
+        return data
+
+    async def _fetch(self, src, key):
+        if self._fetch_slots is None:
+            self._fetch_slots = asyncio.Semaphore(self.max_concurrent_fetches)
+        async with self._fetch_slots:
+            try:
+                data = await run_in_threadpool(self.fetcher, src)
+            except Exception as e:
+                raise ImageProxyError(502, f"Error fetching image: {e}")
+        await run_in_threadpool(self.cache.put, key, data)
+        return data
@@ -0,0 +1,193 @@
+"""Pillow helpers for responsive image variants.
+
+Functions here are CPU-bound and take plain paths/bytes so they can be
+submitted to a ProcessPoolExecutor.
+"""
+import io
+import math
+import os
+
+from PIL import Image, ImageOps
+
+# AVIF needs Pillow built with libavif or the pillow-avif-plugin package
+try:
+    import pillow_avif  # noqa: F401
+except ImportError:
+    pass
+
+AVIF_AVAILABLE = ".avif" in Image.registered_extensions()
+
+# name -> maximum width in pixels
+VARIANT_WIDTHS = {
+    "thumbnail": 320,
+    "card": 768,
+    "hero": 1600,
+}
+
+FORMAT_OPTIONS = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "avif": {"format": "AVIF", "quality": 60},
+    "jpeg": {"format": "JPEG", "quality": 82, "optimize": True, "progressive": True},
+}
+
+CONTENT_TYPES = {
+    "webp": "image/webp",
+    "avif": "image/avif",
+    "jpeg": "image/jpeg",
+}
+
+
+def output_formats():
+    """Formats generated for every variant, best compression first"""
+    return ["avif", "webp"] if AVIF_AVAILABLE else ["webp"]
+
+
+def prepare_image(image):
+    """Apply EXIF orientation and convert to a mode every output format accepts"""
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+    return image
+
+
+def resize_to_width(image, width):
+    """Downscale to ``width`` keeping the aspect ratio; never upscale"""
+    if image.width <= width:
+        return image.copy()
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.LANCZOS)
+
+
+def encode(image, fmt):
+    if fmt == "jpeg" and image.mode == "RGBA":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, **FORMAT_OPTIONS[fmt])
+    return buffer.getvalue()
+
+
+def generate_variants(source_path, output_dir, formats=None):
+    """Write every variant of ``source_path`` into ``output_dir``.
+
+    Returns ``{"width": .., "height": .., "variants": {name: {"width", "height", fmt: filename}}}``.
+    """
+    formats = formats or output_formats()
+    os.makedirs(output_dir, exist_ok=True)
+    with Image.open(source_path) as original:
+        image = prepare_image(original)
+        image.load()
+    result = {"width": image.width, "height": image.height, "variants": {}}
+    for name, width in VARIANT_WIDTHS.items():
+        resized = resize_to_width(image, width)
+        variant = {"width": resized.width, "height": resized.height}
+        for fmt in formats:
+            filename = f"{name}.{fmt}"
+            with open(os.path.join(output_dir, filename), "wb") as f:
+                f.write(encode(resized, fmt))
+            variant[fmt] = filename
+        result["variants"][name] = variant
+    return result
+
+
+def verify_image(path):
+    """Return the detected format of an image file, or None if Pillow cannot read it"""
+    try:
+        with Image.open(path) as image:
+            image.verify()
+            return image.format
+    except Exception:
+        return None
+
+
+def render_variant(data, width, fmt):
+    """Resize encoded image bytes to ``width`` and re-encode them as ``fmt``"""
+    with Image.open(io.BytesIO(data)) as original:
+        image = prepare_image(original)
+        image.load()
+    return encode(resize_to_width(image, width), fmt)
+
+
+_BASE83 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+_SRGB_TO_LINEAR = [
+    (v / 255) / 12.92 if v / 255 <= 0.04045 else ((v / 255 + 0.055) / 1.055) ** 2.4
+    for v in range(256)
+]
+
+
+def _base83(value, length):
+    return "".join(_BASE83[(value // 83 ** (length - i - 1)) % 83] for i in range(length))
+
+
+def _linear_to_srgb(value):
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def blurhash_encode(image, x_components=4, y_components=3):
+    """Encode an image as a BlurHash string (https://blurha.sh)"""
+    image = image.convert("RGB")
+    image.thumbnail((32, 32))
+    width, height = image.size
+    pixels = [tuple(_SRGB_TO_LINEAR[c] for c in pixel) for pixel in image.getdata()]
+    cos_x = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    cos_y = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            r = g = b = 0.0
+            for y in range(height):
+                row = y * width
+                for x in range(width):
+                    basis = cos_x[i][x] * cos_y[j][y]
+                    pr, pg, pb = pixels[row + x]
+                    r += basis * pr
+                    g += basis * pg
+                    b += basis * pb
+            scale = (1 if i == 0 and j == 0 else 2) / (width * height)
+            factors.append((r * scale, g * scale, b * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _base83((x_components - 1) + (y_components - 1) * 9, 1)
+    if ac:
+        actual_max = max(abs(c) for factor in ac for c in factor)
+        quantised_max = max(0, min(82, int(math.floor(actual_max * 166 - 0.5))))
+        max_value = (quantised_max + 1) / 166
+        result += _base83(quantised_max, 1)
+    else:
+        max_value = 1
+        result += _base83(0, 1)
+    result += _base83((_linear_to_srgb(dc[0]) << 16) + (_linear_to_srgb(dc[1]) << 8) + _linear_to_srgb(dc[2]), 4)
+    for factor in ac:
+        q = [
+            max(0, min(18, int(math.floor(math.copysign(abs(c / max_value) ** 0.5, c) * 9 + 9.5))))
+            for c in factor
+        ]
+        result += _base83(q[0] * 19 * 19 + q[1] * 19 + q[2], 2)
+    return result
+
+
+def dominant_color(image):
+    """Most common colour of a small palette-reduced copy, as #rrggbb"""
+    small = image.convert("RGB")
+    small.thumbnail((64, 64))
+    palette_image = small.quantize(colors=5)
+    palette = palette_image.getpalette()
+    _, index = max(palette_image.getcolors())
+    r, g, b = palette[index * 3:index * 3 + 3]
+    return f"#{r:02x}{g:02x}{b:02x}"
+
+
+def compute_placeholder(data):
+    """Intrinsic size, dominant colour and BlurHash for encoded image bytes"""
+    with Image.open(io.BytesIO(data)) as original:
+        image = prepare_image(original)
+        image.load()
+    return {
+        "width": image.width,
+        "height": image.height,
+        "dominant_color": dominant_color(image),
+        "blurhash": blurhash_encode(image),
+    }
@@ -0,0 +1,96 @@
+"""Event-loop lag monitoring and blocking-call detection.
+
+The lag probe sleeps for a fixed interval and measures how late it wakes up;
+anything above zero is time the loop spent running something else without
+yielding. In debug mode a watchdog thread also watches a heartbeat from the
+loop and, when it stalls for longer than the threshold, logs the loop
+thread's stack while it is still blocked, pointing at the offending call.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from metrics import registry, LATENCY_BUCKETS
+
+logger = logging.getLogger("sesgrg.loop")
+
+# Innermost frames included in a blocked-loop report
+STACK_LIMIT = 20
+
+loop_lag = registry.gauge("event_loop_lag_seconds", "Most recent event loop scheduling delay")
+loop_lag_histogram = registry.histogram(
+    "event_loop_delay_seconds", "Event loop scheduling delay per probe", buckets=LATENCY_BUCKETS)
+loop_blocked = registry.counter(
+    "event_loop_blocked_total", "Times the event loop was blocked for longer than the threshold")
+
+
+class LoopMonitor:
+    def __init__(self, interval=0.25, threshold=0.1, debug=False):
+        self.interval = interval
+        self.threshold = threshold
+        self.debug = debug
+        self.last_beat = time.perf_counter()
+        self._tasks = []
+        self._watchdog = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = None
+
+    def start(self):
+        """Start probing the running loop; call from inside it"""
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stopped.clear()
+        self._tasks.append(loop.create_task(self._probe()))
+        if self.debug:
+            self._tasks.append(loop.create_task(self._heartbeat()))
+            self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+            self._watchdog.start()
+
+    async def stop(self):
+        self._stopped.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self._watchdog is not None:
+            self._watchdog.join()
+            self._watchdog = None
+
+    async def _probe(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - start - self.interval)
+            loop_lag.set(lag)
+            loop_lag_histogram.observe(lag)
+            if lag >= self.threshold:
+                loop_blocked.inc()
+                if not self.debug:
+                    # Without the watchdog only the size of the stall is known
+                    logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
+
+    async def _heartbeat(self):
+        beat = self.threshold / 4
+        while True:
+            self.last_beat = time.perf_counter()
+            await asyncio.sleep(beat)
+
+    def _watch(self):
+        reported_beat = None
+        while not self._stopped.wait(self.threshold / 4):
+            beat = self.last_beat
+            blocked_for = time.perf_counter() - beat
+            if blocked_for < self.threshold or beat == reported_beat:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            # Report each stall once, with the stack as it is right now
+            reported_beat = beat
+            stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT))
+            logger.warning(
+                f"Event loop blocked for over {blocked_for * 1000:.0f} ms; loop thread stack:\n{stack}"
+            )
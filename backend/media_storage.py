@@ -0,0 +1,56 @@
+"""Media storage backends for uploaded images.
+
+LocalMediaStorage keeps files on the local filesystem and stands in for
+Firebase Storage in development and self-hosted deployments. Keys are
+relative, slash-separated paths such as ``originals/<id>.jpg``.
+"""
+import os
+import shutil
+
+from starlette.staticfiles import StaticFiles
+
+
+class LocalMediaStorage:
+    def __init__(self, root, base_url):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key):
+        """Filesystem path of a key, refusing keys that escape the storage root"""
+        path = os.path.abspath(os.path.join(self.root, key))
+        if os.path.commonpath([path, self.root]) != self.root:
+            raise ValueError(f"Invalid storage key: {key}")
+        return path
+
+    def url(self, key):
+        return f"{self.base_url}/{key}"
+
+    def put_file(self, key, source_path):
+        """Move a finished local file into storage and return its public URL"""
+        target = self.path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(source_path, target)
+        return self.url(key)
+
+    def put_directory(self, prefix, source_dir):
+        """Move every file in ``source_dir`` under ``prefix``; return {filename: url}"""
+        urls = {}
+        for filename in os.listdir(source_dir):
+            urls[filename] = self.put_file(f"{prefix}/{filename}", os.path.join(source_dir, filename))
+        return urls
+
+    def delete(self, key):
+        path = self.path(key)
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+class MediaFiles(StaticFiles):
+    """StaticFiles for stored media; keys are never reused, so responses are immutable"""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
@@ -0,0 +1,438 @@
+"""Prometheus-style metrics with lock-free recording.
+
+Every metric keeps one shard of values per thread. Writers only ever touch
+their own thread's shard, so recording takes no lock; a scrape sums the
+shards. Values are exposed in the Prometheus text exposition format.
+"""
+import bisect
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from tracing import span
+
+# Seconds; tuned for an API whose requests mostly take 1 ms - 2 s
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Bytes
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUANTILES = (0.5, 0.95, 0.99)
+logger = logging.getLogger("sesgrg.metrics")
+
+# How each Firestore operation is billed
+OPERATION_KINDS = {"query": "read", "get": "read", "get_all": "read", "aggregate": "read", "delete": "delete"}
+# Methods whose requests may be cut short by a read budget; a write request
+# that has already committed must not be turned into an error
+SAFE_METHODS = {"GET", "HEAD"}
+
+
+class ReadBudgetExceeded(Exception):
+    """Raised instead of a Firestore read once a request has used up its read budget"""
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "values", None)
+        if shard is None:
+            # Taken once per thread, never on the recording path
+            shard = {}
+            self._local.values = shard
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def _new_series(self):
+        raise NotImplementedError
+
+    def _merge(self, total, series):
+        for i, value in enumerate(series):
+            total[i] += value
+
+    def collect(self):
+        """Return {labels: merged series} summed over all thread shards"""
+        with self._shards_lock:
+            shards = list(self._shards)
+        merged = {}
+        for shard in shards:
+            # list() of a plain dict is atomic under the GIL
+            for labels, series in list(shard.items()):
+                total = merged.get(labels)
+                if total is None:
+                    total = merged[labels] = self._new_series()
+                self._merge(total, list(series))
+        return merged
+
+    def _format_labels(self, labels, extra=()):
+        pairs = list(zip(self.labelnames, labels)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._sample_lines())
+        return lines
+
+    def _sample_lines(self):
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_series(self):
+        return [0]
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = [0]
+        series[0] += amount
+
+    def value(self, *labels):
+        return self.collect().get(labels, [0])[0]
+
+    def _sample_lines(self):
+        for labels, series in sorted(self.collect().items()):
+            yield f"{self.name}{self._format_labels(labels)} {_format_value(series[0])}"
+
+
+class Gauge(Metric):
+    """Last value wins; set from a single owner (e.g. a monitor task)"""
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def set(self, value, *labels):
+        self._values[labels] = value
+
+    def collect(self):
+        return {labels: [value] for labels, value in list(self._values.items())}
+
+    def _sample_lines(self):
+        for labels, series in sorted(self.collect().items()):
+            yield f"{self.name}{self._format_labels(labels)} {_format_value(series[0])}"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS, quantiles=False):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        self.quantiles = quantiles
+
+    def _new_series(self):
+        # one count per bucket plus +Inf, then sum and count
+        return [0] * (len(self.buckets) + 3)
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        series = shard.get(labels)
+        if series is None:
+            series = shard[labels] = self._new_series()
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def quantile(self, q, series):
+        """Estimate a quantile by linear interpolation inside the matching bucket"""
+        count = series[-1]
+        if not count:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        lower = 0.0
+        for i, upper in enumerate(self.buckets):
+            in_bucket = series[i]
+            if cumulative + in_bucket >= rank:
+                if not in_bucket:
+                    return upper
+                return lower + (upper - lower) * (rank - cumulative) / in_bucket
+            cumulative += in_bucket
+            lower = upper
+        return self.buckets[-1]
+
+    def _sample_lines(self):
+        for labels, series in sorted(self.collect().items()):
+            cumulative = 0
+            for i, upper in enumerate(self.buckets):
+                cumulative += series[i]
+                yield f"{self.name}_bucket{self._format_labels(labels, [('le', _format_value(upper))])} {cumulative}"
+            yield f"{self.name}_bucket{self._format_labels(labels, [('le', '+Inf')])} {series[-1]}"
+            yield f"{self.name}_sum{self._format_labels(labels)} {_format_value(series[-2])}"
+            yield f"{self.name}_count{self._format_labels(labels)} {series[-1]}"
+
+    def quantile_lines(self):
+        """Estimated p50/p95/p99 as a companion gauge family"""
+        name = f"{self.name}_quantile"
+        lines = [
+            f"# HELP {name} Estimated quantiles of {self.name} from its buckets",
+            f"# TYPE {name} gauge",
+        ]
+        for labels, series in sorted(self.collect().items()):
+            for q in QUANTILES:
+                lines.append(f"{name}{self._format_labels(labels, [('quantile', q)])} {_format_value(self.quantile(q, series))}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 9))
+    return str(value)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs):
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def expose(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.expose())
+            if isinstance(metric, Histogram) and metric.quantiles:
+                lines.extend(metric.quantile_lines())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ("method", "route"), quantiles=True)
+http_response_size = registry.histogram(
+    "http_response_size_bytes", "HTTP response body size by route template", ("method", "route"), SIZE_BUCKETS)
+firestore_rpcs = registry.counter(
+    "firestore_rpc_total", "Firestore RPCs by collection and operation", ("collection", "operation"))
+firestore_rpc_errors = registry.counter(
+    "firestore_rpc_errors_total", "Failed Firestore RPCs by collection and operation", ("collection", "operation"))
+firestore_duration = registry.histogram(
+    "firestore_rpc_duration_seconds", "Firestore RPC latency by collection and operation", ("collection", "operation"),
+    quantiles=True)
+firestore_documents = registry.counter(
+    "firestore_documents_total", "Billable Firestore document reads, writes and deletes", ("collection", "kind"))
+read_budget_exceeded = registry.counter(
+    "firestore_read_budget_exceeded_total", "Requests that read more documents than their route budget", ("route",))
+
+
+class RequestStats:
+    """Firestore documents read, written and deleted while serving one request"""
+
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+        self.deletes = 0
+        self.rpcs = 0
+        self.rpc_seconds = 0.0
+        # Callable returning the request's read limit (0 = unlimited) when the
+        # budget is enforced; resolved on first read, once the route is known
+        self.read_limit = None
+        self.over_budget = False
+
+    def read_allowance(self):
+        """Documents the request may still read, or None when unlimited.
+
+        Raises ReadBudgetExceeded if there is no room for another read.
+        """
+        limit = self.read_limit() if self.read_limit else 0
+        if not limit:
+            return None
+        if self.reads >= limit:
+            self.over_budget = True
+            raise ReadBudgetExceeded(f"Read budget of {limit} documents used up")
+        return limit - self.reads
+
+    def add(self, kind, count):
+        if kind == "read":
+            self.reads += count
+        elif kind == "write":
+            self.writes += count
+        else:
+            self.deletes += count
+
+    def headers(self):
+        server_timing = (
+            f'firestore;dur={self.rpc_seconds * 1000:.1f};'
+            f'desc="{self.rpcs} rpcs, {self.reads} reads, {self.writes} writes, {self.deletes} deletes"'
+        )
+        return [
+            (b"x-firestore-reads", str(self.reads).encode()),
+            (b"x-firestore-writes", str(self.writes).encode()),
+            (b"x-firestore-deletes", str(self.deletes).encode()),
+            (b"server-timing", server_timing.encode()),
+        ]
+
+
+# Set per request by the middleware; the object is shared with threadpool
+# workers because they run in a copy of the request's context
+current_request_stats = ContextVar("current_request_stats", default=None)
+
+
+class RPC:
+    """Handle yielded by firestore_rpc; set ``documents`` when a call touches more than one.
+
+    Reads that may return many documents report them through count(), which
+    stops the call once it goes past the request's read budget.
+    """
+
+    def __init__(self, stats=None, allowance=None):
+        self.documents = 1
+        self.stats = stats
+        self.allowance = allowance
+
+    def count(self, documents):
+        self.documents = documents
+        if self.allowance is not None and documents > self.allowance:
+            self.stats.over_budget = True
+            raise ReadBudgetExceeded(f"Read budget exceeded after {documents} documents")
+
+
+@contextmanager
+def firestore_rpc(collection, operation):
+    """Count, time and trace one Firestore call (streams are timed until exhausted)"""
+    stats = current_request_stats.get()
+    allowance = None
+    if stats is not None and OPERATION_KINDS.get(operation) == "read":
+        allowance = stats.read_allowance()
+    rpc = RPC(stats, allowance)
+    start = time.perf_counter()
+    try:
+        with span(f"firestore.{operation}", collection=collection) as rpc_span:
+            yield rpc
+            if rpc_span is not None:
+                rpc_span.set("documents", rpc.documents)
+    except ReadBudgetExceeded:
+        raise
+    except Exception:
+        firestore_rpc_errors.inc(collection, operation)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        kind = OPERATION_KINDS.get(operation, "write")
+        # Queries are billed at least one read even when they match nothing
+        documents = max(rpc.documents, 1) if kind == "read" else rpc.documents
+        firestore_rpcs.inc(collection, operation)
+        firestore_duration.observe(elapsed, collection, operation)
+        firestore_documents.inc(collection, kind, amount=documents)
+        if stats is not None:
+            stats.rpcs += 1
+            stats.rpc_seconds += elapsed
+            stats.add(kind, documents)
+
+
+class ReadBudget:
+    """Per-route limits on documents read, configured as ``"/api/news=100,/api/people=50"``"""
+
+    def __init__(self, spec="", default=0, mode="log"):
+        self.default = default
+        self.mode = mode
+        self.limits = {}
+        for entry in spec.split(","):
+            route, _, limit = entry.strip().rpartition("=")
+            if route and limit.strip().isdigit():
+                self.limits[route.strip()] = int(limit)
+
+    def limit_for(self, route):
+        return self.limits.get(route, self.default)
+
+    def exceeded(self, route, reads):
+        limit = self.limit_for(route)
+        return bool(limit) and reads > limit
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording count, latency, status and body size per route template"""
+
+    def __init__(self, app, exclude_paths=(), read_budget=None):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+        self.read_budget = read_budget or ReadBudget()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+        size = 0
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        rejected = False
+        if self.read_budget.mode == "reject" and scope["method"] in SAFE_METHODS:
+            # Enforced where the reads happen, so the reads over the limit are
+            # never made; the router has set the route by the first read
+            stats.read_limit = lambda: self.read_budget.limit_for(getattr(scope.get("route"), "path", None) or "unmatched")
+
+        async def send_wrapper(message):
+            nonlocal status_code, size, rejected
+            if message["type"] == "http.response.start":
+                route = getattr(scope.get("route"), "path", None) or "unmatched"
+                if stats.over_budget or self.read_budget.exceeded(route, stats.reads):
+                    read_budget_exceeded.inc(route)
+                    logger.warning(
+                        f"Read budget exceeded: {stats.reads} documents (limit {self.read_budget.limit_for(route)})",
+                        extra={"reads": stats.reads},
+                    )
+                    if stats.over_budget:
+                        # A read was refused; whatever the handler made of
+                        # that error, the caller is told why
+                        rejected = True
+                        body = b'{"detail":"Request exceeded its Firestore read budget"}'
+                        headers = [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+                        await send({"type": "http.response.start", "status": 503, "headers": headers + stats.headers()})
+                        await send({"type": "http.response.body", "body": body})
+                        status_code, size = 503, len(body)
+                        return
+                status_code = message["status"]
+                message = dict(message, headers=list(message.get("headers", [])) + stats.headers())
+            elif message["type"] == "http.response.body":
+                if rejected:
+                    return
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request_stats.reset(token)
+            # The router stores the matched route in the shared scope; using
+            # its template keeps label cardinality bounded
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope["method"]
+            http_requests.inc(method, template, str(status_code))
+            http_duration.observe(time.perf_counter() - start, method, template)
+            http_response_size.observe(size, method, template)
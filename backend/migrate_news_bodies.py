@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Move news article bodies into news/{id}/body/content.
+
+Streams the news collection, so memory use does not grow with the number
+of articles, and commits batched writes. Articles that carry no inline body
+fields are skipped, which makes the migration safe to re-run. Bodies whose
+render is stale are re-rendered on the way.
+
+Usage:
+    python migrate_news_bodies.py [--dry-run] [--batch-size 200]
+"""
+import argparse
+import sys
+
+import server
+from news_render import derive_news_fields, needs_render
+
+# Each article takes two writes (body set + summary update); Firestore
+# batches are limited to 500 writes
+MAX_BATCH_SIZE = 250
+
+
+def migrate(db, firestore_module, batch_size=200, dry_run=False):
+    """Migrate every article with inline body fields; returns counts"""
+    body_fields = server.BODY_FIELDS["news"]
+    summary = {"scanned": 0, "migrated": 0, "skipped": 0}
+    batch = db.batch()
+    pending = 0
+
+    for doc in db.collection("news").stream():
+        summary["scanned"] += 1
+        data = doc.to_dict()
+        inline = {key: data[key] for key in body_fields if key in data}
+        if "content" not in inline:
+            summary["skipped"] += 1
+            continue
+
+        if needs_render(inline):
+            inline.update(derive_news_fields(data))
+        derived_summary, body = server.split_body("news", inline)
+        summary_update = {key: firestore_module.DELETE_FIELD for key in body}
+        summary_update.update(derived_summary)
+
+        summary["migrated"] += 1
+        if dry_run:
+            continue
+        batch.set(doc.reference.collection("body").document("content"), body, merge=True)
+        batch.update(doc.reference, summary_update)
+        pending += 1
+        if pending >= batch_size:
+            batch.commit()
+            print(f"Committed {summary['migrated']} articles")
+            batch = db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--dry-run", action="store_true", help="report what would be migrated without writing")
+    args = parser.parse_args()
+
+    if server.db is None:
+        print("Firestore is not available - nothing to migrate")
+        return 1
+    result = migrate(server.db, server.firestore, min(args.batch_size, MAX_BATCH_SIZE), args.dry_run)
+    print(f"News body migration {'(dry run) ' if args.dry_run else ''}finished: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
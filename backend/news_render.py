@@ -0,0 +1,385 @@
+"""Server-side rendering of news rich text into sanitised, static HTML.
+
+The admin editor stores HTML with LaTeX either in ``.katex-formula`` /
+``[data-formula]`` elements or inline as ``\\( .. \\)`` and ``\\[ .. \\]``.
+derive_news_fields sanitises that HTML against an allowlist and turns the
+math into MathML once per edit, so visitors no longer parse and typeset it
+in the browser on every view.
+"""
+import hashlib
+import math
+import re
+from html import escape
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+from slugify import slugify
+
+try:
+    from latex2mathml.converter import convert as latex_to_mathml
+    MATHML_AVAILABLE = True
+except ImportError:
+    latex_to_mathml = None
+    MATHML_AVAILABLE = False
+
+# Bump when the output changes so stored renders are refreshed on next read
+RENDER_VERSION = 3
+
+WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 200
+
+ALLOWED_TAGS = {
+    "a", "b", "blockquote", "br", "code", "div", "em", "figcaption", "figure",
+    "h1", "h2", "h3", "h4", "h5", "h6", "hr", "i", "iframe", "img", "li", "ol",
+    "p", "pre", "s", "source", "span", "strong", "sub", "sup", "table", "tbody",
+    "td", "tfoot", "th", "thead", "tr", "u", "ul", "video",
+}
+VOID_TAGS = {"br", "hr", "img", "source"}
+# Elements dropped together with everything inside them
+DROP_CONTENT_TAGS = {"script", "style", "template", "noscript", "object", "embed"}
+ALLOWED_ATTRIBUTES = {
+    "*": {"class", "title", "data-formula"},
+    "a": {"href", "target", "rel"},
+    "img": {"src", "alt", "width", "height"},
+    "iframe": {"src", "width", "height", "allowfullscreen", "frameborder"},
+    "video": {"src", "controls", "width", "height", "poster"},
+    "source": {"src", "type"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan"},
+    "ol": {"start"},
+}
+# Opening one of these implicitly closes an open sibling, as browsers do
+IMPLIED_END_TAGS = {
+    "li": {"li"},
+    "p": {"p"},
+    "tr": {"tr", "td", "th"},
+    "td": {"td", "th"},
+    "th": {"td", "th"},
+}
+URL_ATTRIBUTES = {"href", "src", "poster"}
+SAFE_URL_SCHEMES = {"", "http", "https", "mailto"}
+IFRAME_HOSTS = ("youtube.com", "youtube-nocookie.com", "player.vimeo.com")
+
+# MathML the converter may produce; anything else in its output is dropped
+MATHML_TAGS = {
+    "math", "mrow", "mi", "mn", "mo", "ms", "mtext", "mspace", "msub", "msup", "msubsup",
+    "mfrac", "msqrt", "mroot", "mstyle", "mtable", "mtr", "mtd", "mover", "munder",
+    "munderover", "menclose", "mpadded", "mphantom", "mfenced", "merror", "semantics",
+    "annotation",
+}
+MATHML_ATTRIBUTES = {
+    "xmlns", "display", "mathvariant", "mathsize", "mathcolor", "mathbackground", "stretchy",
+    "fence", "separator", "separators", "open", "close", "lspace", "rspace", "accent",
+    "accentunder", "columnalign", "columnlines", "columnspacing", "rowalign", "rowlines",
+    "rowspacing", "linethickness", "width", "height", "depth", "notation", "displaystyle",
+    "scriptlevel", "minsize", "maxsize", "movablelimits", "form", "symmetric", "largeop",
+    "encoding",
+}
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+BLOCK_TAGS = HEADING_TAGS | {"p", "li", "blockquote", "pre", "div", "tr", "figcaption", "br"}
+
+INLINE_MATH_PATTERN = re.compile(r"\\\((.+?)\\\)|\\\[(.+?)\\\]", re.DOTALL)
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def content_hash(content):
+    """Hash of the source content and renderer version, used to detect stale renders"""
+    return hashlib.sha256(f"{RENDER_VERSION}:{content}".encode("utf-8")).hexdigest()
+
+
+class MathMLSanitizer(HTMLParser):
+    """Re-serialises converter output keeping only allowlisted MathML.
+
+    latex2mathml copies \\text{} contents and \\href targets into its output
+    verbatim, so its markup is untrusted like any other input.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.open_tags = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in MATHML_TAGS:
+            return
+        parts = [tag] + [
+            f'{name}="{escape(value)}"' for name, value in attrs
+            if name in MATHML_ATTRIBUTES and value is not None
+        ]
+        self.output.append(f"<{' '.join(parts)}>")
+        self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self.open_tags:
+            return
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.output.append(f"</{open_tag}>")
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        self.output.append(escape(data, quote=False))
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            self.output.append(f"</{self.open_tags.pop()}>")
+        return "".join(self.output)
+
+
+def sanitize_mathml(mathml):
+    sanitizer = MathMLSanitizer()
+    sanitizer.feed(mathml)
+    return sanitizer.close()
+
+
+def render_math(latex, display):
+    """Static markup for a formula; falls back to a tagged span for client-side KaTeX"""
+    latex = latex.strip()
+    if MATHML_AVAILABLE:
+        try:
+            mathml = sanitize_mathml(latex_to_mathml(latex, display="block" if display else "inline"))
+            css_class = "processed-formula display-mode" if display else "processed-formula"
+            return f'<span class="{css_class}">{mathml}</span>'
+        except Exception:
+            pass
+    css_class = "katex-formula display-mode" if display else "katex-formula"
+    return f'<span class="{css_class}" data-formula="{escape(latex)}">{escape(latex)}</span>'
+
+
+def is_safe_url(tag, value):
+    parsed = urlparse(value.strip())
+    if parsed.scheme.lower() not in SAFE_URL_SCHEMES:
+        return False
+    if tag == "iframe":
+        host = (parsed.hostname or "").lower()
+        if not host:
+            # Same-origin embeds are limited to PDFs
+            return not parsed.scheme and parsed.path.lower().endswith(".pdf")
+        return any(host == allowed or host.endswith("." + allowed) for allowed in IFRAME_HOSTS)
+    return True
+
+
+class NewsHTMLRenderer(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.output = []
+        self.open_tags = []
+        self.drop_depth = 0
+        self.formula = None  # state of the formula element being captured
+        self.in_code = 0
+        # Collected while rendering for the derived fields
+        self.text = []
+        self.headings = []
+        self.heading = None
+        self.heading_ids = set()
+        self.first_image = None
+
+    def handle_starttag(self, tag, attrs):
+        if self.drop_depth or tag in DROP_CONTENT_TAGS:
+            if tag not in VOID_TAGS:
+                self.drop_depth += 1
+            return
+        if self.formula is not None:
+            if tag not in VOID_TAGS:
+                self.formula["depth"] += 1
+            return
+        if tag not in ALLOWED_TAGS:
+            return
+
+        attrs = dict(attrs)
+        classes = (attrs.get("class") or "").split()
+        if ("katex-formula" in classes or "data-formula" in attrs) and tag not in VOID_TAGS:
+            self.formula = {
+                "tag": tag,
+                "display": "display-mode" in classes,
+                "attribute": attrs.get("data-formula") or "",
+                "text": [],
+                "depth": 0,
+            }
+            return
+        if tag == "iframe" and not is_safe_url(tag, attrs.get("src") or ""):
+            self.drop_depth += 1
+            return
+
+        while self.open_tags and self.open_tags[-1] in IMPLIED_END_TAGS.get(tag, ()):
+            self.output.append(f"</{self.open_tags.pop()}>")
+
+        allowed = ALLOWED_ATTRIBUTES["*"] | ALLOWED_ATTRIBUTES.get(tag, set())
+        parts = [tag]
+        for name, value in attrs.items():
+            if name not in allowed:
+                continue
+            if name in URL_ATTRIBUTES and (value is None or not is_safe_url(tag, value)):
+                continue
+            if value is None:
+                parts.append(name)
+            else:
+                parts.append(f'{name}="{escape(value)}"')
+        if tag == "img":
+            parts.append('loading="lazy"')
+            if self.first_image is None and attrs.get("src") and is_safe_url(tag, attrs["src"]):
+                self.first_image = attrs["src"]
+        if tag == "a" and attrs.get("target") == "_blank" and "rel" not in attrs:
+            parts.append('rel="noopener noreferrer"')
+        if tag in BLOCK_TAGS:
+            self.text.append("\n")
+        if tag in HEADING_TAGS and self.heading is None:
+            # The id attribute is filled in once the heading text is known
+            self.heading = {"level": int(tag[1]), "index": len(self.output), "parts": parts, "text": []}
+        self.output.append(f"<{' '.join(parts)}>")
+        if tag in ("code", "pre"):
+            self.in_code += 1
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if self.drop_depth:
+            if tag not in VOID_TAGS:
+                self.drop_depth -= 1
+            return
+        if self.formula is not None:
+            if self.formula["depth"]:
+                self.formula["depth"] -= 1
+            elif tag == self.formula["tag"]:
+                formula, self.formula = self.formula, None
+                # Element text wins over data-formula, as in the client renderer
+                latex = "".join(formula["text"]).strip() or formula["attribute"]
+                self.output.append(render_math(latex, formula["display"]))
+            return
+        if tag not in self.open_tags:
+            return
+        # Close any unclosed children so the output is always well formed
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.output.append(f"</{open_tag}>")
+            if open_tag in ("code", "pre"):
+                self.in_code -= 1
+            if open_tag in HEADING_TAGS:
+                self.finish_heading()
+            if open_tag == tag:
+                break
+
+    def handle_data(self, data):
+        if self.drop_depth:
+            return
+        if self.formula is not None:
+            self.formula["text"].append(data)
+            return
+        self.text.append(data)
+        if self.heading is not None:
+            self.heading["text"].append(data)
+        if self.in_code:
+            self.output.append(escape(data, quote=False))
+            return
+        last = 0
+        for match in INLINE_MATH_PATTERN.finditer(data):
+            self.output.append(escape(data[last:match.start()], quote=False))
+            if match.group(1) is not None:
+                self.output.append(render_math(match.group(1), False))
+            else:
+                self.output.append(render_math(match.group(2), True))
+            last = match.end()
+        self.output.append(escape(data[last:], quote=False))
+
+    def finish_heading(self):
+        heading, self.heading = self.heading, None
+        if heading is None:
+            return
+        text = " ".join("".join(heading["text"]).split())
+        if not text:
+            return
+        base = slugify(text) or "section"
+        anchor = base
+        suffix = 2
+        while anchor in self.heading_ids:
+            anchor = f"{base}-{suffix}"
+            suffix += 1
+        self.heading_ids.add(anchor)
+        id_attribute = f'id="{anchor}"'
+        self.output[heading["index"]] = f"<{' '.join(heading['parts'] + [id_attribute])}>"
+        self.headings.append({"level": heading["level"], "text": text, "id": anchor})
+
+    def close(self):
+        super().close()
+        while self.open_tags:
+            open_tag = self.open_tags.pop()
+            self.output.append(f"</{open_tag}>")
+            if open_tag in HEADING_TAGS:
+                self.finish_heading()
+        return "".join(self.output)
+
+    def plain_text(self):
+        return " ".join("".join(self.text).split())
+
+
+def sanitize_and_render(content):
+    renderer = NewsHTMLRenderer()
+    renderer.feed(content or "")
+    return renderer.close()
+
+
+def plain_text(content):
+    """Visible text of rich-text HTML, as counted for word_count"""
+    renderer = NewsHTMLRenderer()
+    renderer.feed(content or "")
+    renderer.close()
+    return renderer.plain_text()
+
+
+def make_excerpt(text, length=EXCERPT_LENGTH):
+    """First ``length`` characters of plain text, cut at a word boundary"""
+    if len(text) <= length:
+        return text
+    cut = text[:length].rsplit(" ", 1)[0]
+    return cut.rstrip(" ,.;:") + "…"
+
+
+def derive_news_fields(news, stored=None):
+    """Fields computed once per write from a news document's ``content``.
+
+    Renders the HTML and derives plain-text excerpt (unless one was written
+    by hand), word count, reading time, heading outline and first image, so
+    list views never need ``content`` itself. ``stored`` is the document
+    being updated, if any: its ``excerpt_hash`` tells a derived excerpt the
+    client sent back unchanged from one written by hand.
+    """
+    content = news.get("content") or ""
+    renderer = NewsHTMLRenderer()
+    renderer.feed(content)
+    rendered_html = renderer.close()
+    text = renderer.plain_text()
+    word_count = len(text.split())
+    derived = {
+        "rendered_html": rendered_html,
+        "content_hash": content_hash(content),
+        "render_version": RENDER_VERSION,
+        "word_count": word_count,
+        "reading_time": max(1, math.ceil(word_count / WORDS_PER_MINUTE)),
+        "toc": renderer.headings,
+        "first_image": renderer.first_image,
+    }
+    excerpt = (news.get("excerpt") or "").strip()
+    if not excerpt or text_hash(excerpt) == (stored or news).get("excerpt_hash"):
+        derived["excerpt"] = make_excerpt(text)
+        derived["excerpt_hash"] = text_hash(derived["excerpt"])
+    return derived
+
+
+def needs_render(news):
+    """True when a stored news document has no render or one made from other content"""
+    return news.get("content_hash") != content_hash(news.get("content") or "")
@@ -0,0 +1,198 @@
+"""On-demand sampling profiler for single requests.
+
+An admin adds ``?__profile=1`` (or an ``X-Profile: 1`` header) to any
+request; it is run while a background thread samples the event loop
+thread's stack, and the response is replaced by the profile as speedscope
+JSON or collapsed stacks for flamegraph.pl. Requests without the flag only
+pay for one query-string and header check.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from urllib.parse import parse_qs
+
+from starlette.concurrency import run_in_threadpool
+
+FORMATS = {"speedscope", "collapsed"}
+DEFAULT_FORMAT = "speedscope"
+MIN_INTERVAL = 0.0005
+
+# The switch interval is process-wide, so overlapping profiles share it: it
+# is lowered for the finest active profiler and restored after the last one
+_switch_lock = threading.Lock()
+_active_intervals = Counter()
+_original_switch_interval = None
+
+
+def _apply_switch_interval():
+    if _active_intervals:
+        sys.setswitchinterval(min(_original_switch_interval, min(_active_intervals) / 2))
+    else:
+        sys.setswitchinterval(_original_switch_interval)
+
+
+def acquire_switch_interval(interval):
+    global _original_switch_interval
+    with _switch_lock:
+        if not _active_intervals:
+            _original_switch_interval = sys.getswitchinterval()
+        _active_intervals[interval] += 1
+        _apply_switch_interval()
+
+
+def release_switch_interval(interval):
+    with _switch_lock:
+        _active_intervals[interval] -= 1
+        if not _active_intervals[interval]:
+            del _active_intervals[interval]
+        _apply_switch_interval()
+
+
+def frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Samples one thread's Python stack every ``interval`` seconds from a daemon thread"""
+
+    def __init__(self, thread_id, interval=0.001):
+        self.thread_id = thread_id
+        self.interval = max(interval, MIN_INTERVAL)
+        self.samples = []  # (stack of code objects, root first; seconds since last sample)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+        self.started_at = None
+        self.duration = 0.0
+
+    def start(self):
+        # The sampler needs the GIL to take a sample, so while it runs the
+        # busy thread is made to release it at least once per interval
+        acquire_switch_interval(self.interval)
+        self.started_at = time.perf_counter()
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        release_switch_interval(self.interval)
+        self.duration = time.perf_counter() - self.started_at
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame.f_code)
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append((stack, now - last))
+            last = now
+
+    def collapsed(self):
+        """Stacks in the ``frame;frame;frame count`` format used by flamegraph.pl and speedscope"""
+        counts = Counter(";".join(frame_label(code) for code in stack) for stack, _ in self.samples)
+        return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
+
+    def speedscope(self, name):
+        frames = []
+        frame_index = {}
+        samples = []
+        weights = []
+        for stack, weight in self.samples:
+            indices = []
+            for code in stack:
+                index = frame_index.get(code)
+                if index is None:
+                    index = frame_index[code] = len(frames)
+                    frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+                indices.append(index)
+            samples.append(indices)
+            weights.append(weight)
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "sesgrg-profiler",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": self.duration,
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+class ProfilingMiddleware:
+    """ASGI middleware that profiles flagged requests from callers ``authorize`` accepts.
+
+    ``authorize`` receives the request's Authorization header value and
+    returns True for users allowed to profile. Only the event loop thread is
+    sampled, so the profile covers handler code, Firestore calls made from
+    handlers and response serialisation; other requests served concurrently
+    show up in the same samples.
+    """
+
+    def __init__(self, app, authorize, interval=0.001):
+        self.app = app
+        self.authorize = authorize
+        self.interval = interval
+
+    def requested_format(self, scope):
+        if b"__profile" in scope.get("query_string", b""):
+            params = parse_qs(scope["query_string"].decode("latin-1"))
+            value = params.get("__profile", [""])[0]
+        else:
+            value = next((v.decode("latin-1") for k, v in scope.get("headers", []) if k == b"x-profile"), "")
+        if not value or value in ("0", "false"):
+            return None
+        return value if value in FORMATS else DEFAULT_FORMAT
+
+    async def __call__(self, scope, receive, send):
+        fmt = self.requested_format(scope) if scope["type"] == "http" else None
+        if fmt is None:
+            await self.app(scope, receive, send)
+            return
+
+        authorization = next((v.decode("latin-1") for k, v in scope["headers"] if k == b"authorization"), "")
+        if not await run_in_threadpool(self.authorize, authorization):
+            await send_body(send, 403, b'{"detail":"Not enough permissions"}', b"application/json")
+            return
+
+        status_code = None
+
+        async def discard(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+
+        profiler = SamplingProfiler(threading.get_ident(), self.interval)
+        profiler.start()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            profiler.stop()
+
+        name = f"{scope['method']} {scope['path']} -> {status_code} in {profiler.duration * 1000:.1f} ms"
+        if fmt == "collapsed":
+            await send_body(send, 200, profiler.collapsed().encode("utf-8"), b"text/plain; charset=utf-8",
+                            [(b"x-profile-name", name.encode("latin-1", "replace"))])
+        else:
+            body = json.dumps(profiler.speedscope(name)).encode("utf-8")
+            await send_body(send, 200, body, b"application/json")
+
+
+async def send_body(send, status_code, body, content_type, extra_headers=()):
+    headers = [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]
+    headers.extend(extra_headers)
+    await send({"type": "http.response.start", "status": status_code, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,67 @@
+"""In-memory login throttling: per-key token buckets and a concurrency gate"""
+import math
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class TokenBucketLimiter:
+    """Token bucket per key with a bounded number of tracked keys.
+
+    Tokens refill continuously, so the allowance always covers the last
+    ``capacity / refill_rate`` seconds rather than fixed clock windows. When
+    more than ``max_keys`` keys are tracked the least recently used bucket is
+    dropped, which only ever forgives a key, never blocks one.
+    """
+
+    def __init__(self, capacity, refill_per_minute, max_keys=10000):
+        self.capacity = float(capacity)
+        self.refill_rate = refill_per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at)
+        self._lock = Lock()
+
+    def acquire(self, key, now=None):
+        """Take one token for ``key``; return 0 if allowed, otherwise seconds to wait"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, updated_at = self._buckets.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + (now - updated_at) * self.refill_rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                retry_after = (1 - tokens) / self.refill_rate
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return retry_after
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class ConcurrencyGate:
+    """Non-blocking cap on in-flight work; callers are rejected instead of queued"""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.in_flight = 0
+        self._lock = Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+
+
+def retry_after_header(seconds):
+    """Format a wait time for the Retry-After header (whole seconds, at least 1)"""
+    return str(max(1, math.ceil(seconds)))
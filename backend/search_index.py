@@ -0,0 +1,368 @@
+"""Site-wide full-text search with SQLite FTS5.
+
+One FTS5 table indexes every searchable collection in four weighted
+columns (title, body, authors, tags) built from SEARCH_FIELDS. The index
+is independent of the storage backend: server.py rebuilds it from storage
+on first use and periodically after, and keeps it current in between by
+upserting documents from its write helpers. Results are ranked by BM25 and come with highlighted titles,
+snippets and per-type facet counts.
+"""
+import os
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from html import escape
+
+from news_render import plain_text
+
+# Document fields that feed each column, per collection
+SEARCH_FIELDS = {
+    "publications": {
+        "title": ["title"],
+        "body": ["journal_name", "conference_name", "book_title", "publisher"],
+        "authors": ["authors", "editor"],
+        "tags": ["keywords", "research_areas", "publication_type"],
+    },
+    "people": {
+        "title": ["name"],
+        "body": ["bio", "title", "department"],
+        "authors": [],
+        "tags": ["research_interests", "category"],
+    },
+    "projects": {
+        "title": ["name"],
+        "body": ["description", "funded_by"],
+        "authors": ["team_leader", "team_members"],
+        "tags": ["research_area", "status"],
+    },
+    "news": {
+        "title": ["title"],
+        "body": ["content", "excerpt"],
+        "authors": ["author"],
+        "tags": ["tags", "seo_keywords", "category"],
+    },
+    "achievements": {
+        "title": ["title"],
+        "body": ["description"],
+        "authors": [],
+        "tags": ["category"],
+    },
+    "events": {
+        "title": ["title"],
+        "body": ["description", "location"],
+        "authors": [],
+        "tags": ["event_type"],
+    },
+}
+# Rowids carry the document type in their high bits, so facet counts and
+# type filters are rowid ranges FTS5 answers from its doclists without
+# reading rows. Never renumber; add new types with new codes.
+TYPE_CODES = {"publications": 1, "people": 2, "projects": 3, "news": 4, "achievements": 5, "events": 6}
+TYPE_SHIFT = 40
+COLUMNS = ("title", "body", "authors", "tags")
+# BM25 weight of each column: a match in a title outranks one in the body
+COLUMN_WEIGHTS = (10.0, 1.0, 5.0, 3.0)
+# Fields holding rich-text HTML, indexed as their visible text
+HTML_FIELDS = {"content"}
+
+# Query terms beyond this are ignored
+MAX_TERMS = 8
+# Queries matching more documents than this rank title matches first
+RANK_CANDIDATES = 5000
+# A last term shorter than this is matched whole instead of as a prefix
+MIN_PREFIX = 2
+SNIPPET_TOKENS = 16
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+# Highlight markers that cannot occur in indexed text; replaced by <mark>
+# after the snippet has been HTML-escaped
+MARK_START = "\x02"
+MARK_END = "\x03"
+
+
+def searchable(collection, doc):
+    """Whether a document may appear in public search results"""
+    if collection not in SEARCH_FIELDS:
+        return False
+    # Unpublished articles are not listed anywhere public
+    return not (collection == "news" and doc.get("status") == "draft")
+
+
+def field_text(field, value):
+    if value is None:
+        return ""
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(item) for item in value if item is not None)
+    if field in HTML_FIELDS:
+        return plain_text(str(value))
+    return str(value)
+
+
+def column_text(doc, fields):
+    texts = []
+    for field in fields:
+        text = field_text(field, doc.get(field))
+        # Derived fields such as a news excerpt repeat text already indexed
+        if text and not any(text.rstrip("…") in previous for previous in texts):
+            texts.append(text)
+    return "\n".join(texts)
+
+
+def document_columns(collection, doc):
+    """(title, body, authors, tags) text of a document"""
+    fields = SEARCH_FIELDS[collection]
+    return tuple(column_text(doc, fields[column]) for column in COLUMNS)
+
+
+def match_expression(query):
+    """An FTS5 MATCH expression for free text, or None when it has no terms.
+
+    Every term must match; terms are quoted so user input cannot use FTS5
+    syntax, and the last one matches as a prefix so results follow typing.
+    """
+    terms = TOKEN_PATTERN.findall(query.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    expression = " ".join(f'"{term}"' for term in terms)
+    return expression + "*" if len(terms[-1]) >= MIN_PREFIX else expression
+
+
+def type_range(collection):
+    """The (first, last) rowids of a document type"""
+    first = TYPE_CODES[collection] << TYPE_SHIFT
+    return first, first + (1 << TYPE_SHIFT) - 1
+
+
+def remove_database(path):
+    """Delete an SQLite database file together with its WAL and shared-memory files"""
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def highlight_html(text):
+    """HTML-escape marked text and turn the markers into <mark> elements"""
+    return escape(text or "").replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
+
+
+class SearchIndex:
+    """FTS5 index of (type, id) documents, safe to share across threads.
+
+    ``path`` is ":memory:" for a per-process index or a file to keep the
+    index across restarts.
+    """
+
+    def __init__(self, path=":memory:"):
+        self.path = path
+        self._lock = threading.RLock()
+        self._writes = None  # (type, id) -> document (None if removed) since begin_rebuild()
+        self.conn = self._connect(path)
+        with self.transaction() as conn:
+            self._create_schema(conn)
+        row = self.conn.execute("SELECT value FROM search_meta WHERE key = 'built_at'").fetchone()
+        # When the index was last rebuilt from storage (ISO, UTC), or None;
+        # a plain attribute so the staleness check never waits for the lock
+        self.built_at = row[0] if row else None
+
+    @staticmethod
+    def _connect(path):
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        if path != ":memory:":
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @staticmethod
+    def _create_schema(conn):
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS search_docs ("
+            " rowid INTEGER PRIMARY KEY,"
+            " type TEXT NOT NULL,"
+            " doc_id TEXT NOT NULL,"
+            " title TEXT NOT NULL,"
+            " UNIQUE (type, doc_id))"
+        )
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5("
+            f"{', '.join(COLUMNS)}, tokenize='porter unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        # ORDER BY rank uses the column weights
+        weights = ", ".join(str(weight) for weight in COLUMN_WEIGHTS)
+        conn.execute("INSERT INTO search_fts (search_fts, rank) VALUES ('rank', ?)", (f"bm25({weights})",))
+        conn.execute("CREATE TABLE IF NOT EXISTS search_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _remove(self, conn, collection, doc_id):
+        row = conn.execute("SELECT rowid FROM search_docs WHERE type = ? AND doc_id = ?",
+                           (collection, doc_id)).fetchone()
+        if row:
+            conn.execute("DELETE FROM search_fts WHERE rowid = ?", row)
+            conn.execute("DELETE FROM search_docs WHERE rowid = ?", row)
+
+    def _insert(self, conn, collection, doc_id, doc, rowid=None):
+        columns = document_columns(collection, doc)
+        if rowid is None:
+            first, last = type_range(collection)
+            previous = conn.execute("SELECT max(rowid) FROM search_docs WHERE rowid BETWEEN ? AND ?",
+                                    (first, last)).fetchone()[0]
+            rowid = (previous or first) + 1
+        conn.execute("INSERT INTO search_docs (rowid, type, doc_id, title) VALUES (?, ?, ?, ?)",
+                     (rowid, collection, doc_id, columns[0]))
+        conn.execute(f"INSERT INTO search_fts (rowid, {', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?)",
+                     (rowid,) + columns)
+
+    def upsert(self, collection, doc_id, doc):
+        """Index a written document, or drop it if it is no longer searchable"""
+        with self.transaction() as conn:
+            self._remove(conn, collection, doc_id)
+            if searchable(collection, doc):
+                self._insert(conn, collection, doc_id, doc)
+            if self._writes is not None:
+                self._writes[(collection, doc_id)] = doc
+
+    def remove(self, collection, doc_id):
+        with self.transaction() as conn:
+            self._remove(conn, collection, doc_id)
+            if self._writes is not None:
+                self._writes[(collection, doc_id)] = None
+
+    def begin_rebuild(self):
+        """Record writes from now on, so rebuild() can re-apply those its documents predate"""
+        with self._lock:
+            self._writes = {}
+
+    def rebuild(self, documents):
+        """Replace the whole index with (collection, id, document) triples, then
+        re-apply writes made since begin_rebuild().
+
+        The new index is built in a separate database without the lock, so
+        searches and writes keep using the old one and only wait for the swap.
+        """
+        build_path = self.path if self.path == ":memory:" else self.path + ".rebuild"
+        if build_path != ":memory:":
+            remove_database(build_path)
+        conn = self._connect(build_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            self._create_schema(conn)
+            rowids = {collection: type_range(collection)[0] for collection in TYPE_CODES}
+            for collection, doc_id, doc in documents:
+                if searchable(collection, doc):
+                    rowids[collection] += 1
+                    self._insert(conn, collection, doc_id, doc, rowids[collection])
+            # Merge the b-trees written by the bulk insert into one
+            conn.execute("INSERT INTO search_fts (search_fts) VALUES ('optimize')")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.close()
+            raise
+
+        with self._lock:
+            old, self.conn = self.conn, conn
+            old.close()
+            if build_path != ":memory:":
+                # Move the new database over the old file and reopen it there
+                conn.close()
+                remove_database(self.path)
+                os.replace(build_path, self.path)
+                self.conn = self._connect(self.path)
+            built_at = datetime.utcnow().isoformat()
+            with self.transaction() as conn:
+                for (collection, doc_id), doc in (self._writes or {}).items():
+                    self._remove(conn, collection, doc_id)
+                    if doc is not None and searchable(collection, doc):
+                        self._insert(conn, collection, doc_id, doc)
+                conn.execute("INSERT OR REPLACE INTO search_meta (key, value) VALUES ('built_at', ?)", (built_at,))
+            self._writes = None
+            self.built_at = built_at
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT count(*) FROM search_docs").fetchone()[0]
+
+    def _ranked(self, expression, type_filter, limit, offset):
+        """One page of matches ordered by BM25, highlighted"""
+        # With ORDER BY rank FTS5 sorts internally and computes highlights
+        # and snippets only for the rows returned
+        sql, params = type_filter
+        return self.conn.execute(
+            "SELECT d.type, d.doc_id, d.title, m.title_html, m.snippet, m.rank FROM ("
+            f" SELECT rowid, rank, highlight(search_fts, 0, '{MARK_START}', '{MARK_END}') AS title_html,"
+            f" snippet(search_fts, 1, '{MARK_START}', '{MARK_END}', '…', {SNIPPET_TOKENS}) AS snippet"
+            f" FROM search_fts WHERE search_fts MATCH ?{sql} ORDER BY rank LIMIT ? OFFSET ?"
+            ") m JOIN search_docs d ON d.rowid = m.rowid ORDER BY m.rank",
+            [expression] + params + [limit, offset],
+        ).fetchall()
+
+    def _count(self, expression, type_filter):
+        sql, params = type_filter
+        return self.conn.execute(f"SELECT count(*) FROM search_fts WHERE search_fts MATCH ?{sql}",
+                                 [expression] + params).fetchone()[0]
+
+    def search(self, query, types=None, limit=20, offset=0):
+        """Ranked matches for free text, with facet counts per type.
+
+        Facets count matches of every type, so a client can offer the other
+        types while ``types`` narrows the results. BM25 scores every match,
+        so broad queries rank documents matching in their title first and
+        only score the rest when paging past them.
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return {"query": query, "total": 0, "facets": {}, "results": []}
+        with self._lock:
+            facets = {}
+            for collection in TYPE_CODES:
+                count = self._count(expression, (" AND rowid BETWEEN ? AND ?", list(type_range(collection))))
+                if count:
+                    facets[collection] = count
+            total = sum(count for collection, count in facets.items() if not types or collection in types)
+
+            if not types:
+                type_filter = ("", [])
+            elif len(types) == 1:
+                type_filter = (" AND rowid BETWEEN ? AND ?", list(type_range(types[0])))
+            else:
+                type_filter = (f" AND (rowid >> {TYPE_SHIFT}) IN ({', '.join('?' for _ in types)})",
+                               [TYPE_CODES[collection] for collection in types])
+            if total > RANK_CANDIDATES:
+                in_title = f"{{title}} : ({expression})"
+                tiers = [in_title, f"({expression}) NOT {in_title}"]
+            else:
+                tiers = [expression]
+
+            rows = []
+            for i, tier in enumerate(tiers):
+                tier_rows = self._ranked(tier, type_filter, limit - len(rows), offset)
+                rows.extend(tier_rows)
+                if len(rows) >= limit or i == len(tiers) - 1:
+                    break
+                # Skip the rest of the offset into the next tier
+                offset = max(0, offset - self._count(tier, type_filter)) if not tier_rows else 0
+
+        results = [
+            {
+                "type": doc_type,
+                "id": doc_id,
+                "title": title,
+                "title_html": highlight_html(title_html),
+                "snippet_html": highlight_html(snippet),
+                # bm25() is lower for better matches
+                "score": round(-rank, 4),
+            }
+            for doc_type, doc_id, title, title_html, snippet, rank in rows
+        ]
+        return {"query": query, "total": total, "facets": facets, "results": results}
@@ -1,18 +1,45 @@
-from fastapi import FastAPI, HTTPException, Depends, status, File, UploadFile
+from fastapi import FastAPI, HTTPException, Depends, Request, Query, status, File, Form, UploadFile
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import os
-from datetime import datetime, timedelta
+import time
+import asyncio
+import contextvars
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
 import uuid
 import json
+import logging
+import threading
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import requests
 from dotenv import load_dotenv
 
+from auth_cache import TokenCache, RevocationList, token_digest
+from rate_limit import TokenBucketLimiter, ConcurrencyGate, retry_after_header
+from media_storage import LocalMediaStorage, MediaFiles
+from images import generate_variants, verify_image, compute_placeholder
+from image_proxy import DiskLRUCache, ImageProxy, ImageProxyError
+from news_render import derive_news_fields, needs_render
+from metrics import registry as metrics_registry, MetricsMiddleware, ReadBudget
+from structured_logging import configure_logging, RequestLoggingMiddleware
+from profiling import ProfilingMiddleware
+from tracing import Tracer, TracingMiddleware, OTLPFileExporter, span, traced
+from loop_monitor import LoopMonitor
+from storage import (
+    FirestoreBackend, MemoryBackend, SQLiteBackend, DocumentNotFound, ASCENDING, DESCENDING,
+    timestamps_to_iso, parse_iso_strings,
+)
+from search_index import SearchIndex, SEARCH_FIELDS
+from bitmap_index import BitmapIndex
+
 # Try to import Firebase, but don't fail if it's not available
 try:
     from google.cloud import firestore
@@ -25,8 +52,64 @@ except ImportError as e:
 
 load_dotenv()
 
+# JSON logs are written by a background thread; successful requests are
+# logged at LOG_SAMPLE_RATE, errors and requests over LOG_SLOW_MS always
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+LOG_SLOW_MS = float(os.getenv("LOG_SLOW_MS", "1000"))
+configure_logging(LOG_LEVEL, LOG_SAMPLE_RATE)
+logger = logging.getLogger("sesgrg.server")
+
+# Every request is traced; the slowest TRACE_KEEP_SLOWEST traces are kept for
+# /api/admin/traces/recent and, with TRACE_EXPORT_PATH set, all traces are
+# appended there as OTLP/JSON
+TRACE_KEEP_SLOWEST = int(os.getenv("TRACE_KEEP_SLOWEST", "50"))
+TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+tracer = Tracer(
+    keep_slowest=TRACE_KEEP_SLOWEST,
+    exporters=[OTLPFileExporter(TRACE_EXPORT_PATH)] if TRACE_EXPORT_PATH else [],
+)
+
+class TracedJSONResponse(JSONResponse):
+    def render(self, content):
+        with span("serialize.json"):
+            return super().render(content)
+
 # Initialize FastAPI
-app = FastAPI(title="SESGRG API", version="1.0.0")
+app = FastAPI(title="SESGRG API", version="1.0.0", default_response_class=TracedJSONResponse)
+
+# Added first, so it is the innermost middleware and traces cover routing,
+# the handler and response serialisation
+app.add_middleware(TracingMiddleware, tracer=tracer, exclude_paths={"/metrics", "/api/metrics"})
+
+# Firestore document reads allowed per request, e.g. "/api/news=100,/api/people=50";
+# READ_BUDGET_DEFAULT applies to other routes (0 = unlimited)
+READ_BUDGETS = os.getenv("READ_BUDGETS", "")
+READ_BUDGET_DEFAULT = int(os.getenv("READ_BUDGET_DEFAULT", "0"))
+# "log" only reports requests over budget; "reject" also refuses the reads
+# that would exceed it on GET/HEAD requests, which then answer 503
+READ_BUDGET_MODE = os.getenv("READ_BUDGET_MODE", "log")
+
+# Request ids and access logs; added first so it runs inside the metrics
+# middleware and can log each request's Firestore usage
+app.add_middleware(RequestLoggingMiddleware, slow_ms=LOG_SLOW_MS, exclude_paths={"/metrics", "/api/metrics"})
+
+# Per-route request metrics, exposed at /metrics, plus per-request Firestore
+# usage in X-Firestore-* and Server-Timing response headers
+app.add_middleware(
+    MetricsMiddleware,
+    exclude_paths={"/metrics", "/api/metrics"},
+    read_budget=ReadBudget(READ_BUDGETS, READ_BUDGET_DEFAULT, READ_BUDGET_MODE),
+)
+
+# Admins can profile any request with ?__profile=1 (or =collapsed) or an
+# X-Profile header; authorize_profiling is defined with the auth helpers
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+app.add_middleware(
+    ProfilingMiddleware,
+    authorize=lambda authorization: authorize_profiling(authorization),
+    interval=PROFILE_INTERVAL_MS / 1000,
+)
 
 # CORS Configuration
 app.add_middleware(
@@ -37,174 +120,426 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Media storage (local filesystem stand-in for Firebase Storage)
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(os.path.dirname(os.path.abspath(__file__)), "media"))
+MEDIA_URL = os.getenv("MEDIA_URL", "/api/media")
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "10")) * 1024 * 1024
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+
+media_storage = LocalMediaStorage(MEDIA_ROOT, MEDIA_URL)
+app.mount(MEDIA_URL, MediaFiles(directory=MEDIA_ROOT, check_dir=False), name="media")
+
+# Variant generation is CPU-bound, so it runs in worker processes; the pool
+# is created on first upload to keep it out of cold starts
+image_executor = None
+
+def get_image_executor():
+    global image_executor
+    if image_executor is None:
+        image_executor = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    return image_executor
+
+# Image proxy for externally hosted images referenced by documents
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "sesgrg-image-cache"))
+IMAGE_CACHE_MB = int(os.getenv("IMAGE_CACHE_MB", "256"))
+IMAGE_PROXY_HOSTS = os.getenv(
+    "IMAGE_PROXY_HOSTS",
+    "images.unsplash.com,i.ibb.co.com,i.ibb.co,c0.wallpaperflare.com,itbrief.com.au,customer-assets.emergentagent.com"
+).split(",")
+IMAGE_PROXY_FETCHES = int(os.getenv("IMAGE_PROXY_FETCHES", "4"))
+
+image_proxy = ImageProxy(
+    DiskLRUCache(IMAGE_CACHE_DIR, IMAGE_CACHE_MB * 1024 * 1024),
+    [host.strip() for host in IMAGE_PROXY_HOSTS if host.strip()],
+    max_concurrent_fetches=IMAGE_PROXY_FETCHES,
+    executor=get_image_executor
+)
+
+# Image field per collection that gets size/colour/blurhash placeholders
+PLACEHOLDER_FIELDS = {
+    "photo_gallery": "url",
+    "projects": "image",
+    "people": "image",
+    "news": "image",
+    "research_areas": "image",
+}
+# The image field an upload may set, per collection
+UPLOAD_FIELDS = dict(PLACEHOLDER_FIELDS, achievements="image", events="image")
+detached_tasks = set()
+placeholder_job_running = False
+
+# Storage backend: "firestore" (the default; falls back to the in-memory
+# sample store when no client can be created), "memory", or "sqlite" for
+# self-hosting and CI (a WAL-mode database file at SQLITE_PATH)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "firestore")
+SQLITE_PATH = os.getenv("SQLITE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sesgrg.sqlite3"))
+
+# Full-text search index (search_index.py). The default in-memory index is
+# built from storage on the first search in each process and kept current by
+# this process's writes; a file path keeps it across restarts.
+SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH", ":memory:")
+SEARCH_MAX_LIMIT = 100
+# The in-process indexes (search, facets, analytics columns) only see this
+# process's writes, so they are rebuilt from storage when older than this to
+# pick up writes made by other instances or outside the API
+INDEX_REFRESH_SECONDS = int(os.getenv("INDEX_REFRESH_SECONDS", "300"))
+
+# Facets of /api/publications/facets and the publication field each indexes.
+# The bitmap index (bitmap_index.py) is built on first use in each process,
+# kept current by this process's writes and rebuilt every INDEX_REFRESH_SECONDS.
+PUBLICATION_FACETS = {
+    "publication_type": "publication_type",
+    "year": "year",
+    "research_area": "research_areas",
+    "is_open_access": "is_open_access",
+    "keyword": "keywords",
+}
+# Fields /api/publications can be sorted by
+PUBLICATION_SORT_FIELDS = {"year", "citations", "title", "created_at", "updated_at"}
+
+# FIRESTORE_BACKEND=fake runs the Firestore code paths against an in-process
+# fake with simulated latency, failures and read billing (see fake_firestore.py)
+FIRESTORE_BACKEND = os.getenv("FIRESTORE_BACKEND", "firestore")
+
 # Initialize Firebase
 db = None
-firebase_initialized = False
 
-if FIREBASE_AVAILABLE:
+# Wall-clock cost of initialisation steps, reported by benchmarks/cold_start.py
+startup_timings = {}
+firestore_started = time.perf_counter()
+
+if STORAGE_BACKEND != "firestore":
+    pass
+elif FIRESTORE_BACKEND == "fake":
+    import fake_firestore
+    db = fake_firestore.client_from_env()
+    logger.info("Using fake Firestore client")
+elif FIREBASE_AVAILABLE:
     try:
         # Try direct client initialization
         db = firestore.Client(project="sesgrg-website")
-        firebase_initialized = True
         print("Direct Firestore client created successfully")
     except Exception as e:
         print(f"Direct Firestore client failed: {e}")
         print("Firebase will be unavailable - using mock data only")
         db = None
-        firebase_initialized = False
 else:
     print("Firebase libraries not available - using mock data only")
     db = None
-    firebase_initialized = False
+
+startup_timings["firestore_client_ms"] = (time.perf_counter() - firestore_started) * 1000
 
 # Security
 SECRET_KEY = os.getenv("SECRET_KEY", "fallback-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+REVOCATION_REFRESH_SECONDS = int(os.getenv("REVOCATION_REFRESH_SECONDS", "60"))
+# Expired revocation documents deleted per revocation written
+REVOCATION_PRUNE_BATCH = 50
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+AUTH_WORKERS = int(os.getenv("AUTH_WORKERS", "2"))
+AUTH_MAX_CONCURRENCY = int(os.getenv("AUTH_MAX_CONCURRENCY", str(AUTH_WORKERS * 2)))
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", "10"))
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", "10"))
+LOGIN_USER_BURST = int(os.getenv("LOGIN_USER_BURST", "5"))
+LOGIN_USER_PER_MINUTE = float(os.getenv("LOGIN_USER_PER_MINUTE", "5"))
+# Only enable behind a proxy that sets X-Forwarded-For (vercel.json does, as
+# Vercel overwrites the header); otherwise clients could spoof their IP
+TRUST_FORWARDED_FOR = os.getenv("TRUST_FORWARDED_FOR", "false").lower() == "true"
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hashes below BCRYPT_ROUNDS are reported by needs_update and rehashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 security = HTTPBearer()
 
-def get_collection_data(collection_name, filters=None, order_by=None, limit=None):
-    """Get data from Firestore collection with optional filtering"""
+# bcrypt releases the GIL, so a small thread pool keeps password work off the
+# event loop without starving the handlers serving public traffic
+password_executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix="auth")
+dummy_password_hash = None
+users_bootstrapped = False
+
+# Login throttling is checked before any password work so credential-stuffing
+# bursts are answered with cheap 429s instead of saturating the auth pool
+login_ip_limiter = TokenBucketLimiter(LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE)
+login_user_limiter = TokenBucketLimiter(LOGIN_USER_BURST, LOGIN_USER_PER_MINUTE)
+auth_gate = ConcurrencyGate(AUTH_MAX_CONCURRENCY)
+
+# Verified tokens are cached so the admin UI's burst of requests per page
+# decodes each token once; revocations are checked on every request.
+token_cache = TokenCache(max_size=TOKEN_CACHE_SIZE)
+revocations = RevocationList()
+revocations_loaded_at = 0.0
+
+# Fields computed from a document on every write that changes their source.
+# Each deriver takes the written data and returns the fields to store with it.
+DERIVED_FIELDS = {
+    "news": [("content", derive_news_fields)],
+}
+
+# Fields returned by list views that do not need full article bodies
+NEWS_SUMMARY_FIELDS = [
+    "title", "excerpt", "author", "published_date", "category", "is_featured",
+    "image", "image_alt", "image_meta", "tags", "seo_keywords", "status",
+    "google_calendar_link", "word_count", "reading_time", "first_image",
+    "created_at", "updated_at"
+]
+
+# Heavy fields stored in a separate body document (news/{id}/body/content in
+# Firestore) so list reads only transfer the small summary document
+BODY_FIELDS = {
+    "news": ["content", "rendered_html", "toc", "content_hash", "render_version"],
+}
+
+def derive_fields(collection_name, data, stored=None):
+    """Run the collection's derivation pipeline over data about to be written.
+
+    ``stored`` is the document being updated, for derivers that depend on
+    what they derived last time.
+    """
+    for source_field, deriver in DERIVED_FIELDS.get(collection_name, []):
+        if source_field in data:
+            data.update(deriver(data, stored))
+    return data
+
+@traced("db.get_collection_data", "collection")
+def get_collection_data(collection_name, filters=None, order_by=None, limit=None, fields=None):
+    """Get documents from a collection with optional filtering, ordering and field projection"""
     try:
-        if db is None or not firebase_initialized:
-            return get_mock_data(collection_name)
-        
-        ref = db.collection(collection_name)
-        
-        # Apply filters
-        if filters:
-            for field, operator, value in filters:
-                ref = ref.where(field, operator, value)
-        
-        # Apply ordering
-        if order_by:
-            field, direction = order_by
-            if FIREBASE_AVAILABLE and firestore:
-                ref = ref.order_by(field, direction=direction)
-        
-        # Apply limit
-        if limit:
-            ref = ref.limit(limit)
-        
-        docs = ref.stream()
-        data = []
-        for doc in docs:
-            doc_data = doc.to_dict()
-            doc_data['id'] = doc.id
-            # Convert datetime objects to ISO strings
-            for key, value in doc_data.items():
-                if hasattr(value, 'isoformat'):
-                    doc_data[key] = value.isoformat()
-            data.append(doc_data)
-        
-        return data
+        return storage.query(collection_name, filters=filters, order_by=order_by, limit=limit, fields=fields)
+    except ValueError as e:
+        # An invalid field path or operator
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        print(f"Error getting collection data: {e}")
-        return get_mock_data(collection_name)
+        logger.exception("Error getting collection data", extra={"collection": collection_name})
+        # Only the development store falls back to sample data; a failing
+        # database must not look like an empty or different collection
+        if storage.name == "memory":
+            return get_mock_data(collection_name)
+        raise HTTPException(status_code=500, detail=f"Error fetching documents: {str(e)}")
 
+@traced("db.add_document", "collection")
 def add_document(collection_name, data):
-    """Add document to Firestore collection"""
+    """Add a document to a collection"""
     try:
-        if db is None:
-            # Mock behavior - add to in-memory storage
-            data['id'] = str(uuid.uuid4())
-            data['created_at'] = datetime.utcnow().isoformat()
-            in_memory_db[collection_name].append(data)
-            return data
-        
-        # Add timestamp
+        derive_fields(collection_name, data)
         data['created_at'] = datetime.utcnow()
         data['updated_at'] = datetime.utcnow()
         
-        # Convert datetime strings to Firestore timestamps
-        for key, value in data.items():
-            if isinstance(value, str) and 'T' in value and ':' in value:
-                try:
-                    data[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except:
-                    pass
-        
-        doc_ref = db.collection(collection_name).add(data)
-        doc_id = doc_ref[1].id
+        summary, body = split_body(collection_name, data)
+        doc_id = storage.add(collection_name, summary, body)
         
         # Return the created document
-        created_doc = data.copy()
-        created_doc['id'] = doc_id
-        created_doc['created_at'] = created_doc['created_at'].isoformat()
-        created_doc['updated_at'] = created_doc['updated_at'].isoformat()
+        created_doc = timestamps_to_iso(dict(data, id=doc_id))
+        schedule_placeholder(collection_name, doc_id, data)
+        index_document(collection_name, doc_id, created_doc)
         
         return created_doc
     except Exception as e:
-        print(f"Error adding document: {e}")
+        logger.exception("Error adding document", extra={"collection": collection_name})
         raise HTTPException(status_code=500, detail=f"Error creating document: {str(e)}")
 
+@traced("db.update_document", "collection", "doc_id")
 def update_document(collection_name, doc_id, data):
-    """Update document in Firestore collection"""
+    """Update a document in a collection"""
     try:
-        if db is None:
-            # Mock behavior - update in-memory storage
-            for item in in_memory_db[collection_name]:
-                if item['id'] == doc_id:
-                    item.update(data)
-                    item['updated_at'] = datetime.utcnow().isoformat()
-                    return item
-            raise HTTPException(status_code=404, detail="Document not found")
-        
+        stored = None
+        if any(source_field in data for source_field, _ in DERIVED_FIELDS.get(collection_name, [])):
+            stored = get_document(collection_name, doc_id)
+        derive_fields(collection_name, data, stored)
         data['updated_at'] = datetime.utcnow()
         
-        # Convert datetime strings to Firestore timestamps
-        for key, value in data.items():
-            if isinstance(value, str) and 'T' in value and ':' in value:
-                try:
-                    data[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
-                except:
-                    pass
-        
-        doc_ref = db.collection(collection_name).document(doc_id)
-        if not doc_ref.get().exists:
+        summary, body = split_body(collection_name, data)
+        try:
+            updated_doc = storage.update(collection_name, doc_id, summary, body, current=stored)
+        except DocumentNotFound:
             raise HTTPException(status_code=404, detail="Document not found")
-        
-        doc_ref.update(data)
-        
-        # Return updated document
-        updated_doc = doc_ref.get().to_dict()
-        updated_doc['id'] = doc_id
-        for key, value in updated_doc.items():
-            if hasattr(value, 'isoformat'):
-                updated_doc[key] = value.isoformat()
+        if collection_name in BODY_FIELDS:
+            # A write that replaced every body field needs no read to return them
+            if set(body) >= set(BODY_FIELDS[collection_name]):
+                updated_doc.update(timestamps_to_iso(dict(body)))
+            else:
+                updated_doc.update(get_body(collection_name, doc_id) or {})
+        schedule_placeholder(collection_name, doc_id, data)
+        index_document(collection_name, doc_id, updated_doc)
         
         return updated_doc
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error updating document: {e}")
+        logger.exception("Error updating document", extra={"collection": collection_name, "doc_id": doc_id})
         raise HTTPException(status_code=500, detail=f"Error updating document: {str(e)}")
 
+def split_body(collection_name, data):
+    """Split written data into (summary fields, body fields) for the collection"""
+    body_fields = BODY_FIELDS.get(collection_name)
+    if not body_fields:
+        return data, {}
+    summary = {key: value for key, value in data.items() if key not in body_fields}
+    body = {key: value for key, value in data.items() if key in body_fields}
+    return summary, body
+
+@traced("db.get_body", "collection", "doc_id")
+def get_body(collection_name, doc_id):
+    """Get the body document of a split document, or None if it has none"""
+    return storage.get_body(collection_name, doc_id)
+
+@traced("db.get_document", "collection", "doc_id")
+def get_document(collection_name, doc_id):
+    """Get a single document by id, or None if it does not exist"""
+    try:
+        return storage.get(collection_name, doc_id)
+    except Exception as e:
+        logger.exception("Error getting document", extra={"collection": collection_name, "doc_id": doc_id})
+        raise HTTPException(status_code=500, detail=f"Error fetching document: {str(e)}")
+
+@traced("db.set_document", "collection", "doc_id")
+def set_document(collection_name, doc_id, data, merge=False):
+    """Create or overwrite a document with a known id"""
+    try:
+        storage.set(collection_name, doc_id, data, merge=merge)
+        return dict(data, id=doc_id)
+    except Exception as e:
+        logger.exception("Error setting document", extra={"collection": collection_name, "doc_id": doc_id})
+        raise HTTPException(status_code=500, detail=f"Error saving document: {str(e)}")
+
+@traced("db.delete_document", "collection", "doc_id")
 def delete_document(collection_name, doc_id):
-    """Delete document from Firestore collection"""
+    """Delete a document, and its body for split documents"""
     try:
-        if db is None:
-            # Mock behavior - delete from in-memory storage
-            in_memory_db[collection_name] = [item for item in in_memory_db[collection_name] if item['id'] != doc_id]
-            return {"message": "Document deleted successfully"}
-        
-        doc_ref = db.collection(collection_name).document(doc_id)
-        if not doc_ref.get().exists:
+        if not storage.delete(collection_name, doc_id):
             raise HTTPException(status_code=404, detail="Document not found")
-        
-        doc_ref.delete()
+        if collection_name in BODY_FIELDS:
+            storage.delete_body(collection_name, doc_id)
+        unindex_document(collection_name, doc_id)
         return {"message": "Document deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        print(f"Error deleting document: {e}")
+        logger.exception("Error deleting document", extra={"collection": collection_name, "doc_id": doc_id})
         raise HTTPException(status_code=500, detail=f"Error deleting document: {str(e)}")
 
+@traced("db.aggregate_collection", "collection")
+def aggregate_collection(collection_name, sums=(), maxes=()):
+    """Count documents and total/max numeric fields without reading every document"""
+    try:
+        return storage.aggregate(collection_name, sums=sums, maxes=maxes)
+    except Exception as e:
+        logger.exception("Error aggregating collection", extra={"collection": collection_name})
+        raise HTTPException(status_code=500, detail=f"Error aggregating collection: {str(e)}")
+
+def index_document(collection_name, doc_id, doc):
+    """Bring the search and facet indexes up to date with a written document"""
+    # Applied even while an index is being built: the build re-applies them
+    # over its snapshot of storage, which may predate this write
+    if collection_name == "publications":
+        publication_facets.add(doc_id, doc)
+    if collection_name == "publications" and publication_columns is not None:
+        publication_columns.add(doc_id, doc)
+    if collection_name not in SEARCH_FIELDS:
+        return
+    # The write has succeeded; a stale index entry is fixed by the next rebuild
+    try:
+        search_index.upsert(collection_name, doc_id, doc)
+    except Exception:
+        logger.exception("Error indexing document", extra={"collection": collection_name, "doc_id": doc_id})
+
+def unindex_document(collection_name, doc_id):
+    """Drop a deleted document from the search and facet indexes"""
+    if collection_name == "publications":
+        publication_facets.remove(doc_id)
+        if publication_columns is not None:
+            publication_columns.remove(doc_id)
+    if collection_name not in SEARCH_FIELDS:
+        return
+    try:
+        search_index.remove(collection_name, doc_id)
+    except Exception:
+        logger.exception("Error unindexing document", extra={"collection": collection_name, "doc_id": doc_id})
+
+def index_is_stale(built_at):
+    """Whether an in-process index built at ``built_at`` (time.time(), or None) needs a rebuild"""
+    return built_at is None or time.time() - built_at >= INDEX_REFRESH_SECONDS
+
+def refresh_index(build_lock, built_at, rebuild):
+    """Rebuild an index that is missing or stale.
+
+    Only a missing index makes callers wait; a stale one keeps serving while
+    whichever request got the lock rebuilds it.
+    """
+    if not index_is_stale(built_at()):
+        return
+    if not build_lock.acquire(blocking=built_at() is None):
+        return
+    try:
+        if index_is_stale(built_at()):
+            rebuild()
+    finally:
+        build_lock.release()
+
+def search_index_built_at():
+    built_at = search_index.built_at
+    return datetime.fromisoformat(built_at).replace(tzinfo=timezone.utc).timestamp() if built_at else None
+
+@traced("search.rebuild")
+def rebuild_search_index():
+    """Re-index every searchable document in storage; returns the number indexed"""
+    search_index.begin_rebuild()
+    documents = []
+    for collection_name in SEARCH_FIELDS:
+        docs = storage.query(collection_name)
+        bodies = {}
+        if collection_name in BODY_FIELDS:
+            bodies = storage.get_bodies(collection_name, [doc["id"] for doc in docs])
+        # Inline fields win over the body, as in get_news_item
+        documents.extend((collection_name, doc["id"], dict(bodies.get(doc["id"], {}), **doc)) for doc in docs)
+    search_index.rebuild(documents)
+    return search_index.count()
+
+def ensure_search_index():
+    """Build the search index on first use and refresh it every INDEX_REFRESH_SECONDS"""
+    refresh_index(search_build_lock, search_index_built_at, rebuild_search_index)
+
+def force_rebuild_search_index():
+    """Rebuild the search index now, after any build already running"""
+    with search_build_lock:
+        return rebuild_search_index()
+
+def rebuild_publication_facets():
+    publication_facets.begin_rebuild()
+    publication_facets.rebuild(storage.query("publications", fields=list(PUBLICATION_FACETS.values())))
+
+def ensure_publication_facets():
+    """Build the publication facet index on first use and refresh it every INDEX_REFRESH_SECONDS"""
+    refresh_index(facets_build_lock, lambda: publication_facets.built_at, rebuild_publication_facets)
+
+# Publication fields the columnar analytics read
+PUBLICATION_COLUMN_FIELDS = ["title", "year", "citations", "publication_type", "authors", "research_areas"]
+
+def rebuild_publication_columns():
+    publication_columns.begin_rebuild()
+    publication_columns.rebuild(storage.query("publications", fields=PUBLICATION_COLUMN_FIELDS))
+
+def get_publication_columns():
+    """The columnar publications, built from storage on first use and every INDEX_REFRESH_SECONDS"""
+    global publication_columns
+    if publication_columns is None:
+        with columns_build_lock:
+            if publication_columns is None:
+                from columnar import PublicationColumns
+                publication_columns = PublicationColumns()
+    refresh_index(columns_build_lock, lambda: publication_columns.built_at, rebuild_publication_columns)
+    return publication_columns
+
 def get_mock_data(collection_name):
     """Get mock data for development"""
     return in_memory_db.get(collection_name, [])
+DEFAULT_SETTINGS = {
+    "site_title": "Sustainable Energy & Smart Grid Research",
+    "site_description": "Pioneering Research in Clean Energy, Renewable Integration, and Next-Generation Smart Grid Systems.",
+    "contact_email": "sesg@bracu.ac.bd",
+    "logo": "https://customer-assets.emergentagent.com/job_da31abd5-8dec-452e-a49e-9beda777d1d4/artifacts/ii07ct2o_Logo.jpg"
+}
+
 in_memory_db = {
     "people": [],
     "publications": [],
@@ -287,6 +622,7 @@ in_memory_db = {
     ],
     "achievements": [],
     "news": [],
+    "news_body": [],
     "events": [],
     "research_areas": [
         {
@@ -340,14 +676,38 @@ in_memory_db = {
         }
     ],
     "photo_gallery": [],
-    "settings": {
-        "site_title": "Sustainable Energy & Smart Grid Research",
-        "site_description": "Pioneering Research in Clean Energy, Renewable Integration, and Next-Generation Smart Grid Systems.",
-        "contact_email": "sesg@bracu.ac.bd",
-        "logo": "https://customer-assets.emergentagent.com/job_da31abd5-8dec-452e-a49e-9beda777d1d4/artifacts/ii07ct2o_Logo.jpg"
-    }
+    "media": [],
+    "token_revocations": [],
+    "users": [],
+    "settings": [dict(DEFAULT_SETTINGS, id="site_config")]
 }
 
+# Without a data file the fake starts from the same sample content
+if FIRESTORE_BACKEND == "fake" and db is not None and not os.getenv("FAKE_FIRESTORE_DATA"):
+    db.seed(in_memory_db)
+
+def create_storage():
+    """The configured storage backend; Firestore falls back to memory when no client could be created"""
+    if STORAGE_BACKEND == "sqlite":
+        return SQLiteBackend(SQLITE_PATH)
+    if STORAGE_BACKEND == "firestore" and db is not None:
+        return FirestoreBackend(db)
+    return MemoryBackend(in_memory_db)
+
+storage = create_storage()
+logger.info(f"Using {storage.name} storage backend")
+
+if SEARCH_INDEX_PATH != ":memory:" and os.path.dirname(SEARCH_INDEX_PATH):
+    os.makedirs(os.path.dirname(SEARCH_INDEX_PATH), exist_ok=True)
+search_index = SearchIndex(SEARCH_INDEX_PATH)
+search_build_lock = threading.Lock()
+publication_facets = BitmapIndex(PUBLICATION_FACETS)
+facets_build_lock = threading.Lock()
+# Columnar publications for the analytics endpoints (columnar.py); created on
+# first use so NumPy stays out of cold starts that never need it
+publication_columns = None
+columns_build_lock = threading.Lock()
+
 # Pydantic Models
 class TokenResponse(BaseModel):
     access_token: str
@@ -358,6 +718,19 @@ class LoginRequest(BaseModel):
     username: str
     password: str
 
+class RevokeRequest(BaseModel):
+    username: str
+
+class UserCreate(BaseModel):
+    username: str
+    password: str
+    role: str = "admin"  # admin, editor
+
+class UserUpdate(BaseModel):
+    password: Optional[str] = None
+    role: Optional[str] = None
+    disabled: Optional[bool] = None
+
 class PersonCreate(BaseModel):
     name: str
     title: str
@@ -416,7 +789,7 @@ class AchievementCreate(BaseModel):
 class NewsCreate(BaseModel):
     title: str
     content: str  # Rich text content
-    excerpt: str
+    excerpt: Optional[str] = None  # Derived from content when left empty
     author: str
     published_date: datetime
     category: str = "news"  # news, events, upcoming_events
@@ -445,16 +818,156 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def run_password_work(func, *args):
+    """Run a bcrypt operation on the bounded auth pool instead of the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(password_executor, func, *args)
+
+def public_user(user):
+    """Strip credentials from a user document before returning it"""
+    return {key: value for key, value in user.items() if key != "password_hash"}
+
+async def ensure_bootstrap_admin():
+    """Seed the users collection from ADMIN_USERNAME/ADMIN_PASSWORD when it is empty.
+
+    Storage errors propagate rather than reading as an empty collection, and
+    the admin is only created if absent, so an existing account is never reset.
+    """
+    global users_bootstrapped
+    if users_bootstrapped:
+        return
+    if not storage.query("users", limit=1, fields=["username"]):
+        admin_username = os.getenv("ADMIN_USERNAME", "admin")
+        admin_password = os.getenv("ADMIN_PASSWORD", "@dminsesg705")
+        password_hash = await run_password_work(get_password_hash, admin_password)
+        storage.create("users", admin_username, {
+            "username": admin_username,
+            "password_hash": password_hash,
+            "role": "admin",
+            "disabled": False,
+            "created_at": datetime.utcnow().isoformat()
+        })
+    users_bootstrapped = True
+
+def get_client_ip(request: Request):
+    if TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            # The last entry is the one added by the proxy in front of us;
+            # anything before it came from the client
+            return forwarded.split(",")[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+def too_many_requests(retry_after, detail="Too many login attempts, please try again later"):
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": retry_after_header(retry_after)}
+    )
+
+def check_login_rate(request: Request, username):
+    """Reject a login attempt early when its client IP or username is over budget"""
+    retry_after = login_ip_limiter.acquire(get_client_ip(request))
+    if retry_after:
+        raise too_many_requests(retry_after)
+    retry_after = login_user_limiter.acquire(username.lower())
+    if retry_after:
+        raise too_many_requests(retry_after)
+
+async def authenticate_user(username, password):
+    """Return the user document if the credentials are valid, rehashing outdated hashes"""
+    global dummy_password_hash
+    await ensure_bootstrap_admin()
+    user = get_document("users", username)
+    if user is None or user.get("disabled"):
+        # Burn the same bcrypt work for unknown users so timing does not reveal them
+        if dummy_password_hash is None:
+            dummy_password_hash = await run_password_work(get_password_hash, "dummy-password")
+        await run_password_work(verify_password, password, dummy_password_hash)
+        return None
+    
+    valid, new_hash = await run_password_work(pwd_context.verify_and_update, password, user["password_hash"])
+    if not valid:
+        return None
+    if new_hash:
+        update_document("users", user["id"], {"password_hash": new_hash})
+    return user
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
+    issued_at = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+        expire = issued_at + timedelta(minutes=15)
+    # iat keeps sub-second precision so a token issued just after a user's
+    # tokens were revoked is not caught by the revocation's cut-off
+    to_encode.update({"exp": expire, "iat": time.time()})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def refresh_revocations(force=False):
+    """Reload persisted revocations so logouts on other instances are honoured"""
+    global revocations_loaded_at
+    now = time.time()
+    if not force and now - revocations_loaded_at < REVOCATION_REFRESH_SECONDS:
+        return
+    revocations_loaded_at = now
+    try:
+        entries = get_collection_data("token_revocations", filters=[("expires_at", ">", now)])
+    except Exception:
+        # Keep checking against the last list loaded; the next refresh retries
+        logger.warning("Could not reload token revocations; using the last list loaded")
+        return
+    revocations.load(entries, now)
+
+def prune_revocations():
+    """Delete a batch of persisted revocations that no token can match any more"""
+    try:
+        expired = get_collection_data("token_revocations", filters=[("expires_at", "<=", time.time())],
+                                      limit=REVOCATION_PRUNE_BATCH, fields=["expires_at"])
+        for entry in expired:
+            storage.delete("token_revocations", entry["id"])
+    except Exception:
+        logger.exception("Error pruning token revocations", extra={"collection": "token_revocations"})
+
+def revoke_token(token):
+    """Revoke a single, already verified token until it would have expired anyway"""
+    digest = token_digest(token)
+    expires_at = jwt.get_unverified_claims(token).get("exp") or time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    revocations.revoke_token(digest, expires_at)
+    token_cache.discard(digest)
+    set_document("token_revocations", digest, {"kind": "token", "expires_at": expires_at})
+    prune_revocations()
+
+def revoke_user_tokens(username):
+    """Force-expire every token issued to a user up to now"""
+    revoked_before = time.time()
+    expires_at = revoked_before + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    revocations.revoke_user(username, revoked_before, expires_at)
+    set_document("token_revocations", f"user:{username}", {
+        "kind": "user",
+        "username": username,
+        "revoked_before": revoked_before,
+        "expires_at": expires_at
+    })
+    prune_revocations()
+
+def decode_token(token):
+    """Return the verified payload of a token, decoding it at most once while cached"""
+    digest = token_digest(token)
+    payload = token_cache.get(digest)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        if payload.get("sub") is None:
+            raise JWTError("Token has no subject")
+        expires_at = payload.get("exp") or time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        token_cache.put(digest, payload, expires_at)
+    refresh_revocations()
+    if revocations.is_revoked(digest, payload["sub"], payload.get("iat", 0)):
+        raise JWTError("Token has been revoked")
+    return payload
+
 def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -462,42 +975,369 @@ def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(securit
         headers={"WWW-Authenticate": "Bearer"},
     )
     try:
-        token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        return {"username": username, "role": payload.get("role", "user")}
+        with span("auth.get_current_user"):
+            payload = decode_token(credentials.credentials)
+        return {"username": payload["sub"], "role": payload.get("role", "user")}
     except JWTError:
         raise credentials_exception
 
+def authorize_profiling(authorization):
+    """True when the Authorization header belongs to an admin"""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user = get_current_user(HTTPAuthorizationCredentials(scheme=scheme, credentials=token))
+    except HTTPException:
+        return False
+    return user["role"] == "admin"
+
+# Event loop lag is sampled every LOOP_MONITOR_INTERVAL_MS and exported as a
+# metric; with LOOP_DEBUG=true the stack of any call blocking the loop for
+# more than LOOP_BLOCK_THRESHOLD_MS is logged
+LOOP_MONITOR_INTERVAL_MS = float(os.getenv("LOOP_MONITOR_INTERVAL_MS", "250"))
+LOOP_BLOCK_THRESHOLD_MS = float(os.getenv("LOOP_BLOCK_THRESHOLD_MS", "100"))
+LOOP_DEBUG = os.getenv("LOOP_DEBUG", "false").lower() == "true"
+loop_monitor = LoopMonitor(LOOP_MONITOR_INTERVAL_MS / 1000, LOOP_BLOCK_THRESHOLD_MS / 1000, LOOP_DEBUG)
+
+@app.on_event("startup")
+async def start_loop_monitor():
+    loop_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_loop_monitor():
+    await loop_monitor.stop()
+
 # API Endpoints
 @app.get("/api/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.utcnow()}
 
 @app.post("/api/auth/login", response_model=TokenResponse)
-async def login(request: LoginRequest):
-    # Simple authentication (replace with proper user management)
-    admin_username = os.getenv("ADMIN_USERNAME", "admin")
-    admin_password = os.getenv("ADMIN_PASSWORD", "@dminsesg705")
-    
-    if request.username == admin_username and request.password == admin_password:
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": request.username, "role": "admin"}, 
-            expires_delta=access_token_expires
-        )
-        return TokenResponse(
-            access_token=access_token,
-            token_type="bearer",
-            user_role="admin"
-        )
-    else:
+async def login(request: LoginRequest, http_request: Request):
+    check_login_rate(http_request, request.username)
+    if not auth_gate.try_acquire():
+        raise too_many_requests(1, detail="Authentication service is busy, please try again")
+    try:
+        user = await authenticate_user(request.username, request.password)
+    finally:
+        auth_gate.release()
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
         )
+    
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user["username"], "role": user.get("role", "admin")}, 
+        expires_delta=access_token_expires
+    )
+    return TokenResponse(
+        access_token=access_token,
+        token_type="bearer",
+        user_role=user.get("role", "admin")
+    )
+
+@app.post("/api/auth/logout")
+async def logout(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    current_user: dict = Depends(get_current_user)
+):
+    revoke_token(credentials.credentials)
+    return {"message": "Logged out successfully"}
+
+@app.post("/api/auth/revoke")
+async def revoke_tokens(request: RevokeRequest, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    revoke_user_tokens(request.username)
+    return {"message": f"All tokens for {request.username} have been revoked"}
+
+@app.get("/api/users")
+async def get_users(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    return [public_user(user) for user in get_collection_data("users")]
+
+@app.post("/api/users")
+async def create_user(user: UserCreate, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if get_document("users", user.username) is not None:
+        raise HTTPException(status_code=400, detail="Username already exists")
+    
+    password_hash = await run_password_work(get_password_hash, user.password)
+    user_data = set_document("users", user.username, {
+        "username": user.username,
+        "password_hash": password_hash,
+        "role": user.role,
+        "disabled": False,
+        "created_at": datetime.utcnow().isoformat()
+    })
+    return public_user(user_data)
+
+@app.put("/api/users/{username}")
+async def update_user(username: str, user: UserUpdate, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    user_data = user.dict(exclude_none=True)
+    password = user_data.pop("password", None)
+    if password:
+        user_data["password_hash"] = await run_password_work(get_password_hash, password)
+    updated = update_document("users", username, user_data)
+    # Role, password and status changes must not leave old tokens usable
+    revoke_user_tokens(username)
+    return public_user(updated)
+
+@app.delete("/api/users/{username}")
+async def delete_user(username: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    result = delete_document("users", username)
+    revoke_user_tokens(username)
+    return result
+
+def copy_upload(source, target_path, max_bytes):
+    """Copy an uploaded file to disk in chunks, enforcing the size limit"""
+    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+    size = 0
+    with open(target_path, "wb") as target:
+        while True:
+            chunk = source.read(1024 * 1024)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                target.close()
+                os.remove(target_path)
+                raise HTTPException(status_code=413, detail="Uploaded file is too large")
+            target.write(chunk)
+    return size
+
+def run_detached(coro):
+    """Run a coroutine on the event loop independently of the current request.
+
+    The task starts from an empty context, so the request's metrics, access
+    log and trace neither wait for nor count its work.
+    """
+    task = contextvars.Context().run(asyncio.get_running_loop().create_task, coro)
+    detached_tasks.add(task)
+    task.add_done_callback(detached_tasks.discard)
+    return task
+
+async def process_image_variants(upload_id, key, collection, doc_id, field):
+    """Generate resized variants in the process pool and record their URLs"""
+    work_dir = media_storage.path(f"tmp/{upload_id}-variants")
+    try:
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(get_image_executor(), generate_variants, media_storage.path(key), work_dir)
+        urls = media_storage.put_directory(f"variants/{upload_id}", work_dir)
+        variants = {}
+        for name, variant in result["variants"].items():
+            variants[name] = {
+                fmt: urls[value] if fmt not in ("width", "height") else value
+                for fmt, value in variant.items()
+            }
+        update_document("media", upload_id, {
+            "status": "ready",
+            "width": result["width"],
+            "height": result["height"],
+            "variants": variants
+        })
+        if collection:
+            update_document(collection, doc_id, {f"{field}_variants": variants})
+    except Exception as e:
+        logger.exception("Error generating image variants", extra={"collection": collection, "doc_id": doc_id})
+        update_document("media", upload_id, {"status": "failed", "error": str(e)})
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+@app.post("/api/uploads/image")
+async def upload_image(
+    file: UploadFile = File(...),
+    collection: Optional[str] = Form(None),
+    doc_id: Optional[str] = Form(None),
+    field: Optional[str] = Form(None),
+    current_user: dict = Depends(get_current_user)
+):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if bool(collection) != bool(doc_id):
+        raise HTTPException(status_code=400, detail="collection and doc_id must be given together")
+    if collection and collection not in UPLOAD_FIELDS:
+        raise HTTPException(status_code=400, detail="Uploads are not supported for this collection")
+    if collection:
+        if field not in (None, UPLOAD_FIELDS[collection]):
+            raise HTTPException(status_code=400, detail="Uploads can only set the collection's image field")
+        field = UPLOAD_FIELDS[collection]
+    else:
+        field = None
+    if not (file.content_type or "").startswith("image/"):
+        raise HTTPException(status_code=400, detail="Only image uploads are supported")
+    if collection and get_document(collection, doc_id) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    upload_id = uuid.uuid4().hex
+    tmp_path = media_storage.path(f"tmp/{upload_id}")
+    size = await run_in_threadpool(copy_upload, file.file, tmp_path, MAX_UPLOAD_BYTES)
+    image_format = await run_in_threadpool(verify_image, tmp_path)
+    if image_format is None:
+        os.remove(tmp_path)
+        raise HTTPException(status_code=400, detail="Uploaded file is not a valid image")
+    
+    key = f"originals/{upload_id}.{image_format.lower()}"
+    original_url = media_storage.put_file(key, tmp_path)
+    media_doc = set_document("media", upload_id, {
+        "status": "processing",
+        "original": original_url,
+        "filename": file.filename,
+        "size": size,
+        "collection": collection,
+        "doc_id": doc_id,
+        "field": field,
+        "created_at": datetime.utcnow().isoformat()
+    })
+    if collection:
+        update_document(collection, doc_id, {field: original_url})
+    
+    run_detached(process_image_variants(upload_id, key, collection, doc_id, field))
+    return media_doc
+
+@app.get("/api/uploads/{upload_id}")
+async def get_upload(upload_id: str, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    media_doc = get_document("media", upload_id)
+    if media_doc is None:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    return media_doc
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+async def load_image_bytes(src):
+    """Read an image from local media storage or through the image proxy cache"""
+    if src.startswith(MEDIA_URL + "/"):
+        path = media_storage.path(src[len(MEDIA_URL) + 1:])
+        return await run_in_threadpool(read_file, path)
+    image_proxy.normalize(src, 0, "webp")  # raises for hosts outside the allowlist
+    return await image_proxy.get_original(src)
+
+async def compute_document_placeholder(collection_name, doc, force=False):
+    """Store intrinsic size, dominant colour and blurhash for a document's image.
+
+    Returns True if the document was updated.
+    """
+    field = PLACEHOLDER_FIELDS[collection_name]
+    src = doc.get(field)
+    meta_field = f"{field}_meta"
+    if not src or (not force and (doc.get(meta_field) or {}).get("src") == src):
+        return False
+    
+    data = await load_image_bytes(src)
+    loop = asyncio.get_running_loop()
+    meta = await loop.run_in_executor(get_image_executor(), compute_placeholder, data)
+    meta["src"] = src
+    update_document(collection_name, doc["id"], {meta_field: meta})
+    return True
+
+def schedule_placeholder(collection_name, doc_id, data):
+    """Queue placeholder computation after a write that set a document's image"""
+    field = PLACEHOLDER_FIELDS.get(collection_name)
+    if not field or not data.get(field):
+        return
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return  # not called from a request; the batch job will pick it up
+    
+    async def run():
+        try:
+            # Re-read so an unchanged image with an existing placeholder is skipped
+            doc = get_document(collection_name, doc_id)
+            if doc is not None:
+                await compute_document_placeholder(collection_name, doc)
+        except Exception:
+            logger.exception("Error computing image placeholder", extra={"collection": collection_name, "doc_id": doc_id})
+    
+    run_detached(run())
+
+async def run_placeholder_job(collections=None, force=False):
+    """Compute placeholders for every referenced image that does not have one yet"""
+    global placeholder_job_running
+    placeholder_job_running = True
+    summary = {"updated": 0, "skipped": 0, "failed": 0}
+    try:
+        for collection_name in collections or PLACEHOLDER_FIELDS:
+            for doc in get_collection_data(collection_name):
+                try:
+                    if await compute_document_placeholder(collection_name, doc, force=force):
+                        summary["updated"] += 1
+                    else:
+                        summary["skipped"] += 1
+                except Exception:
+                    summary["failed"] += 1
+                    logger.exception(
+                        "Error computing image placeholder", extra={"collection": collection_name, "doc_id": doc.get("id")}
+                    )
+        logger.info(f"Image placeholder job finished: {summary}")
+        return summary
+    finally:
+        placeholder_job_running = False
+
+@app.post("/api/admin/jobs/placeholders")
+async def start_placeholder_job(
+    force: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    global placeholder_job_running
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    if placeholder_job_running:
+        raise HTTPException(status_code=409, detail="Placeholder job is already running")
+    
+    # Claimed now rather than when the task starts, so a second request that
+    # arrives before then is refused too
+    placeholder_job_running = True
+    run_detached(run_placeholder_job(None, force))
+    return {"status": "started", "collections": list(PLACEHOLDER_FIELDS)}
+
+@app.get("/api/img")
+async def get_proxied_image(request: Request, src: str, w: int = 768, fmt: str = "webp"):
+    try:
+        key, data, content_type = await image_proxy.get(src, w, fmt)
+    except ImageProxyError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{key}"'
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=data, media_type=content_type, headers=headers)
+
+@app.get("/metrics", include_in_schema=False)
+@app.get("/api/metrics", include_in_schema=False)
+async def get_metrics(request: Request):
+    metrics_token = os.getenv("METRICS_TOKEN")
+    if metrics_token and request.headers.get("authorization") != f"Bearer {metrics_token}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return PlainTextResponse(metrics_registry.expose(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/admin/traces/recent")
+async def get_recent_traces(limit: int = 20, current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    return [trace.to_dict() for trace in tracer.slowest(limit)]
 
 @app.get("/api/research-areas")
 async def get_research_areas():
@@ -505,26 +1345,10 @@ async def get_research_areas():
 
 @app.get("/api/research-areas/{area_id}")
 async def get_research_area(area_id: str):
-    try:
-        if db is None:
-            area = next((area for area in in_memory_db["research_areas"] if area["id"] == area_id), None)
-            if not area:
-                raise HTTPException(status_code=404, detail="Research area not found")
-            return area
-        
-        doc_ref = db.collection("research_areas").document(area_id)
-        doc = doc_ref.get()
-        if not doc.exists:
-            raise HTTPException(status_code=404, detail="Research area not found")
-        
-        area_data = doc.to_dict()
-        area_data['id'] = doc.id
-        return area_data
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"Error fetching research area: {e}")
-        raise HTTPException(status_code=500, detail="Error fetching research area")
+    area = get_document("research_areas", area_id)
+    if area is None:
+        raise HTTPException(status_code=404, detail="Research area not found")
+    return area
 
 @app.get("/api/people")
 async def get_people(category: Optional[str] = None):
@@ -554,6 +1378,17 @@ async def delete_person(person_id: str, current_user: dict = Depends(get_current
     
     return delete_document("people", person_id)
 
+def filter_publications(publications, research_area=None, search=None):
+    """Filters Firestore cannot express: research area membership and title/author search"""
+    if research_area:
+        publications = [p for p in publications if research_area in p.get("research_areas", [])]
+    if search:
+        search_lower = search.lower()
+        publications = [p for p in publications if 
+                       search_lower in p.get("title", "").lower() or
+                       any(search_lower in author.lower() for author in p.get("authors", []))]
+    return publications
+
 @app.get("/api/publications")
 async def get_publications(
     publication_type: Optional[str] = None,
@@ -563,6 +1398,8 @@ async def get_publications(
     sort_by: str = "year",
     sort_order: str = "desc"
 ):
+    if sort_by not in PUBLICATION_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of: {', '.join(sorted(PUBLICATION_SORT_FIELDS))}")
     filters = []
     if publication_type:
         filters.append(("publication_type", "==", publication_type))
@@ -571,24 +1408,84 @@ async def get_publications(
     
     # For Firebase, we'll get all data and filter search/research_area in Python
     # since Firestore has limitations on complex queries
-    if db:
-        order_by = (sort_by, firestore.Query.DESCENDING if sort_order == "desc" else firestore.Query.ASCENDING)
-    else:
-        order_by = None
+    order_by = (sort_by, DESCENDING if sort_order == "desc" else ASCENDING)
     
     publications = get_collection_data("publications", filters=filters, order_by=order_by)
     
     # Apply additional filters
-    if research_area:
-        publications = [p for p in publications if research_area in p.get("research_areas", [])]
-    if search:
-        search_lower = search.lower()
-        publications = [p for p in publications if 
-                       search_lower in p.get("title", "").lower() or
-                       any(search_lower in author.lower() for author in p.get("authors", []))]
+    with span("filter.publications", input=len(publications)) as filter_span:
+        publications = filter_publications(publications, research_area, search)
+        if filter_span is not None:
+            filter_span.set("output", len(publications))
     
     return publications
 
+@app.get("/api/publications/facets")
+async def get_publication_facets(
+    publication_type: Optional[List[str]] = Query(None),
+    year: Optional[List[int]] = Query(None),
+    research_area: Optional[List[str]] = Query(None),
+    is_open_access: Optional[bool] = None,
+    keyword: Optional[List[str]] = Query(None),
+    facet_limit: int = 50
+):
+    # Repeated parameters select any of their values; different parameters must all match
+    filters = {
+        "publication_type": publication_type,
+        "year": year,
+        "research_area": research_area,
+        "is_open_access": None if is_open_access is None else [is_open_access],
+        "keyword": keyword,
+    }
+    
+    def count_facets():
+        # Off the event loop: counting waits for the index lock, held by writes
+        # and the swap at the end of a rebuild
+        ensure_publication_facets()
+        return publication_facets.count(filters), publication_facets.facet_counts(filters, limit=max(1, facet_limit))
+    
+    try:
+        total, facets = await run_in_threadpool(count_facets)
+        return {
+            "total": total,
+            "facets": {
+                facet: [{"value": value, "count": count} for value, count in counts]
+                for facet, counts in facets.items()
+            },
+        }
+    except Exception:
+        logger.exception("Error computing publication facets", extra={"collection": "publications"})
+        raise HTTPException(status_code=500, detail="Error computing publication facets")
+
+async def publication_analytics(compute):
+    """Run an analytics query over the columnar publications"""
+    try:
+        # Off the event loop: the columns' lock is held by writes and the swap
+        # at the end of a rebuild
+        return await run_in_threadpool(lambda: compute(get_publication_columns()))
+    except Exception:
+        logger.exception("Error computing publication analytics", extra={"collection": "publications"})
+        raise HTTPException(status_code=500, detail="Error computing publication analytics")
+
+@app.get("/api/publications/analytics/citations-per-year")
+async def get_citations_per_year():
+    return await publication_analytics(lambda columns: columns.citations_per_year())
+
+@app.get("/api/publications/analytics/citations-per-area")
+async def get_citations_per_area():
+    return await publication_analytics(lambda columns: columns.citations_per_area())
+
+@app.get("/api/publications/analytics/h-index")
+async def get_h_index(author: Optional[str] = None):
+    return await publication_analytics(
+        lambda columns: {"author": author, "h_index": columns.h_index(author)}
+    )
+
+@app.get("/api/publications/analytics/top-cited")
+async def get_top_cited(limit: int = 10):
+    limit = max(1, min(limit, 100))
+    return await publication_analytics(lambda columns: columns.top_cited(limit))
+
 @app.post("/api/publications")
 async def create_publication(publication: PublicationCreate, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
@@ -678,7 +1575,8 @@ async def get_news(
     featured: Optional[bool] = None, 
     category: Optional[str] = None,
     status: Optional[str] = None,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    summary: bool = False
 ):
     filters = []
     if featured is not None:
@@ -688,40 +1586,47 @@ async def get_news(
     if status:
         filters.append(("status", "==", status))
         
-    if db:
-        order_by = ("published_date", firestore.Query.DESCENDING)
-    else:
-        order_by = None
+    order_by = ("published_date", DESCENDING)
     
-    news = get_collection_data("news", filters=filters, order_by=order_by, limit=limit)
+    fields = NEWS_SUMMARY_FIELDS if summary else None
+    news = get_collection_data("news", filters=filters, order_by=order_by, limit=limit, fields=fields)
     return news
 
+def ensure_rendered(news_data):
+    """Re-render news whose stored HTML is missing or was made from other content.
+
+    Articles edited outside the API (e.g. directly in Firestore) are rendered
+    once on their next read and the result is written back, moving any
+    inline body fields into the body document.
+    """
+    if not needs_render(news_data):
+        return news_data
+    rendered = derive_news_fields(news_data)
+    news_data.update(rendered)
+    try:
+        summary, body = split_body("news", dict(rendered, content=news_data.get("content")))
+        storage.update("news", news_data["id"], summary, body)
+    except Exception:
+        logger.exception("Error storing rendered news", extra={"collection": "news", "doc_id": news_data["id"]})
+    return news_data
+
 @app.get("/api/news/{news_id}")
 async def get_news_item(news_id: str):
     try:
-        if db is None:
-            # Mock behavior - find from in-memory storage
-            news_item = next((item for item in in_memory_db["news"] if item["id"] == news_id), None)
-            if not news_item:
-                raise HTTPException(status_code=404, detail="News item not found")
-            return news_item
-        
-        doc_ref = db.collection("news").document(news_id)
-        doc = doc_ref.get()
-        if not doc.exists:
+        news_data = get_document("news", news_id)
+        if news_data is None:
             raise HTTPException(status_code=404, detail="News item not found")
         
-        news_data = doc.to_dict()
-        news_data['id'] = doc.id
-        # Convert datetime objects to ISO strings
-        for key, value in news_data.items():
-            if hasattr(value, 'isoformat'):
-                news_data[key] = value.isoformat()
-        return news_data
+        # Inline body fields win: API writes remove them, so any left belong to
+        # articles not yet migrated to the split layout or edited since by a
+        # client writing the old layout
+        for key, value in (get_body("news", news_id) or {}).items():
+            news_data.setdefault(key, value)
+        return ensure_rendered(news_data)
     except HTTPException:
         raise
-    except Exception as e:
-        print(f"Error fetching news item: {e}")
+    except Exception:
+        logger.exception("Error fetching news item", extra={"collection": "news", "doc_id": news_id})
         raise HTTPException(status_code=500, detail="Error fetching news item")
 
 @app.post("/api/news")
@@ -747,17 +1652,25 @@ async def delete_news(news_id: str, current_user: dict = Depends(get_current_use
     
     return delete_document("news", news_id)
 
+def filter_upcoming_events(events, now):
+    """Events whose date is after ``now`` (naive UTC)"""
+    upcoming = []
+    for e in events:
+        date = datetime.fromisoformat(e.get("date", "1970-01-01T00:00:00"))
+        # Firestore timestamps come back timezone-aware
+        if date.tzinfo is not None:
+            date = date.astimezone(timezone.utc).replace(tzinfo=None)
+        if date > now:
+            upcoming.append(e)
+    return upcoming
+
 @app.get("/api/events")
 async def get_events(upcoming: Optional[bool] = None):
-    if db:
-        order_by = ("date", firestore.Query.ASCENDING)
-    else:
-        order_by = None
-    events = get_collection_data("events", order_by=order_by)
+    events = get_collection_data("events", order_by=("date", ASCENDING))
     
     if upcoming:
-        current_date = datetime.utcnow()
-        events = [e for e in events if datetime.fromisoformat(e.get("date", "1970-01-01T00:00:00")) > current_date]
+        with span("filter.events", input=len(events)):
+            events = filter_upcoming_events(events, datetime.utcnow())
     
     return events
 
@@ -805,43 +1718,55 @@ async def delete_photo(photo_id: str, current_user: dict = Depends(get_current_u
 @app.get("/api/settings")
 async def get_settings():
     try:
-        if db is None:
-            return in_memory_db["settings"]
-        
-        doc_ref = db.collection("settings").document("site_config")
-        doc = doc_ref.get()
-        if doc.exists:
-            return doc.to_dict()
-        else:
-            # Return default settings if none exist
-            return in_memory_db["settings"]
-    except Exception as e:
-        print(f"Error fetching settings: {e}")
-        return in_memory_db["settings"]
+        settings = get_document("settings", "site_config")
+    except HTTPException:
+        settings = None
+    if settings is None:
+        # Return default settings if none exist
+        return DEFAULT_SETTINGS
+    settings.pop("id", None)
+    return settings
 
 @app.put("/api/settings")
 async def update_settings(settings_data: dict, current_user: dict = Depends(get_current_user)):
     if current_user["role"] != "admin":
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
+    settings_data['updated_at'] = datetime.utcnow()
+    set_document("settings", "site_config", settings_data, merge=True)
+    
+    # Return updated settings
+    updated = get_document("settings", "site_config")
+    updated.pop("id", None)
+    return updated
+
+@app.get("/api/search")
+async def search(q: str, type: Optional[str] = None, limit: int = 20, offset: int = 0):
+    types = [t for t in type.split(",") if t] if type else None
+    unknown = [t for t in types or () if t not in SEARCH_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown search type: {', '.join(unknown)}")
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
+    
     try:
-        if db is None:
-            in_memory_db["settings"].update(settings_data)
-            return in_memory_db["settings"]
-        
-        settings_data['updated_at'] = datetime.utcnow()
-        doc_ref = db.collection("settings").document("site_config")
-        doc_ref.set(settings_data, merge=True)
-        
-        # Return updated settings
-        updated_doc = doc_ref.get().to_dict()
-        for key, value in updated_doc.items():
-            if hasattr(value, 'isoformat'):
-                updated_doc[key] = value.isoformat()
-        return updated_doc
-    except Exception as e:
-        print(f"Error updating settings: {e}")
-        raise HTTPException(status_code=500, detail="Error updating settings")
+        if index_is_stale(search_index_built_at()):
+            await run_in_threadpool(ensure_search_index)
+        return await run_in_threadpool(search_index.search, q, types, limit, max(offset, 0))
+    except Exception:
+        logger.exception("Error searching")
+        raise HTTPException(status_code=500, detail="Error searching")
+
+@app.post("/api/admin/search/rebuild")
+async def rebuild_search(current_user: dict = Depends(get_current_user)):
+    if current_user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Not enough permissions")
+    
+    try:
+        documents = await run_in_threadpool(force_rebuild_search_index)
+        return {"documents": documents, "built_at": search_index.built_at}
+    except Exception:
+        logger.exception("Error rebuilding search index")
+        raise HTTPException(status_code=500, detail="Error rebuilding search index")
 
 @app.get("/api/dashboard/stats")
 async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
@@ -849,27 +1774,23 @@ async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=403, detail="Not enough permissions")
     
     try:
-        people = get_collection_data("people")
-        publications = get_collection_data("publications")
-        projects = get_collection_data("projects")
-        achievements = get_collection_data("achievements")
-        news = get_collection_data("news")
-        events = get_collection_data("events")
+        # Aggregation queries cost a read per 1000 documents instead of one per document
+        publications = aggregate_collection("publications", sums=["citations"], maxes=["year"])
         
         stats = {
-            "total_publications": len(publications),
-            "total_people": len(people),
-            "total_projects": len(projects),
-            "total_achievements": len(achievements),
-            "total_news": len(news),
-            "total_events": len(events),
-            "total_citations": sum(p.get("citations", 0) for p in publications),
-            "latest_year": max([p.get("year", 0) for p in publications], default=2025)
+            "total_publications": publications["count"],
+            "total_people": aggregate_collection("people")["count"],
+            "total_projects": aggregate_collection("projects")["count"],
+            "total_achievements": aggregate_collection("achievements")["count"],
+            "total_news": aggregate_collection("news")["count"],
+            "total_events": aggregate_collection("events")["count"],
+            "total_citations": publications["citations"] or 0,
+            "latest_year": publications["year"] or 2025
         }
         
         return stats
-    except Exception as e:
-        print(f"Error fetching dashboard stats: {e}")
+    except Exception:
+        logger.exception("Error fetching dashboard stats")
         raise HTTPException(status_code=500, detail="Error fetching dashboard stats")
 
 if __name__ == "__main__":
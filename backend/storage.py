@@ -0,0 +1,586 @@
+"""Storage backends behind server.py's data-access helpers.
+
+Every backend stores collections of JSON-like documents addressed by
+(collection, id) and returns them as dicts with an ``id`` key and datetimes
+as ISO strings. Split documents (see server.BODY_FIELDS) keep their heavy
+fields in a separate body document.
+
+* FirestoreBackend wraps a Firestore client (or fake_firestore.Client).
+* MemoryBackend keeps documents in a dict of lists, for development.
+* SQLiteBackend keeps documents as JSON in a WAL-mode SQLite file, with
+  expression indexes on the fields queries filter and sort on, for
+  self-hosting and CI.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from fake_firestore import DELETE_FIELD, GOOGLE_DELETE_FIELD, OPERATORS, get_field, normalize, sort_key
+from metrics import firestore_rpc
+
+try:
+    from google.api_core.exceptions import AlreadyExists, NotFound
+except ImportError:
+    from fake_firestore import AlreadyExists, NotFound
+
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+
+class DocumentNotFound(Exception):
+    pass
+
+
+def timestamps_to_iso(doc_data):
+    """Convert datetime values (including Firestore timestamps) to ISO strings in place"""
+    for key, value in doc_data.items():
+        if hasattr(value, 'isoformat'):
+            doc_data[key] = value.isoformat()
+    return doc_data
+
+
+def parse_iso_strings(data):
+    """Convert ISO datetime strings to datetimes in place so Firestore stores timestamps"""
+    for key, value in data.items():
+        if isinstance(value, str) and 'T' in value and ':' in value:
+            try:
+                data[key] = datetime.fromisoformat(value.replace('Z', '+00:00'))
+            except ValueError:
+                pass
+    return data
+
+
+def project(doc, fields):
+    return {key: doc[key] for key in ["id"] + list(fields) if key in doc}
+
+
+def matches(doc, filters):
+    """Whether a document passes every filter; as in Firestore, none matches a missing field"""
+    for field, op, value in filters or ():
+        present, field_value = get_field(doc, field)
+        if not present or not OPERATORS[op](field_value, value):
+            return False
+    return True
+
+
+class StorageBackend:
+    """Operations the server needs from a document store"""
+
+    name = None
+
+    def query(self, collection, filters=None, order_by=None, limit=None, fields=None):
+        """Documents matching ``filters`` [(field, op, value)], ordered by (field, direction)"""
+        raise NotImplementedError
+
+    def get(self, collection, doc_id):
+        """A document, or None"""
+        raise NotImplementedError
+
+    def add(self, collection, data, body=None):
+        """Store a new document (and its body, atomically); returns the new id"""
+        raise NotImplementedError
+
+    def update(self, collection, doc_id, data, body=None, current=None):
+        """Update fields of an existing document; returns it, or raises DocumentNotFound.
+
+        Fields written to the body are removed from the document itself, so
+        an inline copy left by the old layout cannot shadow them. ``current``
+        is the stored document when the caller has already read it; backends
+        that would otherwise read the result back merge the update into it.
+        """
+        raise NotImplementedError
+
+    def set(self, collection, doc_id, data, merge=False):
+        raise NotImplementedError
+
+    def create(self, collection, doc_id, data):
+        """Store a document under a known id unless it exists; returns whether it was created"""
+        raise NotImplementedError
+
+    def delete(self, collection, doc_id):
+        """Delete a document; returns False if it did not exist"""
+        raise NotImplementedError
+
+    def get_body(self, collection, doc_id):
+        raise NotImplementedError
+
+    def get_bodies(self, collection, doc_ids):
+        """{id: body} for the documents in doc_ids that have a body"""
+        bodies = {}
+        for doc_id in doc_ids:
+            body = self.get_body(collection, doc_id)
+            if body is not None:
+                bodies[doc_id] = body
+        return bodies
+
+    def set_body(self, collection, doc_id, body):
+        """Merge fields into a document's body"""
+        raise NotImplementedError
+
+    def delete_body(self, collection, doc_id):
+        raise NotImplementedError
+
+    def aggregate(self, collection, sums=(), maxes=()):
+        """{"count": n, <sum field>: total, <max field>: maximum}"""
+        docs = self.query(collection, fields=list(sums) + list(maxes))
+        result = {"count": len(docs)}
+        for field in sums:
+            result[field] = sum(doc.get(field) or 0 for doc in docs)
+        for field in maxes:
+            result[field] = max((doc.get(field) or 0 for doc in docs), default=None)
+        return result
+
+
+# Documents requested per batched get
+GET_ALL_CHUNK = 300
+
+
+class FirestoreBackend(StorageBackend):
+    name = "firestore"
+
+    def __init__(self, client):
+        self.client = client
+
+    def body_ref(self, collection, doc_id):
+        return self.client.collection(collection).document(doc_id).collection("body").document("content")
+
+    def query(self, collection, filters=None, order_by=None, limit=None, fields=None):
+        ref = self.client.collection(collection)
+        # Only transfer the requested fields
+        if fields:
+            ref = ref.select(fields)
+        for field, operator, value in filters or ():
+            ref = ref.where(field, operator, value)
+        if order_by:
+            field, direction = order_by
+            ref = ref.order_by(field, direction=direction)
+        if limit:
+            ref = ref.limit(limit)
+
+        data = []
+        with firestore_rpc(collection, "query") as rpc:
+            for doc in ref.stream():
+                doc_data = doc.to_dict()
+                doc_data['id'] = doc.id
+                data.append(timestamps_to_iso(doc_data))
+                rpc.count(len(data))
+        return data
+
+    def get(self, collection, doc_id):
+        with firestore_rpc(collection, "get"):
+            doc = self.client.collection(collection).document(doc_id).get()
+        if not doc.exists:
+            return None
+        doc_data = doc.to_dict()
+        doc_data['id'] = doc.id
+        return timestamps_to_iso(doc_data)
+
+    def add(self, collection, data, body=None):
+        # Firestore stores ISO strings as timestamps
+        data = parse_iso_strings(dict(data))
+        if body:
+            # Summary and body are written atomically
+            doc_ref = self.client.collection(collection).document()
+            batch = self.client.batch()
+            batch.set(doc_ref, data)
+            batch.set(self.body_ref(collection, doc_ref.id), parse_iso_strings(dict(body)))
+            with firestore_rpc(collection, "batch_write") as rpc:
+                rpc.documents = 2
+                batch.commit()
+            return doc_ref.id
+        with firestore_rpc(collection, "add"):
+            _, doc_ref = self.client.collection(collection).add(data)
+        return doc_ref.id
+
+    def update(self, collection, doc_id, data, body=None, current=None):
+        doc_ref = self.client.collection(collection).document(doc_id)
+        # update() fails on a missing document, so no existence read is needed
+        data = parse_iso_strings(dict(data))
+        # The fake client accepts either sentinel; a real client only its own
+        data.update((key, GOOGLE_DELETE_FIELD or DELETE_FIELD) for key in body or ())
+        try:
+            with firestore_rpc(collection, "update"):
+                doc_ref.update(data)
+        except NotFound:
+            raise DocumentNotFound(doc_id)
+        if body:
+            self.set_body(collection, doc_id, body)
+        if current is not None:
+            updated = {key: value for key, value in current.items() if key not in (body or ())}
+            # As Firestore would return them: naive datetimes read back as UTC
+            updated.update((key, normalize(value)) for key, value in data.items() if key not in (body or ()))
+        else:
+            with firestore_rpc(collection, "get"):
+                updated = doc_ref.get().to_dict()
+        updated['id'] = doc_id
+        return timestamps_to_iso(updated)
+
+    def set(self, collection, doc_id, data, merge=False):
+        with firestore_rpc(collection, "set"):
+            self.client.collection(collection).document(doc_id).set(data, merge=merge)
+
+    def create(self, collection, doc_id, data):
+        try:
+            with firestore_rpc(collection, "create"):
+                self.client.collection(collection).document(doc_id).create(data)
+        except AlreadyExists:
+            return False
+        return True
+
+    def delete(self, collection, doc_id):
+        doc_ref = self.client.collection(collection).document(doc_id)
+        with firestore_rpc(collection, "get"):
+            if not doc_ref.get().exists:
+                return False
+        with firestore_rpc(collection, "delete"):
+            doc_ref.delete()
+        return True
+
+    def get_body(self, collection, doc_id):
+        with firestore_rpc(f"{collection}/body", "get"):
+            doc = self.body_ref(collection, doc_id).get()
+        return timestamps_to_iso(doc.to_dict()) if doc.exists else None
+
+    def get_bodies(self, collection, doc_ids):
+        bodies = {}
+        # One batched read per chunk instead of a round trip per document
+        for start in range(0, len(doc_ids), GET_ALL_CHUNK):
+            refs = [self.body_ref(collection, doc_id) for doc_id in doc_ids[start:start + GET_ALL_CHUNK]]
+            with firestore_rpc(f"{collection}/body", "get_all") as rpc:
+                rpc.count(len(refs))
+                for doc in self.client.get_all(refs):
+                    if doc.exists:
+                        # Body paths are <collection>/<id>/body/content
+                        bodies[doc.reference.path.split("/")[-3]] = timestamps_to_iso(doc.to_dict())
+        return bodies
+
+    def set_body(self, collection, doc_id, body):
+        with firestore_rpc(f"{collection}/body", "set"):
+            self.body_ref(collection, doc_id).set(body, merge=True)
+
+    def delete_body(self, collection, doc_id):
+        with firestore_rpc(f"{collection}/body", "delete"):
+            self.body_ref(collection, doc_id).delete()
+
+    def aggregate(self, collection, sums=(), maxes=()):
+        query = self.client.collection(collection).count(alias="count")
+        for field in sums:
+            query = query.sum(field, alias=field)
+        with firestore_rpc(collection, "aggregate") as rpc:
+            results = query.get()
+            result = {aggregate.alias: aggregate.value for aggregate in results[0]}
+            # Aggregations are billed one read per 1000 index entries
+            rpc.documents = result["count"] // 1000 + 1
+        # Firestore has no max aggregation; read only the top document instead
+        for field in maxes:
+            top = self.query(collection, order_by=(field, DESCENDING), limit=1, fields=[field])
+            result[field] = top[0].get(field) if top else None
+        return result
+
+
+class MemoryBackend(StorageBackend):
+    """Documents in a dict of lists; datetimes are stored as ISO strings, as Firestore reads return them"""
+
+    name = "memory"
+
+    def __init__(self, data):
+        self.data = data
+
+    def _find(self, collection, doc_id):
+        return next((item for item in self.data.get(collection, []) if item['id'] == doc_id), None)
+
+    def query(self, collection, filters=None, order_by=None, limit=None, fields=None):
+        for _, op, _ in filters or ():
+            if op not in OPERATORS:
+                raise ValueError(f"Unsupported operator {op!r}")
+        docs = [doc for doc in self.data.get(collection, []) if matches(doc, filters)]
+        if order_by:
+            field, direction = order_by
+            # As in Firestore, documents without the ordered field are left out
+            docs = [doc for doc in docs if get_field(doc, field)[0]]
+            docs = sorted(docs, key=lambda doc: sort_key(get_field(doc, field)[1]), reverse=direction == DESCENDING)
+        if limit:
+            docs = docs[:limit]
+        return [project(doc, fields) if fields else dict(doc) for doc in docs]
+
+    def get(self, collection, doc_id):
+        doc = self._find(collection, doc_id)
+        return dict(doc) if doc is not None else None
+
+    def add(self, collection, data, body=None):
+        doc_id = str(uuid.uuid4())
+        self.data.setdefault(collection, []).append(timestamps_to_iso(dict(data, id=doc_id)))
+        if body:
+            self.set_body(collection, doc_id, body)
+        return doc_id
+
+    def update(self, collection, doc_id, data, body=None, current=None):
+        item = self._find(collection, doc_id)
+        if item is None:
+            raise DocumentNotFound(doc_id)
+        item.update(timestamps_to_iso(dict(data)))
+        for key in body or ():
+            item.pop(key, None)
+        if body:
+            self.set_body(collection, doc_id, body)
+        return dict(item)
+
+    def set(self, collection, doc_id, data, merge=False):
+        data = timestamps_to_iso(dict(data, id=doc_id))
+        item = self._find(collection, doc_id)
+        if item is None:
+            self.data.setdefault(collection, []).append(data)
+        else:
+            if not merge:
+                item.clear()
+            item.update(data)
+
+    def create(self, collection, doc_id, data):
+        if self._find(collection, doc_id) is not None:
+            return False
+        self.data.setdefault(collection, []).append(timestamps_to_iso(dict(data, id=doc_id)))
+        return True
+
+    def delete(self, collection, doc_id):
+        items = self.data.get(collection, [])
+        remaining = [item for item in items if item['id'] != doc_id]
+        self.data[collection] = remaining
+        return len(remaining) != len(items)
+
+    def get_body(self, collection, doc_id):
+        body = self._find(f"{collection}_body", doc_id)
+        return {key: value for key, value in body.items() if key != "id"} if body else None
+
+    def set_body(self, collection, doc_id, body):
+        self.set(f"{collection}_body", doc_id, body, merge=True)
+
+    def delete_body(self, collection, doc_id):
+        self.delete(f"{collection}_body", doc_id)
+
+
+# Fields each collection is filtered or sorted on; each gets an expression index
+SQLITE_INDEXES = {
+    "publications": ["year", "publication_type", "citations"],
+    "news": ["published_date", "category", "status", "is_featured"],
+    "events": ["date"],
+    "people": ["category"],
+    "projects": ["status"],
+    "achievements": ["category", "date"],
+}
+FIELD_PATH = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*$")
+# Bound parameters per statement, below SQLite's default limit
+SQLITE_MAX_PARAMS = 500
+SQL_OPERATORS = {"==": "=", "!=": "!=", "<": "<", "<=": "<=", ">": ">", ">=": ">="}
+
+
+def json_path(field):
+    """The json_extract expression for a field; inlined so queries match the expression indexes"""
+    if not FIELD_PATH.match(field):
+        raise ValueError(f"Invalid field path {field!r}")
+    return f"json_extract(data, '$.{field}')"
+
+
+def sql_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f"Cannot store {type(value).__name__}")
+
+
+class SQLiteBackend(StorageBackend):
+    """Documents as JSON in one SQLite table, safe to share across threads.
+
+    The database runs in WAL mode, so readers never block the writer; each
+    thread gets its own connection and multi-statement writes run in
+    explicit transactions. Body documents live in the ``<collection>/body``
+    collection.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self.transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " collection TEXT NOT NULL,"
+                " id TEXT NOT NULL,"
+                " data TEXT NOT NULL CHECK (json_valid(data)),"
+                " PRIMARY KEY (collection, id))"
+            )
+            for collection, fields in SQLITE_INDEXES.items():
+                for field in fields:
+                    conn.execute(
+                        f"CREATE INDEX IF NOT EXISTS idx_{collection}_{field.replace('.', '_')} "
+                        f"ON documents (collection, {json_path(field)})"
+                    )
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL with synchronous=NORMAL stays consistent and only risks the
+            # last transactions on power loss
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _load(self, doc_id, data):
+        doc = json.loads(data)
+        doc['id'] = doc_id
+        return doc
+
+    def _read(self, conn, collection, doc_id):
+        row = conn.execute("SELECT data FROM documents WHERE collection = ? AND id = ?", (collection, doc_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _write(self, conn, collection, doc_id, data):
+        data = {key: value for key, value in data.items() if key != "id"}
+        conn.execute(
+            "INSERT INTO documents (collection, id, data) VALUES (?, ?, ?) "
+            "ON CONFLICT (collection, id) DO UPDATE SET data = excluded.data",
+            (collection, doc_id, json.dumps(data, default=json_default)),
+        )
+
+    def query(self, collection, filters=None, order_by=None, limit=None, fields=None):
+        sql = ["SELECT id, data FROM documents WHERE collection = ?"]
+        params = [collection]
+        for field, op, value in filters or ():
+            column = json_path(field)
+            if op in SQL_OPERATORS:
+                sql.append(f"AND {column} {SQL_OPERATORS[op]} ?")
+                params.append(sql_value(value))
+            elif op in ("in", "not-in"):
+                placeholders = ", ".join("?" for _ in value)
+                sql.append(f"AND {column} {'IN' if op == 'in' else 'NOT IN'} ({placeholders})")
+                params.extend(sql_value(v) for v in value)
+            elif op in ("array_contains", "array-contains"):
+                sql.append(f"AND EXISTS (SELECT 1 FROM json_each(data, '$.{field}') WHERE value = ?)")
+                params.append(sql_value(value))
+            elif op in ("array_contains_any", "array-contains-any"):
+                placeholders = ", ".join("?" for _ in value)
+                sql.append(f"AND EXISTS (SELECT 1 FROM json_each(data, '$.{field}') WHERE value IN ({placeholders}))")
+                params.extend(sql_value(v) for v in value)
+            else:
+                raise ValueError(f"Unsupported operator {op!r}")
+        if order_by:
+            field, direction = order_by
+            column = json_path(field)
+            # As in Firestore, documents without the ordered field are left out
+            # (json_type is NULL only for a missing field; an explicit null is kept)
+            sql.append(f"AND json_type(data, '$.{field}') IS NOT NULL")
+            sql.append(f"ORDER BY {column} {'DESC' if direction == DESCENDING else 'ASC'}")
+        if limit:
+            sql.append("LIMIT ?")
+            params.append(limit)
+        docs = [self._load(doc_id, data) for doc_id, data in self.conn.execute(" ".join(sql), params)]
+        return [project(doc, fields) for doc in docs] if fields else docs
+
+    def get(self, collection, doc_id):
+        data = self._read(self.conn, collection, doc_id)
+        if data is None:
+            return None
+        data['id'] = doc_id
+        return data
+
+    def add(self, collection, data, body=None):
+        doc_id = uuid.uuid4().hex
+        with self.transaction() as conn:
+            self._write(conn, collection, doc_id, data)
+            if body:
+                self._write(conn, f"{collection}/body", doc_id, body)
+        return doc_id
+
+    def update(self, collection, doc_id, data, body=None, current=None):
+        with self.transaction() as conn:
+            current = self._read(conn, collection, doc_id)
+            if current is None:
+                raise DocumentNotFound(doc_id)
+            current.update(json.loads(json.dumps(data, default=json_default)))
+            for key in body or ():
+                current.pop(key, None)
+            self._write(conn, collection, doc_id, current)
+            if body:
+                stored = self._read(conn, f"{collection}/body", doc_id) or {}
+                stored.update(body)
+                self._write(conn, f"{collection}/body", doc_id, stored)
+        current['id'] = doc_id
+        return current
+
+    def set(self, collection, doc_id, data, merge=False):
+        with self.transaction() as conn:
+            current = (self._read(conn, collection, doc_id) or {}) if merge else {}
+            current.update(data)
+            self._write(conn, collection, doc_id, current)
+
+    def create(self, collection, doc_id, data):
+        data = {key: value for key, value in data.items() if key != "id"}
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO documents (collection, id, data) VALUES (?, ?, ?) ON CONFLICT (collection, id) DO NOTHING",
+                (collection, doc_id, json.dumps(data, default=json_default)),
+            )
+        return cursor.rowcount > 0
+
+    def delete(self, collection, doc_id):
+        with self.transaction() as conn:
+            cursor = conn.execute("DELETE FROM documents WHERE collection = ? AND id = ?", (collection, doc_id))
+        return cursor.rowcount > 0
+
+    def get_body(self, collection, doc_id):
+        return self._read(self.conn, f"{collection}/body", doc_id)
+
+    def get_bodies(self, collection, doc_ids):
+        bodies = {}
+        for start in range(0, len(doc_ids), SQLITE_MAX_PARAMS):
+            chunk = doc_ids[start:start + SQLITE_MAX_PARAMS]
+            rows = self.conn.execute(
+                f"SELECT id, data FROM documents WHERE collection = ? AND id IN ({', '.join('?' for _ in chunk)})",
+                [f"{collection}/body"] + list(chunk),
+            )
+            bodies.update((doc_id, json.loads(data)) for doc_id, data in rows)
+        return bodies
+
+    def set_body(self, collection, doc_id, body):
+        self.set(f"{collection}/body", doc_id, body, merge=True)
+
+    def delete_body(self, collection, doc_id):
+        self.delete(f"{collection}/body", doc_id)
+
+    def aggregate(self, collection, sums=(), maxes=()):
+        columns = ["count(*)"]
+        columns += [f"sum({json_path(field)})" for field in sums]
+        columns += [f"max({json_path(field)})" for field in maxes]
+        row = self.conn.execute(
+            f"SELECT {', '.join(columns)} FROM documents WHERE collection = ?", (collection,)
+        ).fetchone()
+        result = {"count": row[0]}
+        for field, value in zip(list(sums) + list(maxes), row[1:]):
+            result[field] = value
+        for field in sums:
+            result[field] = result[field] or 0
+        return result
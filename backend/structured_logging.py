@@ -0,0 +1,191 @@
+"""Structured JSON logging that never blocks the event loop.
+
+Handlers only put records on an unbounded queue; a background listener
+thread formats and writes them. Every record carries the current request's
+id and route, and high-volume success logs can be sampled.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import traceback
+import uuid
+from contextvars import ContextVar
+
+from metrics import current_request_stats
+
+# Fields copied from a record's ``extra`` into the JSON line
+CONTEXT_FIELDS = ("request_id", "method", "route", "status", "collection", "doc_id", "duration_ms", "reads", "writes")
+
+# Set per request by RequestLoggingMiddleware
+request_context = ContextVar("request_context", default=None)
+
+_listener = None
+
+
+class RequestContext:
+    def __init__(self, request_id, scope):
+        self.request_id = request_id
+        self.scope = scope
+
+    def fields(self):
+        # The router stores the matched route in the shared scope once routing is done
+        route = getattr(self.scope.get("route"), "path", None) or "unmatched"
+        return {"request_id": self.request_id, "method": self.scope["method"], "route": route}
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that captures request context in the calling thread.
+
+    Formatting is left to the listener thread; only the message and the
+    traceback text are rendered here, because args and exc_info may not be
+    safe to use later from another thread.
+    """
+
+    def prepare(self, record):
+        context = request_context.get()
+        if context is not None:
+            for key, value in context.fields().items():
+                if not hasattr(record, key):
+                    setattr(record, key, value)
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info))
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in CONTEXT_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records logged with ``extra={"sampled": True}``"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if getattr(record, "sampled", False) and record.levelno < logging.WARNING:
+            return random.random() < self.rate
+        return True
+
+
+def configure_logging(level="INFO", sample_rate=1.0, stream=None):
+    """Route the ``sesgrg`` loggers through a queue to a JSON writer thread"""
+    global _listener
+    logger = logging.getLogger("sesgrg")
+    logger.setLevel(level)
+    logger.propagate = False
+    if _listener is not None:
+        _listener.stop()
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    handler = ContextQueueHandler(log_queue)
+    # Sampling happens before the record is queued so dropped records cost nothing
+    handler.addFilter(SamplingFilter(sample_rate))
+    logger.addHandler(handler)
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(log_queue, writer, respect_handler_level=True)
+    _listener.start()
+    return logger
+
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
+
+
+class RequestLoggingMiddleware:
+    """ASGI middleware assigning X-Request-ID and writing one access line per request.
+
+    Successful, fast requests are logged as sampled; errors and requests
+    slower than ``slow_ms`` are always logged.
+    """
+
+    def __init__(self, app, logger_name="sesgrg.access", slow_ms=1000, exclude_paths=()):
+        self.app = app
+        self.logger = logging.getLogger(logger_name)
+        self.slow_ms = slow_ms
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = request_context.set(RequestContext(request_id, scope))
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message = dict(message, headers=list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1"))
+                ])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception:
+            self.logger.exception("Unhandled error", extra=self.fields(500, start))
+            raise
+        else:
+            if scope["path"] not in self.exclude_paths:
+                fields = self.fields(status_code, start)
+                if status_code >= 500:
+                    level = logging.ERROR
+                elif status_code >= 400 or fields["duration_ms"] >= self.slow_ms:
+                    level = logging.WARNING
+                else:
+                    level = logging.INFO
+                    fields["sampled"] = True
+                self.logger.log(level, f"{scope['method']} {scope['path']} {status_code}", extra=fields)
+        finally:
+            request_context.reset(token)
+
+    def fields(self, status_code, start):
+        fields = {"status": status_code, "duration_ms": round((time.perf_counter() - start) * 1000, 2)}
+        stats = current_request_stats.get()
+        if stats is not None:
+            fields["reads"] = stats.reads
+            fields["writes"] = stats.writes
+        return fields
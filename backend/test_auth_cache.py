@@ -0,0 +1,65 @@
+"""Tests for the verified-token cache and the token revocation list"""
+from auth_cache import RevocationList, TokenCache, token_digest
+
+
+def test_digest_does_not_contain_the_token():
+    digest = token_digest("header.payload.signature")
+    assert "payload" not in digest
+    assert digest == token_digest("header.payload.signature")
+
+
+def test_cached_payload_expires_with_its_token():
+    cache = TokenCache()
+    cache.put("d", {"sub": "admin"}, expires_at=100)
+    assert cache.get("d", now=99) == {"sub": "admin"}
+    assert cache.get("d", now=100) is None
+    assert len(cache) == 0
+
+
+def test_cache_evicts_the_least_recently_used_entry():
+    cache = TokenCache(max_size=2)
+    cache.put("a", {"sub": "a"}, 100)
+    cache.put("b", {"sub": "b"}, 100)
+    cache.get("a", now=0)
+    cache.put("c", {"sub": "c"}, 100)
+    assert cache.get("b", now=0) is None
+    assert cache.get("a", now=0) and cache.get("c", now=0)
+
+
+def test_discard_forgets_a_token():
+    cache = TokenCache()
+    cache.put("d", {"sub": "admin"}, 100)
+    cache.discard("d")
+    assert cache.get("d", now=0) is None
+
+
+def test_revoked_token_is_rejected_until_pruned():
+    revocations = RevocationList()
+    revocations.revoke_token("d", expires_at=100)
+    assert revocations.is_revoked("d", "admin", issued_at=0)
+    assert not revocations.is_revoked("other", "admin", issued_at=0)
+    revocations.prune(now=100)
+    assert not revocations.is_revoked("d", "admin", issued_at=0)
+
+
+def test_user_cutoff_spares_tokens_issued_after_it():
+    revocations = RevocationList()
+    revocations.revoke_user("admin", revoked_before=50.5, expires_at=100)
+    assert revocations.is_revoked("d", "admin", issued_at=50)
+    # Issued a fraction of a second later, e.g. by logging in again
+    assert not revocations.is_revoked("d", "admin", issued_at=50.6)
+    assert not revocations.is_revoked("d", "editor", issued_at=0)
+
+
+def test_load_merges_entries_and_skips_expired_ones():
+    revocations = RevocationList()
+    revocations.revoke_user("admin", revoked_before=10, expires_at=100)
+    revocations.load([
+        {"id": "live", "kind": "token", "expires_at": 100},
+        {"id": "expired", "kind": "token", "expires_at": 5},
+        # An older cut-off from another instance does not replace a newer one
+        {"id": "user:admin", "kind": "user", "username": "admin", "revoked_before": 5, "expires_at": 100},
+    ], now=10)
+    assert revocations.is_revoked("live", "nobody", issued_at=0)
+    assert not revocations.is_revoked("expired", "nobody", issued_at=0)
+    assert revocations.is_revoked("d", "admin", issued_at=8)
@@ -0,0 +1,109 @@
+"""Bitmap facet counts checked against brute-force counting over the documents"""
+import random
+from collections import Counter
+
+from bitmap_index import BitmapIndex, field_values, popcount
+
+FACETS = {"type": "publication_type", "year": "year", "area": "research_areas"}
+AREAS = ["grid", "storage", "solar", "wind", "markets"]
+
+
+def make_documents(count, seed):
+    rng = random.Random(seed)
+    return [{
+        "id": f"pub-{i}",
+        "publication_type": rng.choice(["journal", "conference", "book", None]),
+        "year": rng.randint(2018, 2024),
+        "research_areas": rng.sample(AREAS, rng.randint(0, 3)),
+    } for i in range(count)]
+
+
+def brute_force(docs, filters):
+    """(count, {facet: {value: count}}) the slow way; a facet's own filter is left out of its counts"""
+    def matching(skip=None):
+        return [
+            doc for doc in docs
+            if all(not wanted or set(field_values(doc.get(FACETS[facet]))) & set(wanted)
+                   for facet, wanted in filters.items() if facet != skip)
+        ]
+    counts = {}
+    for facet, field in FACETS.items():
+        counter = Counter(value for doc in matching(skip=facet) for value in field_values(doc.get(field)))
+        counts[facet] = dict(counter)
+    return len(matching()), counts
+
+
+def check(index, docs, filters):
+    total, expected = brute_force(docs, filters)
+    assert index.count(filters) == total
+    assert {facet: dict(counts) for facet, counts in index.facet_counts(filters).items()} == expected
+
+
+FILTERS = [
+    {},
+    {"type": ["journal"]},
+    {"type": ["journal", "book"], "year": [2020]},
+    {"area": ["grid", "wind"], "year": [2019, 2023]},
+    {"type": ["conference"], "area": ["storage"], "year": [2018, 2021, 2024]},
+    {"type": ["unknown"]},
+]
+
+
+def test_counts_match_brute_force():
+    docs = make_documents(500, seed=1)
+    index = BitmapIndex(FACETS)
+    index.rebuild(docs)
+    for filters in FILTERS:
+        check(index, docs, filters)
+
+
+def test_counts_follow_updates_and_removals():
+    docs = {doc["id"]: doc for doc in make_documents(300, seed=2)}
+    index = BitmapIndex(FACETS)
+    index.rebuild(list(docs.values()))
+    rng = random.Random(3)
+    for i, replacement in enumerate(make_documents(200, seed=4)):
+        doc_id = rng.choice(sorted(docs))
+        if i % 3 == 0:
+            del docs[doc_id]
+            index.remove(doc_id)
+        else:
+            docs[doc_id] = dict(replacement, id=doc_id)
+            index.add(doc_id, docs[doc_id])
+    # New documents reuse the slots freed by removals
+    for doc in make_documents(50, seed=5):
+        doc_id = f"new-{doc['id']}"
+        docs[doc_id] = dict(doc, id=doc_id)
+        index.add(doc_id, docs[doc_id])
+    assert len(index) == len(docs)
+    for filters in FILTERS:
+        check(index, list(docs.values()), filters)
+
+
+def test_rebuild_keeps_writes_made_while_it_ran():
+    docs = make_documents(100, seed=6)
+    index = BitmapIndex(FACETS)
+    index.begin_rebuild()
+    # Written after the rebuild's documents were read
+    index.remove("pub-0")
+    index.add("pub-1", dict(docs[1], publication_type="book"))
+    index.rebuild(docs)
+    current = [dict(docs[1], publication_type="book")] + docs[2:]
+    for filters in FILTERS:
+        check(index, current, filters)
+
+
+def test_limit_keeps_the_most_frequent_values():
+    docs = make_documents(200, seed=7)
+    index = BitmapIndex(FACETS)
+    index.rebuild(docs)
+    top = index.facet_counts({}, limit=2)["area"]
+    full = index.facet_counts({})["area"]
+    assert top == full[:2]
+    assert [count for _, count in full] == sorted((count for _, count in full), reverse=True)
+
+
+def test_popcount():
+    assert popcount(0) == 0
+    assert popcount(0b1011) == 3
+    assert popcount(1 << 200 | 1) == 2
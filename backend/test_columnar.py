@@ -0,0 +1,116 @@
+"""Columnar publication analytics checked against brute-force computation"""
+import random
+from collections import defaultdict
+
+import columnar
+from columnar import PublicationColumns
+
+AUTHORS = ["A. Rahman", "S. Hossain", "M. Ahmed", "N. Islam", "K. Khan"]
+AREAS = ["grid", "storage", "solar", "wind"]
+
+
+def make_documents(count, seed, prefix="pub"):
+    rng = random.Random(seed)
+    return [{
+        "id": f"{prefix}-{i}",
+        "title": f"Paper {i}",
+        # Some without a year, some with a string one, as stored documents have
+        "year": rng.choice([rng.randint(2015, 2024), rng.randint(2015, 2024), None, "2020"]),
+        "citations": rng.choice([rng.randint(0, 40), rng.randint(0, 400), None]),
+        "publication_type": rng.choice(["journal", "conference"]),
+        "authors": rng.sample(AUTHORS, rng.randint(1, 3)),
+        "research_areas": rng.sample(AREAS, rng.randint(0, 2)),
+    } for i in range(count)]
+
+
+def citations(doc):
+    return int(doc.get("citations") or 0)
+
+
+def brute_h_index(docs):
+    ranked = sorted((citations(doc) for doc in docs), reverse=True)
+    return sum(1 for rank, count in enumerate(ranked, start=1) if count >= rank)
+
+
+def brute_per_year(docs):
+    years = defaultdict(lambda: [0, 0])
+    for doc in docs:
+        year = int(doc.get("year") or 0)
+        if year > 0:
+            years[year][0] += 1
+            years[year][1] += citations(doc)
+    return [{"year": year, "publications": count, "citations": total}
+            for year, (count, total) in sorted(years.items())]
+
+
+def brute_per_area(docs):
+    areas = defaultdict(lambda: [0, 0])
+    for doc in docs:
+        for area in doc["research_areas"]:
+            areas[area][0] += 1
+            areas[area][1] += citations(doc)
+    return {area: {"publications": count, "citations": total} for area, (count, total) in areas.items()}
+
+
+def check(columns, docs):
+    assert len(columns) == len(docs)
+    assert columns.h_index() == brute_h_index(docs)
+    for author in AUTHORS + ["Nobody"]:
+        assert columns.h_index(author) == brute_h_index([doc for doc in docs if author in doc["authors"]])
+    assert columns.citations_per_year() == brute_per_year(docs)
+    per_area = columns.citations_per_area()
+    assert {row["research_area"]: {"publications": row["publications"], "citations": row["citations"]}
+            for row in per_area} == brute_per_area(docs)
+    assert [row["citations"] for row in per_area] == sorted((row["citations"] for row in per_area), reverse=True)
+    top = columns.top_cited(limit=10)
+    assert [row["citations"] for row in top] == sorted((citations(doc) for doc in docs), reverse=True)[:10]
+    by_id = {doc["id"]: doc for doc in docs}
+    assert all(row["title"] == by_id[row["id"]]["title"] for row in top)
+
+
+def test_analytics_match_brute_force():
+    docs = make_documents(400, seed=1)
+    columns = PublicationColumns()
+    columns.rebuild(docs)
+    check(columns, docs)
+
+
+def test_analytics_follow_updates_removals_and_compaction(monkeypatch):
+    # A small capacity makes removals trigger compaction during the test
+    monkeypatch.setattr(columnar, "INITIAL_CAPACITY", 16)
+    docs = {doc["id"]: doc for doc in make_documents(200, seed=2)}
+    columns = PublicationColumns()
+    columns.rebuild(list(docs.values()))
+    rng = random.Random(3)
+    for i, replacement in enumerate(make_documents(600, seed=4)):
+        doc_id = rng.choice(sorted(docs))
+        if i % 2 == 0:
+            del docs[doc_id]
+            columns.remove(doc_id)
+        else:
+            docs[doc_id] = dict(replacement, id=doc_id)
+            columns.add(doc_id, docs[doc_id])
+        if len(docs) < 50:
+            for doc in make_documents(50, seed=i, prefix=f"new{i}"):
+                docs[doc["id"]] = doc
+                columns.add(doc["id"], doc)
+    assert len(columns.ids) < 2 * len(docs) + 16 + 1
+    check(columns, list(docs.values()))
+
+
+def test_rebuild_keeps_writes_made_while_it_ran():
+    docs = make_documents(100, seed=5)
+    columns = PublicationColumns()
+    columns.begin_rebuild()
+    columns.remove("pub-0")
+    columns.add("pub-1", dict(docs[1], citations=999))
+    columns.rebuild(docs)
+    check(columns, [dict(docs[1], citations=999)] + docs[2:])
+
+
+def test_empty_columns():
+    columns = PublicationColumns()
+    assert columns.h_index() == 0
+    assert columns.citations_per_year() == []
+    assert columns.citations_per_area() == []
+    assert columns.top_cited() == []
@@ -0,0 +1,53 @@
+"""Regression tests for the news renderer's sanitising"""
+import pytest
+
+from news_render import MATHML_AVAILABLE, derive_news_fields, is_safe_url, sanitize_and_render
+
+needs_mathml = pytest.mark.skipif(not MATHML_AVAILABLE, reason="latex2mathml is not installed")
+
+
+@needs_mathml
+def test_math_text_cannot_inject_markup():
+    html = sanitize_and_render(r"<p>\(\text{&lt;img/src=x/onerror=alert(document.cookie)&gt;}\)</p>")
+    assert "<img" not in html
+    assert "onerror" not in html
+    assert "<mtext>" in html
+
+
+@needs_mathml
+def test_math_href_is_dropped():
+    html = sanitize_and_render(r"<p>\(\href{javascript:alert(1)}{x}\)</p>")
+    assert "javascript:" not in html
+    assert "href" not in html
+    assert "<mi>x</mi>" in html
+
+
+@needs_mathml
+def test_math_keeps_presentation_markup():
+    html = sanitize_and_render(r"<p>\(\frac{a}{\sqrt{b}} \color{red}{x}\)</p>")
+    assert "<mfrac>" in html and "<msqrt>" in html
+    assert 'mathcolor="red"' in html
+
+
+def test_pdf_iframe_needs_allowed_host():
+    assert not is_safe_url("iframe", "https://evil.com/a.pdf")
+    assert not is_safe_url("iframe", "//evil.com/a.pdf")
+    assert is_safe_url("iframe", "/uploads/paper.pdf")
+    assert is_safe_url("iframe", "https://www.youtube.com/embed/abc")
+
+
+def test_pdf_iframe_from_other_host_is_removed():
+    html = sanitize_and_render('<iframe src="https://evil.com/a.pdf"></iframe>')
+    assert "evil.com" not in html
+
+
+def test_derived_excerpt_follows_content():
+    stored = derive_news_fields({"content": "<p>first version</p>"})
+    updated = derive_news_fields({"content": "<p>second version</p>", "excerpt": stored["excerpt"]}, stored)
+    assert updated["excerpt"] == "second version"
+
+
+def test_hand_written_excerpt_is_kept():
+    stored = derive_news_fields({"content": "<p>first version</p>"})
+    updated = derive_news_fields({"content": "<p>second version</p>", "excerpt": "By hand"}, stored)
+    assert "excerpt" not in updated
@@ -0,0 +1,59 @@
+"""Tests for login throttling: token buckets, the concurrency gate and Retry-After"""
+from rate_limit import ConcurrencyGate, TokenBucketLimiter, retry_after_header
+
+
+def test_bucket_allows_a_burst_then_asks_to_wait():
+    limiter = TokenBucketLimiter(capacity=3, refill_per_minute=6)
+    assert [limiter.acquire("ip", now=0) for _ in range(3)] == [0, 0, 0]
+    # Six tokens a minute: the next one is ten seconds away
+    assert limiter.acquire("ip", now=0) == 10
+
+
+def test_bucket_refills_continuously_up_to_capacity():
+    limiter = TokenBucketLimiter(capacity=2, refill_per_minute=60)
+    limiter.acquire("ip", now=0)
+    limiter.acquire("ip", now=0)
+    assert limiter.acquire("ip", now=0.5) == 0.5
+    assert limiter.acquire("ip", now=1.5) == 0
+    # A long pause refills no more than the capacity
+    assert [limiter.acquire("ip", now=100) for _ in range(3)][-1] > 0
+
+
+def test_refused_attempts_do_not_extend_the_wait():
+    limiter = TokenBucketLimiter(capacity=1, refill_per_minute=60)
+    limiter.acquire("ip", now=0)
+    assert limiter.acquire("ip", now=0) == 1
+    assert limiter.acquire("ip", now=0.5) == 0.5
+    assert limiter.acquire("ip", now=1) == 0
+
+
+def test_keys_are_throttled_independently():
+    limiter = TokenBucketLimiter(capacity=1, refill_per_minute=1)
+    assert limiter.acquire("alice", now=0) == 0
+    assert limiter.acquire("alice", now=0) > 0
+    assert limiter.acquire("bob", now=0) == 0
+
+
+def test_evicting_a_bucket_only_forgives_it():
+    limiter = TokenBucketLimiter(capacity=1, refill_per_minute=1, max_keys=2)
+    limiter.acquire("a", now=0)
+    limiter.acquire("b", now=0)
+    limiter.acquire("c", now=0)
+    assert len(limiter) == 2
+    # "a" was least recently used and starts over with a full bucket
+    assert limiter.acquire("a", now=0) == 0
+    assert limiter.acquire("c", now=0) > 0
+
+
+def test_gate_rejects_beyond_its_limit_until_released():
+    gate = ConcurrencyGate(2)
+    assert gate.try_acquire() and gate.try_acquire()
+    assert not gate.try_acquire()
+    gate.release()
+    assert gate.try_acquire()
+
+
+def test_retry_after_is_whole_seconds_and_at_least_one():
+    assert retry_after_header(0.01) == "1"
+    assert retry_after_header(1.2) == "2"
+    assert retry_after_header(30) == "30"
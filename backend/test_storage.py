@@ -0,0 +1,87 @@
+"""Backend parity: memory, SQLite and the fake Firestore answer queries alike"""
+import pytest
+
+import fake_firestore
+from storage import ASCENDING, DESCENDING, DocumentNotFound, FirestoreBackend, MemoryBackend, SQLiteBackend
+
+DOCS = {
+    "a": {"title": "A", "year": 2020, "type": "journal", "tags": ["grid", "solar"], "meta": {"open": True}},
+    "b": {"title": "B", "year": 2022, "type": "conference", "tags": ["wind"]},
+    "c": {"title": "C", "year": 2024, "type": "journal", "tags": []},
+    # No type, year or tags: left out of every filter on them
+    "d": {"title": "D"},
+}
+
+
+@pytest.fixture(params=["memory", "sqlite", "firestore"])
+def storage(request, tmp_path):
+    if request.param == "memory":
+        backend = MemoryBackend({})
+    elif request.param == "sqlite":
+        backend = SQLiteBackend(str(tmp_path / "parity.sqlite3"))
+    else:
+        backend = FirestoreBackend(fake_firestore.Client())
+    for doc_id, doc in DOCS.items():
+        backend.set("publications", doc_id, dict(doc))
+    return backend
+
+
+def ids(docs):
+    return sorted(doc["id"] for doc in docs)
+
+
+@pytest.mark.parametrize("filters, expected", [
+    ([("type", "==", "journal")], ["a", "c"]),
+    ([("type", "!=", "journal")], ["b"]),
+    ([("year", ">", 2020)], ["b", "c"]),
+    ([("year", "<=", 2022)], ["a", "b"]),
+    ([("type", "in", ["conference", "book"])], ["b"]),
+    ([("type", "not-in", ["conference"])], ["a", "c"]),
+    ([("tags", "array_contains", "grid")], ["a"]),
+    ([("tags", "array-contains-any", ["wind", "solar"])], ["a", "b"]),
+    ([("type", "==", "journal"), ("year", ">=", 2021)], ["c"]),
+    ([("meta.open", "==", True)], ["a"]),
+])
+def test_filters(storage, filters, expected):
+    assert ids(storage.query("publications", filters=filters)) == expected
+
+
+def test_order_leaves_out_documents_without_the_field(storage):
+    docs = storage.query("publications", order_by=("year", DESCENDING))
+    assert [doc["id"] for doc in docs] == ["c", "b", "a"]
+    docs = storage.query("publications", order_by=("year", ASCENDING), limit=2)
+    assert [doc["id"] for doc in docs] == ["a", "b"]
+
+
+def test_fields_projects_documents(storage):
+    docs = storage.query("publications", filters=[("year", "==", 2020)], fields=["title"])
+    assert docs == [{"id": "a", "title": "A"}]
+
+
+def test_update_moves_body_fields_out_of_the_summary(storage):
+    storage.set("news", "n", {"title": "Old", "content": "inline"})
+    updated = storage.update("news", "n", {"title": "New"}, body={"content": "body"})
+    assert updated["title"] == "New" and "content" not in updated
+    assert storage.get("news", "n") == {"id": "n", "title": "New"}
+    assert storage.get_body("news", "n")["content"] == "body"
+
+
+def test_update_merges_into_a_document_already_read(storage):
+    current = storage.get("publications", "a")
+    updated = storage.update("publications", "a", {"title": "A2"}, current=current)
+    assert updated == dict(current, title="A2")
+    assert storage.get("publications", "a")["title"] == "A2"
+
+
+def test_update_of_a_missing_document_raises(storage):
+    with pytest.raises(DocumentNotFound):
+        storage.update("publications", "missing", {"title": "X"})
+
+
+def test_create_only_if_absent_and_delete(storage):
+    assert not storage.create("publications", "a", {"title": "Other"})
+    assert storage.get("publications", "a")["title"] == "A"
+    assert storage.create("publications", "e", {"title": "E"})
+    assert storage.delete("publications", "e")
+    assert not storage.delete("publications", "e")
+    assert storage.get("publications", "e") is None
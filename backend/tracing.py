@@ -0,0 +1,257 @@
+"""Lightweight in-process tracing.
+
+Spans nest through a context variable, so code only has to wrap a stage in
+``with span("name"):`` to appear under the current request's trace. Finished
+traces go to pluggable exporters and a buffer of the slowest N traces.
+Outside a traced request ``span`` does nothing.
+"""
+import functools
+import heapq
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+SERVICE_NAME = "sesgrg-api"
+
+logger = logging.getLogger("sesgrg.tracing")
+
+current_span = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace, name, parent_id, attributes):
+        self.trace = trace
+        self.name = name
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = attributes
+        self.error = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration_ms(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+
+class Trace:
+    def __init__(self, trace_id=None):
+        self.trace_id = trace_id or os.urandom(16).hex()
+        self.spans = []
+        self.root = None
+
+    @property
+    def duration_ms(self):
+        return self.root.duration_ms if self.root else 0.0
+
+    def to_dict(self):
+        start = self.root.start_ns if self.root else 0
+        return {
+            "trace_id": self.trace_id,
+            "name": self.root.name if self.root else None,
+            "duration_ms": round(self.duration_ms, 3),
+            "spans": [{
+                "name": s.name,
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "offset_ms": round((s.start_ns - start) / 1e6, 3),
+                "duration_ms": round(s.duration_ms, 3),
+                "attributes": s.attributes,
+                "error": s.error,
+            } for s in self.spans],
+        }
+
+
+class Tracer:
+    """Collects finished traces into the slowest-N buffer and the exporters"""
+
+    def __init__(self, keep_slowest=50, exporters=()):
+        self.keep_slowest = keep_slowest
+        self.exporters = list(exporters)
+        self._slowest = []  # min-heap of (duration, sequence, trace)
+        self._sequence = 0
+        self._lock = threading.Lock()
+
+    def finish(self, trace):
+        with self._lock:
+            self._sequence += 1
+            entry = (trace.duration_ms, self._sequence, trace)
+            if len(self._slowest) < self.keep_slowest:
+                heapq.heappush(self._slowest, entry)
+            elif entry[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+        for exporter in self.exporters:
+            exporter.export(trace)
+
+    def slowest(self, limit=None):
+        with self._lock:
+            entries = sorted(self._slowest, reverse=True)
+        return [trace for _, _, trace in entries[:limit]]
+
+    def clear(self):
+        with self._lock:
+            self._slowest = []
+
+    @contextmanager
+    def start_trace(self, name, trace_id=None, **attributes):
+        """Open the root span of a new trace and hand the finished trace to finish()"""
+        trace = Trace(trace_id)
+        root = Span(trace, name, None, attributes)
+        trace.root = root
+        trace.spans.append(root)
+        token = current_span.set(root)
+        try:
+            yield root
+        except Exception as e:
+            root.error = repr(e)
+            raise
+        finally:
+            root.end_ns = time.time_ns()
+            current_span.reset(token)
+            self.finish(trace)
+
+
+@contextmanager
+def span(name, **attributes):
+    """Time a stage of the current trace; a no-op when no trace is active"""
+    parent = current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    parent.trace.spans.append(child)
+    token = current_span.set(child)
+    try:
+        yield child
+    except Exception as e:
+        child.error = repr(e)
+        raise
+    finally:
+        child.end_ns = time.time_ns()
+        current_span.reset(token)
+
+
+def traced(name, *arg_names):
+    """Decorator wrapping a function in a span; ``arg_names`` label its leading positional args"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(name, **dict(zip(arg_names, args))):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def otlp_attributes(attributes):
+    result = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        result.append({"key": key, "value": typed})
+    return result
+
+
+def to_otlp(trace):
+    """A finished trace as an OTLP/JSON ExportTraceServiceRequest"""
+    spans = []
+    for s in trace.spans:
+        otlp_span = {
+            "traceId": trace.trace_id,
+            "spanId": s.span_id,
+            "name": s.name,
+            "kind": 2 if s.parent_id is None else 1,  # SERVER for the root, INTERNAL otherwise
+            "startTimeUnixNano": str(s.start_ns),
+            "endTimeUnixNano": str(s.end_ns or s.start_ns),
+            "attributes": otlp_attributes(s.attributes),
+            "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+        }
+        if s.parent_id:
+            otlp_span["parentSpanId"] = s.parent_id
+        spans.append(otlp_span)
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": otlp_attributes({"service.name": SERVICE_NAME})},
+            "scopeSpans": [{"scope": {"name": "sesgrg.tracing"}, "spans": spans}],
+        }]
+    }
+
+
+class OTLPFileExporter:
+    """Append each trace as one line of OTLP/JSON, written from a background thread"""
+
+    def __init__(self, path):
+        self.path = path
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, trace):
+        self._queue.put(trace)
+
+    def _run(self):
+        while True:
+            trace = self._queue.get()
+            try:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(to_otlp(trace), default=str) + "\n")
+            except OSError:
+                logger.exception("Error exporting trace")
+
+
+class TracingMiddleware:
+    """ASGI middleware opening a root span per request, continuing a W3C traceparent if sent"""
+
+    def __init__(self, app, tracer, exclude_paths=()):
+        self.app = app
+        self.tracer = tracer
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        trace_id = None
+        for name, value in scope.get("headers", []):
+            if name == b"traceparent":
+                parts = value.decode("latin-1").split("-")
+                if len(parts) == 4 and len(parts[1]) == 32:
+                    trace_id = parts[1]
+                break
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        with self.tracer.start_trace(f"{scope['method']} {scope['path']}", trace_id,
+                                     **{"http.method": scope["method"], "http.target": scope["path"]}) as root:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    root.name = f"{scope['method']} {route}"
+                    root.set("http.route", route)
+                root.set("http.status_code", status_code)
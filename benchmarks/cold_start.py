@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""Cold-start measurement for the serverless deployment.
+
+vercel.json serves /api/* from backend/server.py on the python3.9 runtime,
+so every cold start pays for interpreter start-up, importing the app and
+initialising the Firestore client before the first response. This harness
+repeatedly launches a fresh interpreter the way the runtime does, imports
+the app, serves one request through the ASGI interface and records:
+
+* interpreter start-up, app import and first-response time,
+* Firestore client creation (server.startup_timings),
+* import time per top-level package, parsed from ``-X importtime``.
+
+Runs are summarised by their median, appended to a history file, and
+compared with recent runs; the script exits with status 1 when total
+cold-start time regresses by more than the tolerance.
+
+Usage:
+    python benchmarks/cold_start.py --runs 10
+    python benchmarks/cold_start.py --python python3.9 --no-bytecode-cache
+    FIRESTORE_BACKEND=fake python benchmarks/cold_start.py --path "/api/news?summary=true"
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "backend")
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history", "cold_start.jsonl")
+STAGES = ("interpreter_ms", "import_ms", "firestore_client_ms", "first_request_ms", "total_ms")
+
+# Runs in the fresh interpreter; kept to the standard library so the
+# harness adds no imports of its own. The request goes straight to the ASGI
+# app, as the serverless runtime calls it, without lifespan events.
+CHILD = r"""
+import asyncio, json, os, sys, time
+started = time.time()
+import server
+imported = time.time()
+
+async def first_request(path):
+    path, _, query = path.partition("?")
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "https", "path": path, "raw_path": path.encode(), "query_string": query.encode(),
+             "root_path": "", "headers": [(b"host", b"localhost")], "client": ("127.0.0.1", 0),
+             "server": ("localhost", 443)}
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await server.app(scope, receive, send)
+    return status[0] if status else None
+
+status = asyncio.run(first_request(os.environ["COLD_START_PATH"]))
+finished = time.time()
+launched = float(os.environ["COLD_START_LAUNCHED"])
+print(json.dumps({
+    "interpreter_ms": (started - launched) * 1000,
+    "import_ms": (imported - started) * 1000,
+    "firestore_client_ms": server.startup_timings.get("firestore_client_ms"),
+    "first_request_ms": (finished - imported) * 1000,
+    "total_ms": (finished - launched) * 1000,
+    "status": status,
+}))
+"""
+
+
+def parse_importtime(stderr):
+    """{top-level package: self import time in ms} from ``-X importtime`` output"""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # the header line
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1000
+    return packages
+
+
+def run_once(python, path, bytecode_cache):
+    env = dict(os.environ, COLD_START_PATH=path, LOG_LEVEL=os.getenv("LOG_LEVEL", "WARNING"))
+    cache_dir = None
+    if not bytecode_cache:
+        # A fresh cache directory forces every module to compile from source
+        cache_dir = tempfile.TemporaryDirectory()
+        env["PYTHONPYCACHEPREFIX"] = cache_dir.name
+    env["COLD_START_LAUNCHED"] = repr(time.time())
+    try:
+        process = subprocess.run([python, "-X", "importtime", "-c", CHILD], cwd=BACKEND_DIR, env=env,
+                                 capture_output=True, text=True)
+    finally:
+        if cache_dir is not None:
+            cache_dir.cleanup()
+    if process.returncode != 0:
+        raise RuntimeError(f"Cold start failed:\n{process.stderr[-3000:]}")
+    # The app prints start-up messages; the measurements are the last line
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result["packages"] = parse_importtime(process.stderr)
+    return result
+
+
+def median_or_none(values):
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 2) if values else None
+
+
+def summarise(runs, top):
+    summary = {stage: median_or_none([run[stage] for run in runs]) for stage in STAGES}
+    packages = {}
+    for run in runs:
+        for package, ms in run["packages"].items():
+            packages.setdefault(package, []).append(ms)
+    medians = {package: round(statistics.median(values + [0.0] * (len(runs) - len(values))), 2)
+               for package, values in packages.items()}
+    summary["packages"] = dict(sorted(medians.items(), key=lambda item: item[1], reverse=True)[:top])
+    summary["statuses"] = sorted({run["status"] for run in runs})
+    return summary
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def key_of(run):
+    """Runs are only comparable with the same interpreter, request and cache mode"""
+    return (run["python"], run["path"], run["bytecode_cache"])
+
+
+def print_report(summary, history_summary):
+    print(f"\n{'stage':<22} {'median ms':>10} {'history':>10}")
+    print("-" * 44)
+    for stage in STAGES:
+        previous = history_summary.get(stage)
+        value = summary[stage]
+        print(f"{stage:<22} {value if value is not None else '-':>10} {previous if previous is not None else '-':>10}")
+    print(f"\n{'package (self import time)':<32} {'median ms':>10}")
+    print("-" * 44)
+    for package, ms in summary["packages"].items():
+        print(f"{package:<32} {ms:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--python", default=sys.executable, help="interpreter to launch (Vercel uses python3.9)")
+    parser.add_argument("--path", default="/api/health", help="first request path, with an optional query string")
+    parser.add_argument("--no-bytecode-cache", action="store_true",
+                        help="compile every module from source, as on the first start of a deployment")
+    parser.add_argument("--top", type=int, default=15, help="packages listed in the import breakdown")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative slowdown of median total time that fails the run")
+    parser.add_argument("--window", type=int, default=5, help="recent runs the comparison uses")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--no-history", action="store_true", help="neither compare with nor record to history")
+    args = parser.parse_args()
+
+    python_version = subprocess.run([args.python, "-c", "import platform; print(platform.python_version())"],
+                                    capture_output=True, text=True, check=True).stdout.strip()
+    if not python_version.startswith("3.9"):
+        print(f"⚠️  Measuring Python {python_version}; the deployment runs python3.9 (see --python)")
+
+    # One untimed launch warms the OS file cache, as a warm container would have
+    run_once(args.python, args.path, bytecode_cache=True)
+    runs = []
+    for i in range(args.runs):
+        run = run_once(args.python, args.path, not args.no_bytecode_cache)
+        runs.append(run)
+        print(f"  run {i + 1}: total {run['total_ms']:.0f} ms (import {run['import_ms']:.0f} ms, "
+              f"first request {run['first_request_ms']:.0f} ms, status {run['status']})", flush=True)
+    summary = summarise(runs, args.top)
+
+    record = {
+        "created_at": datetime.utcnow().isoformat(),
+        "commit": git_commit(),
+        "python": python_version,
+        "platform": platform.platform(),
+        "path": args.path,
+        "bytecode_cache": not args.no_bytecode_cache,
+        "runs": args.runs,
+        "summary": summary,
+    }
+    history = [] if args.no_history else [
+        run for run in load_history(args.history) if run["passed"] and key_of(run) == key_of(record)
+    ][-args.window:]
+    history_summary = {stage: median_or_none([run["summary"][stage] for run in history]) for stage in STAGES}
+    print_report(summary, history_summary)
+
+    failed = False
+    previous_total = history_summary["total_ms"]
+    if previous_total:
+        change = summary["total_ms"] / previous_total - 1
+        print(f"\nTotal cold start {change:+.0%} against the median of {len(history)} recent runs")
+        failed = change > args.tolerance
+
+    if not args.no_history:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps(dict(record, passed=not failed)) + "\n")
+
+    if failed:
+        print(f"❌ Cold start regressed by more than {args.tolerance:.0%}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
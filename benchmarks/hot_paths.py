@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the data-conversion and filtering hot paths in server.py.
+
+Each benchmark runs the real function from backend/server.py over seeded
+synthetic datasets of 100 to 100k documents. Results can be stored as a
+named baseline and later runs compared against it, so an optimisation (or a
+regression) shows up as a per-benchmark change. The suite runs in several
+interleaved rounds, and only a change larger than the tolerance that every
+round agrees on is reported as a regression.
+
+Usage:
+    python benchmarks/hot_paths.py                          # run and print
+    python benchmarks/hot_paths.py --save-baseline main     # store results
+    python benchmarks/hot_paths.py --compare main           # compare to a baseline
+    python benchmarks/hot_paths.py --sizes 100,1000 --only publications
+"""
+import argparse
+import copy
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import server  # noqa: E402
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+
+WORDS = ["smart", "grid", "renewable", "energy", "storage", "solar", "wind", "power", "system", "control",
+         "optimal", "forecasting", "microgrid", "battery", "demand", "response", "market", "stability"]
+AREAS = ["Smart Grid Technologies", "Microgrids & Distributed Energy Systems", "Renewable Energy Integration",
+         "Grid Optimization & Stability", "Energy Storage Systems", "Power System Automation",
+         "Cybersecurity and AI for Power Infrastructure"]
+NAMES = ["Rahman", "Hossain", "Ahmed", "Islam", "Chowdhury", "Khan", "Karim", "Siddique", "Hasan", "Akter"]
+EPOCH = datetime(2015, 1, 1)
+
+
+def title(rng):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 12))).capitalize()
+
+
+def make_publications(n, rng):
+    return [{
+        "id": f"pub-{i}",
+        "title": title(rng),
+        "authors": [f"{rng.choice('ABCDEFGHKMNRS')}. {rng.choice(NAMES)}" for _ in range(rng.randint(2, 6))],
+        "research_areas": rng.sample(AREAS, rng.randint(1, 3)),
+        "year": rng.randint(2015, 2025),
+        "citations": rng.randint(0, 300),
+        "publication_type": rng.choice(["journal", "conference", "book"]),
+    } for i in range(n)]
+
+
+def make_firestore_docs(n, rng):
+    """Documents as Firestore returns them: a mix of datetime and plain fields"""
+    docs = []
+    for i in range(n):
+        created = EPOCH + timedelta(minutes=rng.randint(0, 5_000_000))
+        docs.append({
+            "id": f"doc-{i}",
+            "title": title(rng),
+            "category": rng.choice(["news", "events", "upcoming_events"]),
+            "is_featured": rng.random() < 0.1,
+            "tags": rng.sample(WORDS, 3),
+            "published_date": created,
+            "created_at": created,
+            "updated_at": created + timedelta(days=rng.randint(0, 30)),
+        })
+    return docs
+
+
+def make_write_payloads(n, rng):
+    """Write payloads as handlers pass them to add_document: ISO strings and free text"""
+    payloads = []
+    for _ in range(n):
+        when = EPOCH + timedelta(minutes=rng.randint(0, 5_000_000))
+        payloads.append({
+            "title": title(rng),
+            "excerpt": "Update: " + title(rng) + " at 10:30",
+            "author": rng.choice(NAMES),
+            "published_date": when.isoformat() + "Z",
+            "image": "https://example.org/images/photo.jpg",
+            "google_calendar_link": "https://calendar.google.com/event?eid=ABC:DEF",
+        })
+    return payloads
+
+
+def make_events(n, rng):
+    return [{
+        "id": f"event-{i}",
+        "title": title(rng),
+        "date": (EPOCH + timedelta(days=rng.randint(0, 5000), hours=rng.randint(0, 23))).isoformat(),
+        "location": "Dhaka",
+    } for i in range(n)]
+
+
+def convert_timestamps(docs):
+    for doc in docs:
+        server.timestamps_to_iso(doc)
+
+
+def parse_write_payloads(payloads):
+    for payload in payloads:
+        server.parse_iso_strings(payload)
+
+
+# name -> (dataset factory, prepare(dataset) run before every timed call, timed function)
+BENCHMARKS = {
+    "timestamps_to_iso": (make_firestore_docs, copy.deepcopy, convert_timestamps),
+    "parse_iso_strings": (make_write_payloads, copy.deepcopy, parse_write_payloads),
+    "publications_search": (make_publications, None, lambda pubs: server.filter_publications(pubs, search="grid")),
+    "publications_research_area": (
+        make_publications, None, lambda pubs: server.filter_publications(pubs, research_area=AREAS[0])),
+    "publications_area_and_search": (
+        make_publications, None, lambda pubs: server.filter_publications(pubs, AREAS[1], "storage")),
+    "events_upcoming": (make_events, None, lambda events: server.filter_upcoming_events(events, datetime(2022, 1, 1))),
+    "jsonable_encoder_publications": (make_publications, None, jsonable_encoder),
+    "json_render_publications": (make_publications, None, lambda pubs: server.TracedJSONResponse(pubs).body),
+}
+
+
+def run_benchmark(name, size, repeats, seed):
+    factory, prepare, func = BENCHMARKS[name]
+    dataset = factory(size, random.Random(seed))
+    # One untimed call warms caches and the allocator
+    func(prepare(dataset) if prepare else dataset)
+    timings = []
+    for _ in range(repeats):
+        data = prepare(dataset) if prepare else dataset
+        # As timeit does, keep garbage collection out of the measurement
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            func(data)
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    median = statistics.median(timings)
+    return {
+        "benchmark": name,
+        "size": size,
+        "repeats": repeats,
+        "min_ms": round(min(timings) * 1000, 4),
+        "median_ms": round(median * 1000, 4),
+        "ns_per_doc": round(median * 1e9 / size, 1),
+    }
+
+
+def repeats_for(size):
+    # Keep each benchmark to a few seconds at the largest size
+    return max(5, min(200, 200_000 // size))
+
+
+def run_all(names, sizes, seed, rounds):
+    """Run every benchmark ``rounds`` times, interleaved, and merge the rounds.
+
+    Each result keeps the fastest time of every round in ``round_min_ms``,
+    so a comparison can tell a real slowdown from one noisy round.
+    """
+    runs = {}
+    for round_number in range(rounds):
+        print(f"Round {round_number + 1}/{rounds}", flush=True)
+        for name in names:
+            for size in sizes:
+                result = run_benchmark(name, size, repeats_for(size), seed)
+                runs.setdefault((name, size), []).append(result)
+                print(f"  {name:<32} n={size:<7} median {result['median_ms']:>10.3f} ms  "
+                      f"{result['ns_per_doc']:>9.1f} ns/doc", flush=True)
+    results = []
+    for (name, size), round_results in runs.items():
+        median = statistics.median(r["median_ms"] for r in round_results)
+        results.append({
+            "benchmark": name,
+            "size": size,
+            "repeats": sum(r["repeats"] for r in round_results),
+            "min_ms": min(r["min_ms"] for r in round_results),
+            "median_ms": round(median, 4),
+            "ns_per_doc": round(median * 1e6 / size, 1),
+            "round_min_ms": [r["min_ms"] for r in round_results],
+        })
+    return results
+
+
+def baseline_path(name):
+    return os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name, results):
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    with open(baseline_path(name), "w") as f:
+        json.dump({
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "results": results,
+        }, f, indent=2)
+
+
+def compare(baseline, results, tolerance):
+    """Print a comparison table; returns the list of regressions beyond ``tolerance``.
+
+    Each side is the median of its per-round fastest runs; on a shared
+    machine the minimum is far less noisy than the median. A change only
+    counts when it exceeds ``tolerance`` and the two sides' rounds do not
+    overlap, i.e. every current round is slower (or faster) than every
+    baseline round. Baselines saved before rounds existed count as one round.
+    """
+    previous = {(r["benchmark"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nComparison with baseline from {baseline['created_at']} (Python {baseline['python']})")
+    header = f"{'benchmark':<32} {'size':>7} {'baseline min':>12} {'current min':>12} {'change':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        current_rounds = result["round_min_ms"]
+        current = statistics.median(current_rounds)
+        old = previous.get((result["benchmark"], result["size"]))
+        if old is None:
+            print(f"{result['benchmark']:<32} {result['size']:>7} {'-':>12} {current:>12.3f}")
+            continue
+        old_rounds = old.get("round_min_ms") or [old["min_ms"]]
+        reference = statistics.median(old_rounds)
+        change = current / reference - 1 if reference else 0.0
+        marker = ""
+        if change > tolerance:
+            if min(current_rounds) > max(old_rounds):
+                marker = "  REGRESSION"
+                regressions.append(result)
+            else:
+                marker = "  slower (within noise)"
+        elif change < -tolerance:
+            marker = "  faster" if max(current_rounds) < min(old_rounds) else "  faster (within noise)"
+        print(f"{result['benchmark']:<32} {result['size']:>7} {reference:>12.3f} "
+              f"{current:>12.3f} {change:>+8.1%}{marker}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--only", help="comma-separated substrings selecting benchmarks")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="times the whole suite is run; results use the median of each round's fastest run")
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="relative slowdown reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--json", help="also write raw results to this file")
+    args = parser.parse_args()
+
+    names = list(BENCHMARKS)
+    if args.only:
+        patterns = args.only.split(",")
+        names = [name for name in names if any(pattern in name for pattern in patterns)]
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    print(f"Running {len(names)} benchmarks at sizes {sizes} (seed {args.seed}, {args.rounds} rounds)")
+    results = run_all(names, sizes, args.seed, max(1, args.rounds))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results)
+        print(f"\n✅ Baseline saved to {baseline_path(args.save_baseline)}")
+    if args.compare:
+        with open(baseline_path(args.compare)) as f:
+            regressions = compare(json.load(f), results, args.tolerance)
+        if regressions and args.fail_on_regression:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
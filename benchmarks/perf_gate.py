@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Performance regression gate: per-endpoint latency and Firestore read budgets.
+
+Runs the real FastAPI app in-process against the fake Firestore client
+seeded with a generated dataset (generate_scale_data.py), requests each
+budgeted endpoint repeatedly and checks:
+
+* p95 latency against the endpoint's absolute budget,
+* Firestore reads per request (from the x-firestore-reads header) against
+  its read budget,
+* p95 against the median of recent runs in the history file, failing when
+  it is slower by more than the tolerance.
+
+Every run is appended to the history file (benchmarks/history/, untracked),
+so trends can be tracked across commits on one machine. Exits with status 1
+when any check fails.
+
+Usage:
+    python benchmarks/perf_gate.py                      # full gate at 10k news/publications
+    python benchmarks/perf_gate.py --scale small --no-history
+    python benchmarks/perf_gate.py --tolerance 0.25 --only news
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "backend"))
+sys.path.insert(0, ROOT)
+# Configure the backend before it is imported: the Firestore code paths on the
+# fake client, whatever STORAGE_BACKEND the environment selects, so the gate
+# can count reads and never seeds a persistent store
+os.environ["STORAGE_BACKEND"] = "firestore"
+os.environ["FIRESTORE_BACKEND"] = "fake"
+os.environ.pop("FAKE_FIRESTORE_DATA", None)
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+os.environ.setdefault("LOGIN_IP_BURST", "1000000")
+
+import fake_firestore  # noqa: E402
+import generate_scale_data  # noqa: E402
+import server  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history", "perf_gate.jsonl")
+GATE_SCALE = "publications=10000,news=10000,events=1000,people=200"
+GATE_PUBLICATIONS = 10000
+
+# Budgets apply to the GATE_SCALE dataset on the fake with no simulated
+# latency, so they measure the backend's own work; latency budgets leave
+# about 1.5x headroom over a development laptop. max_reads is per request;
+# the full publication listing reads every publication and nothing else.
+BUDGETS = [
+    {"name": "news_list_summary", "path": "/api/news", "params": {"summary": "true", "limit": 10},
+     "p95_ms": 300, "max_reads": 10},
+    {"name": "news_list_full", "path": "/api/news", "params": {"limit": 50}, "p95_ms": 300, "max_reads": 50},
+    {"name": "news_detail", "path": "/api/news/{news_id}", "p95_ms": 25, "max_reads": 2},
+    {"name": "publications_all", "path": "/api/publications", "p95_ms": 3000, "max_reads": GATE_PUBLICATIONS},
+    {"name": "publications_search", "path": "/api/publications", "params": {"search": "grid"},
+     "p95_ms": 2000, "max_reads": GATE_PUBLICATIONS},
+    {"name": "publications_facets", "path": "/api/publications/facets",
+     "params": {"year": 2020, "publication_type": "journal"}, "p95_ms": 20, "max_reads": 0},
+    {"name": "publications_analytics", "path": "/api/publications/analytics/citations-per-area",
+     "p95_ms": 20, "max_reads": 0},
+    {"name": "events_upcoming", "path": "/api/events", "params": {"upcoming": "true"},
+     "p95_ms": 200, "max_reads": 1000},
+    {"name": "people", "path": "/api/people", "p95_ms": 60, "max_reads": 200},
+    {"name": "settings", "path": "/api/settings", "p95_ms": 10, "max_reads": 1},
+    {"name": "dashboard_stats", "path": "/api/dashboard/stats", "auth": True, "p95_ms": 400, "max_reads": 40},
+]
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed_backend(scale, seed):
+    counts = generate_scale_data.resolve_counts(
+        scale if scale in generate_scale_data.PRESETS else None,
+        None if scale in generate_scale_data.PRESETS else scale,
+    )
+    if not isinstance(server.db, fake_firestore.Client):
+        raise SystemExit("perf_gate.py only seeds the fake Firestore client")
+    server.db.clear()
+    generator = generate_scale_data.DatasetGenerator(seed)
+    generate_scale_data.populate_firestore(server.db, generator.generate(counts))
+    return counts
+
+
+def measure(client, budget, headers, state, requests):
+    path = budget["path"].format(**state)
+    kwargs = {"params": budget.get("params"), "headers": headers if budget.get("auth") else None}
+    # The first request warms caches and lazy initialisation
+    client.get(path, **kwargs).raise_for_status()
+    timings = []
+    reads = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(path, **kwargs)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+        reads.append(int(response.headers.get("x-firestore-reads", 0)))
+    timings.sort()
+    return {
+        "name": budget["name"],
+        "requests": requests,
+        "p50_ms": round(percentile(timings, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+        "max_ms": round(timings[-1] * 1000, 3),
+        "reads": max(reads),
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def reference_p95(history, name, scale, window):
+    """Median p95 of ``name`` over the last ``window`` passing runs at the same scale"""
+    # Failed runs are recorded but never become the reference
+    values = [result["p95_ms"] for run in history if run["scale"] == scale and run["passed"]
+              for result in run["results"] if result["name"] == name]
+    values = values[-window:]
+    return statistics.median(values) if values else None
+
+
+def check(results, budgets, history, scale, tolerance, window):
+    """Print the report; returns a list of failure messages"""
+    failures = []
+    header = (f"{'endpoint':<22} {'p50 ms':>9} {'p95 ms':>9} {'budget':>8} {'history':>9} {'change':>8} "
+              f"{'reads':>6} {'max':>6}")
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        budget = budgets[result["name"]]
+        reference = reference_p95(history, result["name"], scale, window)
+        change = result["p95_ms"] / reference - 1 if reference else None
+        notes = []
+        if result["p95_ms"] > budget["p95_ms"]:
+            notes.append("over latency budget")
+            failures.append(f"{result['name']}: p95 {result['p95_ms']:.1f} ms > budget {budget['p95_ms']} ms")
+        if result["reads"] > budget["max_reads"]:
+            notes.append("over read budget")
+            failures.append(f"{result['name']}: {result['reads']} reads > budget {budget['max_reads']}")
+        if change is not None and change > tolerance:
+            notes.append("REGRESSION")
+            failures.append(f"{result['name']}: p95 {change:+.0%} against recent median {reference:.1f} ms")
+        print(f"{result['name']:<22} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {budget['p95_ms']:>8} "
+              f"{reference if reference is not None else '-':>9} "
+              f"{format(change, '+.0%') if change is not None else '-':>8} "
+              f"{result['reads']:>6} {budget['max_reads']:>6}  {', '.join(notes)}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default=GATE_SCALE,
+                        help="a generate_scale_data.py preset or per-collection counts (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--requests", type=int, default=20, help="timed requests per endpoint")
+    parser.add_argument("--only", help="comma-separated substrings selecting budgets")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="relative p95 slowdown against recent runs that fails the gate")
+    parser.add_argument("--window", type=int, default=5, help="recent runs the comparison uses")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--no-history", action="store_true", help="neither compare with nor record to history")
+    args = parser.parse_args()
+
+    budgets = BUDGETS
+    if args.only:
+        patterns = args.only.split(",")
+        budgets = [b for b in budgets if any(pattern in b["name"] for pattern in patterns)]
+    # Absolute budgets are calibrated for the gate dataset only
+    if args.scale != GATE_SCALE:
+        budgets = [dict(b, p95_ms=float("inf"), max_reads=float("inf")) for b in budgets]
+
+    start = time.perf_counter()
+    counts = seed_backend(args.scale, args.seed)
+    print(f"Seeded {sum(counts.values())} documents in {time.perf_counter() - start:.1f} s ({args.scale})")
+
+    client = TestClient(server.app)
+    token = client.post("/api/auth/login", json={
+        "username": os.getenv("ADMIN_USERNAME", "admin"),
+        "password": os.getenv("ADMIN_PASSWORD", "@dminsesg705"),
+    }).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    news = client.get("/api/news", params={"summary": "true", "limit": 1}).json()
+    state = {"news_id": news[0]["id"] if news else "missing"}
+
+    results = [measure(client, budget, headers, state, args.requests) for budget in budgets]
+    history = [] if args.no_history else load_history(args.history)
+    failures = check(results, {b["name"]: b for b in budgets}, history, args.scale, args.tolerance, args.window)
+
+    if not args.no_history:
+        os.makedirs(os.path.dirname(args.history), exist_ok=True)
+        with open(args.history, "a") as f:
+            f.write(json.dumps({
+                "created_at": datetime.utcnow().isoformat(),
+                "commit": git_commit(),
+                "python": platform.python_version(),
+                "scale": args.scale,
+                "passed": not failures,
+                "results": results,
+            }) + "\n")
+
+    if failures:
+        print("\n❌ Performance gate failed:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+    print("\n✅ All endpoints within budget")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
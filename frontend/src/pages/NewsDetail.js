@@ -19,6 +19,8 @@ import {
   Eye
 } from 'lucide-react';
 import { toast } from 'react-toastify';
+import { doc, getDoc } from 'firebase/firestore';
+import { db } from '../firebase';
 import { useData } from '../contexts/DataContext';
 import LoadingSpinner from '../components/LoadingSpinner';
 import ProfessionalContentRenderer from '../components/ProfessionalContentRenderer';
@@ -66,6 +68,14 @@ const NewsDetail = () => {
         return;
       }
       
+      // Migrated articles keep their body in news/{id}/body/content
+      if (!item.content) {
+        const bodyDoc = await getDoc(doc(db, 'news', String(item.id), 'body', 'content'));
+        if (bodyDoc.exists()) {
+          item = { ...item, ...bodyDoc.data() };
+        }
+      }
+      
       setNewsItem(item);
       
       // Load related articles (same category or similar tags)
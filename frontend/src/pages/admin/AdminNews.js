@@ -2,6 +2,8 @@ import React, { useState, useEffect, useMemo, useCallback } from 'react';
 import { Plus, Search, Edit2, Trash2, Calendar } from 'lucide-react';
 import { toast } from 'react-toastify';
 import { useData } from '../../contexts/DataContext';
+import { doc, getDoc } from 'firebase/firestore';
+import { db } from '../../firebase';
 import ReactQuill from 'react-quill';
 import 'react-quill/dist/quill.snow.css';
 import 'katex/dist/katex.min.css';
@@ -317,7 +319,20 @@ const AdminNews = () => {
     }
   };
 
-  const handleEdit = (item) => {
+  const handleEdit = async (item) => {
+    // Migrated articles keep their body in news/{id}/body/content
+    if (!item.content) {
+      try {
+        const bodyDoc = await getDoc(doc(db, 'news', String(item.id), 'body', 'content'));
+        if (bodyDoc.exists()) {
+          item = { ...item, ...bodyDoc.data() };
+        }
+      } catch (error) {
+        console.error('Error loading news body:', error);
+        toast.error('Failed to load news content');
+        return;
+      }
+    }
     setEditingItem(item);
     setFormData({
       title: item.title || '',
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""Generate a seeded, realistic SESGRG dataset at a chosen scale.
+
+Produces publications (skewed author and keyword distributions, citations
+growing with age), news with multi-KB rich text (rendered and split into
+summary and body documents exactly as the API stores them), events spread
+over the years, and people with photos. The same seed always produces the
+same dataset, so scaling measurements are reproducible.
+
+Documents are written with batched writes into Firestore, or into the fake
+client and saved as a JSON file for FIRESTORE_BACKEND=fake. populate_storage()
+fills the server's memory or SQLite storage for in-process runs
+(load_test.py --scale).
+
+Usage:
+    python generate_scale_data.py --preset archive --target fake --output scale_data.json
+    FIRESTORE_BACKEND=fake FAKE_FIRESTORE_DATA=scale_data.json python load_test.py
+    FIRESTORE_EMULATOR_HOST=localhost:8080 python generate_scale_data.py \
+        --scale publications=20000,news=2000 --target firestore --project demo-sesgrg
+
+--target firestore writes to the Firestore emulator when FIRESTORE_EMULATOR_HOST
+is set; writing to a real project also needs --yes-write-to-real-project.
+"""
+import argparse
+import math
+import os
+import random
+import string
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend"))
+
+import fake_firestore  # noqa: E402
+from news_render import derive_news_fields  # noqa: E402
+
+# Documents per collection; "archive" is roughly a ten-year lab archive
+PRESETS = {
+    "small": {"publications": 200, "news": 50, "events": 40, "people": 20},
+    "archive": {"publications": 5000, "news": 1000, "events": 600, "people": 150},
+    "large": {"publications": 50000, "news": 10000, "events": 5000, "people": 500},
+}
+COLLECTIONS = ("people", "publications", "news", "events")
+
+# Firestore rejects batches over 500 writes
+BATCH_WRITES = 500
+
+FIRST_YEAR = 2015
+LAST_YEAR = 2025
+
+AREAS = [
+    "Smart Grid Technologies", "Microgrids & Distributed Energy Systems", "Renewable Energy Integration",
+    "Grid Optimization & Stability", "Energy Storage Systems", "Power System Automation",
+    "Cybersecurity and AI for Power Infrastructure",
+]
+KEYWORDS = [
+    "smart grid", "renewable energy", "microgrid", "energy storage", "solar PV", "wind power",
+    "demand response", "battery management", "optimal power flow", "load forecasting", "machine learning",
+    "deep learning", "reinforcement learning", "frequency control", "voltage stability", "power electronics",
+    "electric vehicles", "vehicle-to-grid", "state estimation", "cybersecurity", "false data injection",
+    "energy management system", "hydrogen", "inverter control", "harmonics", "distribution network",
+    "peer-to-peer trading", "blockchain", "digital twin", "phasor measurement unit", "fault detection",
+    "resilience", "carbon emissions", "rural electrification", "net metering", "virtual power plant",
+]
+TITLE_WORDS = [
+    "A", "Novel", "Robust", "Data-Driven", "Hierarchical", "Distributed", "Adaptive", "Framework", "Approach",
+    "for", "in", "of", "with", "Using", "Under", "Uncertainty", "Analysis", "Control", "Optimization",
+    "Networks", "Systems", "Bangladesh", "Case", "Study", "Model", "Predictive", "Real-Time", "Scheduling",
+]
+FIRST_NAMES = [
+    "Rahim", "Karim", "Nusrat", "Farhana", "Tanvir", "Sadia", "Mahmud", "Ayesha", "Imran", "Shakil", "Tasnim",
+    "Rafiq", "Sabrina", "Arif", "Nadia", "Zahid", "Mehedi", "Rumana", "Fahim", "Laila", "John", "Maria", "Wei",
+    "Hiroshi", "Anika", "Omar", "Priya", "Lucas",
+]
+LAST_NAMES = [
+    "Rahman", "Hossain", "Ahmed", "Islam", "Chowdhury", "Khan", "Karim", "Siddique", "Hasan", "Akter", "Alam",
+    "Uddin", "Sarker", "Das", "Roy", "Smith", "Zhang", "Tanaka", "Garcia", "Muller", "Sharma", "Kim",
+]
+JOURNALS = [
+    "IEEE Transactions on Smart Grid", "IEEE Transactions on Power Systems", "Applied Energy",
+    "Renewable Energy", "Energy", "IEEE Access", "Journal of Energy Storage", "Electric Power Systems Research",
+    "International Journal of Electrical Power & Energy Systems", "Sustainable Energy, Grids and Networks",
+]
+CONFERENCES = [
+    "IEEE PES General Meeting", "IEEE SmartGridComm", "ICECE", "IEEE ISGT Asia", "ICREST", "IEEE ECCE",
+]
+PUBLISHERS = ["Springer", "Elsevier", "IEEE Press", "Wiley", "CRC Press"]
+EVENT_TYPES = ["seminar", "workshop", "conference", "webinar", "lab visit", "thesis defense"]
+LOCATIONS = ["BRAC University, Dhaka", "Online", "Room 7A-01, BRAC University", "Dhaka", "Singapore", "Kuala Lumpur"]
+PERSON_CATEGORIES = [("advisor", 0.08), ("team_member", 0.62), ("collaborator", 0.30)]
+PERSON_TITLES = {
+    "advisor": ["Professor", "Associate Professor", "Assistant Professor"],
+    "team_member": ["Research Assistant", "PhD Student", "MSc Student", "Undergraduate Researcher"],
+    "collaborator": ["Research Fellow", "Industry Partner", "Visiting Researcher", "Postdoctoral Researcher"],
+}
+IMAGES = [
+    "https://images.unsplash.com/photo-1473341304170-971dccb5ac1e?w=800&q=80",
+    "https://images.unsplash.com/photo-1497435334941-8c899ee9e8e9?w=800&q=80",
+    "https://images.unsplash.com/photo-1466611653911-95081537e5b7?w=800&q=80",
+    "https://images.unsplash.com/photo-1593941707874-ef0b23880c27?w=800&q=80",
+    "https://images.unsplash.com/photo-1509391366360-2e959784a276?w=800&q=80",
+]
+PORTRAITS = [f"https://images.unsplash.com/photo-{n}?w=400&h=400&fit=crop" for n in (
+    "1500648767791-00dcc994a43e", "1494790108377-be9c29b29330", "1507003211169-0a1dd7228f2d",
+    "1438761681033-6461ffad8d80", "1472099645785-5658abf4ff4e", "1544005313-94ddf0286df2",
+)]
+SENTENCE_WORDS = [
+    "the", "grid", "research", "team", "energy", "storage", "results", "system", "model", "power", "solar",
+    "students", "demonstrated", "improved", "reliability", "during", "peak", "demand", "our", "laboratory",
+    "partners", "new", "control", "strategy", "reduces", "losses", "across", "distribution", "feeders", "and",
+    "with", "a", "of", "in", "for", "to", "on", "measurements", "field", "trial", "villages", "microgrid",
+]
+
+
+def zipf_weights(n, exponent=1.1):
+    """Weights of a Zipf distribution over n ranked items"""
+    return [1 / (rank ** exponent) for rank in range(1, n + 1)]
+
+
+class DatasetGenerator:
+    """Builds documents in their stored form (datetimes, derived news fields)"""
+
+    def __init__(self, seed=42):
+        self.rng = random.Random(seed)
+        self.now = datetime(LAST_YEAR, 12, 31)
+        # A few prolific lab authors, many occasional co-authors
+        authors = {f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}" for _ in range(400)}
+        self.authors = sorted(authors)
+        self.rng.shuffle(self.authors)
+        self.author_weights = zipf_weights(len(self.authors))
+        self.keyword_weights = zipf_weights(len(KEYWORDS), 0.9)
+        self.area_keywords = {area: self.rng.sample(KEYWORDS, 8) for area in AREAS}
+
+    def document_id(self):
+        # Seeded, but shaped like Firestore's auto ids
+        return "".join(self.rng.choices(string.ascii_letters + string.digits, k=20))
+
+    def timestamp(self, year):
+        return datetime(year, 1, 1) + timedelta(seconds=self.rng.randrange(365 * 24 * 3600))
+
+    def year(self):
+        # Output grows over time: later years are more likely
+        years = list(range(FIRST_YEAR, LAST_YEAR + 1))
+        return self.rng.choices(years, weights=[1 + 0.25 * i for i in range(len(years))])[0]
+
+    def title(self, low=6, high=14):
+        words = [self.rng.choice(TITLE_WORDS) for _ in range(self.rng.randint(low, high))]
+        words.insert(self.rng.randrange(len(words)), self.rng.choice(KEYWORDS).title())
+        return " ".join(words)
+
+    def sentence(self):
+        words = [self.rng.choice(SENTENCE_WORDS) for _ in range(self.rng.randint(8, 24))]
+        return " ".join(words).capitalize() + "."
+
+    def publication(self):
+        year = self.year()
+        kind = self.rng.choices(["journal", "conference", "book_chapter"], weights=[50, 40, 10])[0]
+        areas = self.rng.sample(AREAS, self.rng.choices([1, 2, 3], weights=[55, 35, 10])[0])
+        keywords = set(self.rng.sample(self.area_keywords[areas[0]], 2))
+        keywords.update(self.rng.choices(KEYWORDS, weights=self.keyword_weights, k=self.rng.randint(1, 4)))
+        authors = []
+        author_count = self.rng.randint(2, 8)
+        while len(authors) < author_count:
+            author = self.rng.choices(self.authors, weights=self.author_weights)[0]
+            if author not in authors:
+                authors.append(author)
+        # Heavy-tailed citations that accumulate with age
+        age = LAST_YEAR - year + 1
+        citations = int(self.rng.lognormvariate(math.log(2 + 3 * age), 1.0)) if self.rng.random() > 0.15 else 0
+        created = self.timestamp(year)
+        publication = {
+            "title": self.title(),
+            "authors": authors,
+            "publication_type": kind,
+            "year": year,
+            "month": created.strftime("%B"),
+            "keywords": sorted(keywords),
+            "link": f"https://doi.org/10.{self.rng.randint(1000, 9999)}/{self.document_id()[:10].lower()}",
+            "is_open_access": self.rng.random() < 0.3,
+            "citations": citations,
+            "research_areas": areas,
+            "created_at": created,
+            "updated_at": created,
+        }
+        if kind == "journal":
+            publication.update({
+                "journal_name": self.rng.choice(JOURNALS),
+                "volume": str(self.rng.randint(1, 80)),
+                "issue": str(self.rng.randint(1, 12)),
+                "pages": self.pages(),
+            })
+        elif kind == "conference":
+            publication.update({
+                "conference_name": f"{self.rng.choice(CONFERENCES)} {year}",
+                "location": self.rng.choice(LOCATIONS),
+                "pages": self.pages(),
+            })
+        else:
+            publication.update({
+                "book_title": self.title(4, 8),
+                "publisher": self.rng.choice(PUBLISHERS),
+                "editor": self.rng.sample(self.authors[:50], 2),
+                "edition": f"{self.rng.randint(1, 3)}",
+                "pages": self.pages(),
+            })
+        return publication
+
+    def pages(self):
+        start = self.rng.randint(1, 9000)
+        return f"{start}-{start + self.rng.randint(5, 20)}"
+
+    def rich_text(self):
+        """Editor-style HTML; sizes are log-normal around 6 KB"""
+        target = int(self.rng.lognormvariate(math.log(6000), 0.5))
+        parts = []
+        size = 0
+        while size < target:
+            roll = self.rng.random()
+            if roll < 0.15:
+                part = f"<h2>{self.title(3, 6)}</h2>"
+            elif roll < 0.25:
+                items = "".join(f"<li>{self.sentence()}</li>" for _ in range(self.rng.randint(3, 6)))
+                part = f"<ul>{items}</ul>"
+            elif roll < 0.30:
+                part = f'<p><img src="{self.rng.choice(IMAGES)}" alt="{self.title(3, 5)}"></p>'
+            elif roll < 0.35:
+                part = f"<blockquote>{self.sentence()}</blockquote>"
+            else:
+                sentences = " ".join(self.sentence() for _ in range(self.rng.randint(3, 8)))
+                part = f"<p>{sentences} <strong>{self.rng.choice(KEYWORDS)}</strong></p>"
+            parts.append(part)
+            size += len(part)
+        return "".join(parts)
+
+    def news(self):
+        published = self.timestamp(self.year())
+        news = {
+            "title": self.title(5, 10),
+            "content": self.rich_text(),
+            "excerpt": None,
+            "author": self.rng.choices(self.authors, weights=self.author_weights)[0],
+            "published_date": published,
+            "category": self.rng.choices(["news", "events", "upcoming_events"], weights=[70, 20, 10])[0],
+            "is_featured": self.rng.random() < 0.05,
+            "image": self.rng.choice(IMAGES),
+            "image_alt": self.title(3, 5),
+            "tags": self.rng.sample(KEYWORDS, self.rng.randint(1, 4)),
+            "seo_keywords": ", ".join(self.rng.sample(KEYWORDS, 3)),
+            "status": "published" if self.rng.random() < 0.95 else "draft",
+            "google_calendar_link": None,
+            "created_at": published,
+            "updated_at": published,
+        }
+        news.update(derive_news_fields(news))
+        return news
+
+    def event(self):
+        # Mostly past events, with a schedule of upcoming ones
+        start = datetime(FIRST_YEAR, 1, 1)
+        span_days = (self.now - start).days + 365
+        date = start + timedelta(days=self.rng.randrange(span_days), hours=self.rng.randint(9, 17))
+        return {
+            "title": self.title(4, 9),
+            "description": " ".join(self.sentence() for _ in range(self.rng.randint(2, 5))),
+            "date": date,
+            "end_date": date + timedelta(hours=self.rng.choice([1, 2, 3, 8, 24, 48])),
+            "location": self.rng.choice(LOCATIONS),
+            "event_type": self.rng.choice(EVENT_TYPES),
+            "image": self.rng.choice(IMAGES) if self.rng.random() < 0.6 else None,
+            "registration_link": "https://forms.gle/" + self.document_id()[:12] if self.rng.random() < 0.4 else None,
+            "created_at": date - timedelta(days=self.rng.randint(7, 60)),
+            "updated_at": date - timedelta(days=self.rng.randint(0, 7)),
+        }
+
+    def person(self):
+        category = self.rng.choices([c for c, _ in PERSON_CATEGORIES], weights=[w for _, w in PERSON_CATEGORIES])[0]
+        name = f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+        created = self.timestamp(self.year())
+        return {
+            "name": name,
+            "title": self.rng.choice(PERSON_TITLES[category]),
+            "department": "Electrical and Electronic Engineering",
+            "category": category,
+            "bio": " ".join(self.sentence() for _ in range(self.rng.randint(3, 7))),
+            "research_interests": self.rng.sample(AREAS, self.rng.randint(1, 3)),
+            "image": self.rng.choice(PORTRAITS),
+            "email": name.lower().replace(" ", ".") + "@bracu.ac.bd",
+            "social_links": {"google_scholar": "https://scholar.google.com/citations?user=" + self.document_id()[:12]},
+            "created_at": created,
+            "updated_at": created,
+        }
+
+    def generate(self, counts):
+        """Yield (collection, doc_id, document) in a fixed order"""
+        factories = {"people": self.person, "publications": self.publication, "news": self.news,
+                     "events": self.event}
+        for collection in COLLECTIONS:
+            for _ in range(counts.get(collection, 0)):
+                yield collection, self.document_id(), factories[collection]()
+
+
+def split_news(document):
+    """(summary, body) as the API stores news: the body lives in news/{id}/body/content"""
+    # Same fields as server.BODY_FIELDS["news"]
+    body_fields = ("content", "rendered_html", "toc", "content_hash", "render_version")
+    summary = {key: value for key, value in document.items() if key not in body_fields}
+    body = {key: value for key, value in document.items() if key in body_fields}
+    return summary, body
+
+
+def populate_firestore(db, documents, batch_writes=BATCH_WRITES):
+    """Write documents through batched writes; returns the number of documents written"""
+    batch = db.batch()
+    pending = 0
+    written = 0
+    for collection, doc_id, document in documents:
+        ref = db.collection(collection).document(doc_id)
+        writes = [(ref, document)]
+        if collection == "news":
+            summary, body = split_news(document)
+            writes = [(ref, summary), (ref.collection("body").document("content"), body)]
+        if pending + len(writes) > batch_writes:
+            batch.commit()
+            batch = db.batch()
+            pending = 0
+        for target, data in writes:
+            batch.set(target, data)
+        pending += len(writes)
+        written += 1
+    if pending:
+        batch.commit()
+    return written
+
+
+def populate_storage(storage, documents):
+    """Write documents through a server storage backend (memory or SQLite); returns the number written"""
+    written = 0
+    for collection, doc_id, document in documents:
+        if collection == "news":
+            document, body = split_news(document)
+            storage.set_body(collection, doc_id, body)
+        storage.set(collection, doc_id, document)
+        written += 1
+    return written
+
+
+def parse_scale(spec):
+    counts = {}
+    for entry in spec.split(","):
+        collection, _, count = entry.partition("=")
+        if collection not in COLLECTIONS:
+            raise ValueError(f"Unknown collection {collection!r}; expected one of {', '.join(COLLECTIONS)}")
+        counts[collection] = int(count)
+    return counts
+
+
+def resolve_counts(preset=None, scale=None):
+    counts = dict(PRESETS[preset or "archive"]) if preset or not scale else {}
+    if scale:
+        counts.update(parse_scale(scale))
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--preset", choices=sorted(PRESETS), help="dataset size (default: archive)")
+    parser.add_argument("--scale", help="per-collection counts, e.g. publications=20000,news=500; overrides the preset")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--target", choices=["fake", "firestore"], default="fake")
+    parser.add_argument("--output", default="scale_data.json", help="JSON file written for --target fake")
+    parser.add_argument("--batch-size", type=int, default=BATCH_WRITES, help="writes per batch commit")
+    parser.add_argument("--project", help="Google Cloud project for --target firestore")
+    parser.add_argument("--yes-write-to-real-project", action="store_true",
+                        help="allow --target firestore without FIRESTORE_EMULATOR_HOST")
+    args = parser.parse_args()
+
+    counts = resolve_counts(args.preset, args.scale)
+    if args.target == "firestore":
+        if not args.project:
+            parser.error("--target firestore needs an explicit --project")
+        emulator = os.getenv("FIRESTORE_EMULATOR_HOST")
+        if not emulator and not args.yes_write_to_real_project:
+            parser.error(f"FIRESTORE_EMULATOR_HOST is not set, so this would write into the real project "
+                         f"{args.project!r}; pass --yes-write-to-real-project to do that")
+        from google.cloud import firestore
+        db = firestore.Client(project=args.project)
+        print(f"Writing to Firestore project {args.project} ({f'emulator at {emulator}' if emulator else 'REAL project'})")
+    else:
+        db = fake_firestore.Client()
+
+    print(f"Generating {', '.join(f'{count} {name}' for name, count in counts.items())} (seed {args.seed})")
+    start = time.perf_counter()
+    written = populate_firestore(db, DatasetGenerator(args.seed).generate(counts), min(args.batch_size, BATCH_WRITES))
+    print(f"✅ Wrote {written} documents in {time.perf_counter() - start:.1f} s")
+
+    if args.target == "fake":
+        db.dump(args.output)
+        size_mb = os.path.getsize(args.output) / 1e6
+        print(f"✅ Saved to {args.output} ({size_mb:.1f} MB); run with "
+              f"FIRESTORE_BACKEND=fake FAKE_FIRESTORE_DATA={args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
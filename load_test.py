@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""Asynchronous load test for the SESGRG API.
+
+Drives the FastAPI app in-process through httpx's ASGI transport (no server
+needed), a uvicorn process started for the run, or any running deployment,
+with a fixed number of concurrent virtual users for a fixed duration.
+Reports throughput and p50/p95/p99 latency per endpoint as a table and JSON.
+
+Usage:
+    python load_test.py --mix public --concurrency 50 --duration 30
+    FIRESTORE_BACKEND=fake python load_test.py --mix admin --target uvicorn --json results.json
+    python load_test.py --mix mixed --target http://localhost:8001
+    python load_test.py --scale archive           # in-process, with a generated dataset
+
+Seeding a dataset or running a mix with write steps against a local backend
+requires FIRESTORE_BACKEND=fake or STORAGE_BACKEND=memory, so a run never
+writes into real data.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
+ADMIN_USERNAME = os.getenv("ADMIN_USERNAME", "admin")
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "@dminsesg705")
+
+
+# Each scenario step takes (client, state) and returns the endpoint label it
+# hit together with the response; labels use route templates so results
+# group per endpoint rather than per URL. Steps draw from state["random"],
+# the run's seeded generator, so a --seed run is reproducible.
+
+async def list_publications(client, state):
+    params = state["random"].choice([{}, {"search": "grid"}, {"research_area": "Smart Grid Technologies"}, {"year": 2024}])
+    return "GET /api/publications", await client.get("/api/publications", params=params)
+
+async def list_people(client, state):
+    return "GET /api/people", await client.get("/api/people")
+
+async def list_projects(client, state):
+    return "GET /api/projects", await client.get("/api/projects")
+
+async def list_news(client, state):
+    return "GET /api/news?summary=true", await client.get("/api/news", params={"summary": "true", "limit": 10})
+
+async def get_news_item(client, state):
+    news_id = state["random"].choice(state["news_ids"]) if state["news_ids"] else "missing"
+    return "GET /api/news/{news_id}", await client.get(f"/api/news/{news_id}")
+
+async def list_events(client, state):
+    return "GET /api/events", await client.get("/api/events", params={"upcoming": "true"})
+
+async def list_research_areas(client, state):
+    return "GET /api/research-areas", await client.get("/api/research-areas")
+
+async def get_settings(client, state):
+    return "GET /api/settings", await client.get("/api/settings")
+
+async def dashboard_stats(client, state):
+    return "GET /api/dashboard/stats", await client.get("/api/dashboard/stats", headers=state["auth"])
+
+async def create_update_delete_news(client, state):
+    """An admin edit burst: create an article, update it twice, delete it"""
+    article = {
+        "title": f"Load test article {state['random'].randint(0, 10 ** 6)}",
+        "content": "<h2>Intro</h2><p>" + "Smart grid research update. " * 50 + "</p>",
+        "author": "Load Test",
+        "published_date": datetime.utcnow().isoformat(),
+        "status": "draft",
+    }
+    response = await client.post("/api/news", json=article, headers=state["auth"])
+    if response.status_code != 200:
+        return "POST /api/news", response
+    news_id = response.json()["id"]
+    for revision in range(2):
+        article["content"] += f"<p>Revision {revision}</p>"
+        await client.put(f"/api/news/{news_id}", json=article, headers=state["auth"])
+    return "POST+PUT+DELETE /api/news", await client.delete(f"/api/news/{news_id}", headers=state["auth"])
+
+async def create_delete_event(client, state):
+    event = {
+        "title": "Load test seminar",
+        "description": "Generated by load_test.py",
+        "date": (datetime.utcnow() + timedelta(days=7)).isoformat(),
+        "location": "Online",
+        "event_type": "seminar",
+    }
+    response = await client.post("/api/events", json=event, headers=state["auth"])
+    if response.status_code != 200:
+        return "POST /api/events", response
+    return "POST+DELETE /api/events", await client.delete(f"/api/events/{response.json()['id']}", headers=state["auth"])
+
+
+# Request mixes as (weight, step) pairs
+MIXES = {
+    "public": [
+        (30, list_publications), (15, list_people), (10, list_projects), (15, list_news),
+        (10, get_news_item), (10, list_events), (5, list_research_areas), (5, get_settings),
+    ],
+    "admin": [
+        (50, create_update_delete_news), (30, create_delete_event), (20, dashboard_stats),
+    ],
+    "mixed": [
+        (30, list_publications), (15, list_people), (10, list_news), (10, get_news_item),
+        (10, list_events), (5, get_settings), (10, dashboard_stats), (5, create_update_delete_news),
+        (5, create_delete_event),
+    ],
+}
+ADMIN_STEPS = {dashboard_stats, create_update_delete_news, create_delete_event}
+WRITE_STEPS = {create_update_delete_news, create_delete_event}
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+class LoadTest:
+    def __init__(self, client, mix, concurrency, duration, seed=None):
+        self.client = client
+        self.steps = MIXES[mix]
+        self.mix = mix
+        self.concurrency = concurrency
+        self.duration = duration
+        self.random = random.Random(seed)
+        self.latencies = {}  # endpoint -> [seconds]
+        self.statuses = {}  # endpoint -> {status: count}
+        self.errors = {}  # endpoint -> count of transport errors
+        self.state = {"auth": {}, "news_ids": [], "random": self.random}
+
+    async def prepare(self):
+        """Log in once for admin steps and collect ids for detail requests"""
+        if any(step in ADMIN_STEPS for _, step in self.steps):
+            response = await self.client.post(
+                "/api/auth/login", json={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+            )
+            response.raise_for_status()
+            self.state["auth"] = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        response = await self.client.get("/api/news", params={"summary": "true"})
+        if response.status_code == 200:
+            self.state["news_ids"] = [item["id"] for item in response.json()]
+
+    def pick_step(self):
+        total = sum(weight for weight, _ in self.steps)
+        choice = self.random.uniform(0, total)
+        for weight, step in self.steps:
+            choice -= weight
+            if choice <= 0:
+                return step
+        return self.steps[-1][1]
+
+    async def user(self, deadline):
+        while time.perf_counter() < deadline:
+            step = self.pick_step()
+            start = time.perf_counter()
+            try:
+                endpoint, response = await step(self.client, self.state)
+            except httpx.HTTPError:
+                self.errors[step.__name__] = self.errors.get(step.__name__, 0) + 1
+                continue
+            self.latencies.setdefault(endpoint, []).append(time.perf_counter() - start)
+            statuses = self.statuses.setdefault(endpoint, {})
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    async def run(self):
+        await self.prepare()
+        start = time.perf_counter()
+        deadline = start + self.duration
+        await asyncio.gather(*(self.user(deadline) for _ in range(self.concurrency)))
+        return self.report(time.perf_counter() - start)
+
+    def report(self, elapsed):
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values.sort()
+            endpoints[endpoint] = {
+                "requests": len(values),
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+                "statuses": {str(code): count for code, count in sorted(self.statuses[endpoint].items())},
+            }
+        total = sum(item["requests"] for item in endpoints.values())
+        return {
+            "mix": self.mix,
+            "concurrency": self.concurrency,
+            "duration_s": round(elapsed, 2),
+            "total_requests": total,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "transport_errors": self.errors,
+            "endpoints": endpoints,
+        }
+
+
+def print_table(report):
+    print(f"\n📊 {report['mix']} mix, {report['concurrency']} users, {report['duration_s']} s: "
+          f"{report['total_requests']} requests, {report['throughput_rps']} req/s")
+    header = f"{'endpoint':<32} {'reqs':>7} {'rps':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}  statuses"
+    print(header)
+    print("-" * len(header))
+    for endpoint, item in report["endpoints"].items():
+        statuses = ",".join(f"{code}:{count}" for code, count in item["statuses"].items())
+        print(f"{endpoint:<32} {item['requests']:>7} {item['throughput_rps']:>8} {item['p50_ms']:>9} "
+              f"{item['p95_ms']:>9} {item['p99_ms']:>9} {item['max_ms']:>9}  {statuses}")
+    if report["transport_errors"]:
+        print(f"❌ Transport errors: {report['transport_errors']}")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_uvicorn(workers):
+    """Start the backend under uvicorn on a free port and wait for /api/health"""
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        try:
+            if httpx.get(f"{base_url}/api/health").status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("uvicorn did not become healthy")
+
+
+def disposable_backend(server=None):
+    """Whether a local backend keeps its data in a throwaway store: memory, or the fake Firestore.
+
+    Checks the imported server module when given, otherwise the environment a
+    uvicorn child process would inherit.
+    """
+    if server is not None:
+        import fake_firestore
+        return server.storage.name == "memory" or isinstance(server.db, fake_firestore.Client)
+    backend = os.getenv("STORAGE_BACKEND", "firestore")
+    return backend == "memory" or (backend == "firestore" and os.getenv("FIRESTORE_BACKEND") == "fake")
+
+
+def require_disposable_backend(server, mix, scale):
+    """Refuse to seed data or run write steps against a persistent backend"""
+    if not (scale or any(step in WRITE_STEPS for _, step in MIXES[mix])) or disposable_backend(server):
+        return
+    action = "seed --scale data" if scale else f"run the {mix!r} mix, which writes,"
+    raise SystemExit(f"Refusing to {action} against a persistent backend; "
+                     "set FIRESTORE_BACKEND=fake or STORAGE_BACKEND=memory")
+
+
+def seed_scale_data(server, preset, seed):
+    """Load a generated dataset into the in-process backend's store"""
+    import generate_scale_data
+    documents = generate_scale_data.DatasetGenerator(seed).generate(generate_scale_data.resolve_counts(preset))
+    if server.db is None:
+        written = generate_scale_data.populate_storage(server.storage, documents)
+    else:
+        written = generate_scale_data.populate_firestore(server.db, documents)
+    print(f"Seeded {written} generated documents ({preset})")
+
+
+def make_client(target, concurrency, timeout, mix, scale=None, seed=None):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if target == "inprocess":
+        sys.path.insert(0, BACKEND_DIR)
+        # Login throttling would otherwise treat the whole run as one client
+        os.environ.setdefault("LOGIN_IP_BURST", "1000000")
+        import server
+        require_disposable_backend(server, mix, scale)
+        if scale:
+            seed_scale_data(server, scale, 42 if seed is None else seed)
+        # Unhandled server errors are counted as 500s instead of aborting the run
+        transport = httpx.ASGITransport(app=server.app, raise_app_exceptions=False)
+        return httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=timeout)
+    return httpx.AsyncClient(base_url=target, limits=limits, timeout=timeout)
+
+
+async def run_load_test(target, mix, concurrency, duration, timeout=30.0, seed=None, scale=None):
+    async with make_client(target, concurrency, timeout, mix, scale, seed) as client:
+        return await LoadTest(client, mix, concurrency, duration, seed).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="inprocess",
+                        help="'inprocess' (default), 'uvicorn' to start a local server, or a base URL")
+    parser.add_argument("--mix", choices=sorted(MIXES), default="public")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --target uvicorn")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--scale", choices=["small", "archive", "large"],
+                        help="seed the in-process backend with a generated dataset (see generate_scale_data.py)")
+    parser.add_argument("--json", help="write the JSON report to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    process = None
+    target = args.target
+    if target == "uvicorn":
+        require_disposable_backend(None, args.mix, None)
+        process, target = start_uvicorn(args.workers)
+    try:
+        report = asyncio.run(run_load_test(target, args.mix, args.concurrency, args.duration, args.timeout, args.seed,
+                                            args.scale))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print_table(report)
+    if args.json == "-":
+        print(json.dumps(report, indent=2))
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n✅ Report written to {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())